@@ -0,0 +1,11 @@
+"""
+Benchmarks for callblocker's hot paths. Benchmarks run against a throwaway test database which is
+created and destroyed by the harness, and are meant to be run from the project root. The whole suite
+runs with:
+
+    python -m benchmarks --output results.json
+
+and single benchmarks can be run as modules, e.g.:
+
+    python -m benchmarks.serialization
+"""
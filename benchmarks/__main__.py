@@ -0,0 +1,69 @@
+"""
+Runs the whole benchmark suite against a throwaway test database, and writes the results as JSON, so that
+runs (e.g. of different releases) can be compared. A full run seeds a million callers and ten million calls
+for the listing benchmarks, which takes a while; --quick runs everything on a smaller scale.
+"""
+import argparse
+import json
+import sys
+from collections import OrderedDict
+
+from benchmarks import callers, eventloops, harness, modem, serialization, telcos
+
+#: Benchmarks by name, in the order they run. Each takes the parsed command line options.
+BENCHMARKS = OrderedDict([
+    ('match_token', lambda options: modem.match_token(options.lines, options.repeat)),
+    ('event_stream_fan_out', lambda options: modem.fan_out([1, 10, 100], options.events)),
+    ('parse_cid', lambda options: telcos.parse_cid(options.cids, options.repeat)),
+    ('call_monitor', lambda options: eventloops.run(
+        'asyncio', options.screened, options.samples, warmup=50
+    )),
+    ('caller_listings', lambda options: callers.run(options.listing_repeat, warmup=0)),
+    ('caller_list_serialization', lambda options: serialization.run(1000, options.repeat)),
+])
+
+#: Options for full and quick runs. Caller listings get fewer repeats, as each takes tens of seconds on the
+#: full dataset.
+SCALES = {
+    'full': {'lines': 100000, 'events': 10000, 'cids': 1000, 'screened': 1000, 'samples': 200,
+             'callers': 1000000, 'calls': 10000000, 'repeat': 20, 'listing_repeat': 3},
+    'quick': {'lines': 10000, 'events': 1000, 'cids': 100, 'screened': 200, 'samples': 50,
+              'callers': 10000, 'calls': 100000, 'repeat': 5, 'listing_repeat': 5},
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--output', '-o', help='file to write results to (defaults to stdout)')
+    parser.add_argument('--only', nargs='+', choices=list(BENCHMARKS), help='benchmarks to run')
+    parser.add_argument('--quick', action='store_true', help='run on a smaller scale')
+    args = parser.parse_args()
+    options = argparse.Namespace(**SCALES['quick' if args.quick else 'full'])
+    names = args.only or list(BENCHMARKS)
+
+    harness.setup()
+
+    results = OrderedDict()
+    with harness.test_database():
+        if 'caller_listings' in names:
+            callers.seed(options.callers, options.calls)
+        for name in names:
+            print(f'Running {name}...', file=sys.stderr)
+            results[name] = BENCHMARKS[name](options)
+
+    suite = {
+        'environment': harness.environment(),
+        'scale': 'quick' if args.quick else 'full',
+        'options': vars(options),
+        'results': results
+    }
+    if args.output:
+        with open(args.output, 'w') as out:
+            json.dump(suite, out, indent=2)
+    else:
+        json.dump(suite, sys.stdout, indent=2)
+        sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
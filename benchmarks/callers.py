@@ -0,0 +1,74 @@
+"""
+Benchmarks caller listings through :class:`CallerViewSet`: the default listing, text search, and each of
+the orderings, on a dataset seeded by the gendata command's generator (a million callers and ten million calls, by
+default).
+"""
+import argparse
+from datetime import datetime, timezone
+from typing import Any, Dict
+
+from benchmarks import harness
+
+#: Query strings for the listings we measure. Search terms match some of the generated descriptions (see
+#: callblocker.blocker.gendata), and part of a number.
+QUERIES = {
+    'list': 'limit=50',
+    'search_description': 'limit=50&text=Mariana Ribeiro&ordering=text_score',
+    'search_number': 'limit=50&text=11991234&ordering=text_score',
+    'order_description': 'limit=50&ordering=description',
+    'order_calls': 'limit=50&ordering=calls',
+    'order_date_inserted': 'limit=50&ordering=date_inserted',
+    'order_last_call': 'limit=50&ordering=last_call',
+}
+
+#: Where the seeded call log ends. Fixed, so that every run seeds the same data.
+SEED_END = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+
+def seed(callers: int, calls: int, blocked: float = 0.1):
+    from django.db import connection
+
+    from callblocker.blocker import gendata
+
+    gendata.generate(callers, calls, blocked, SEED_END)
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def run(repeat: int, warmup: int = 1) -> Dict[str, Any]:
+    from rest_framework.test import APIRequestFactory
+
+    from callblocker.blocker.api.views import CallerViewSet
+
+    factory = APIRequestFactory()
+    view = CallerViewSet.as_view({'get': 'list'})
+
+    def listing(query: str):
+        def get():
+            response = view(factory.get(f'/api/callers/?{query}', HTTP_HOST='localhost'))
+            assert response.status_code == 200, response.data
+            return response.render()
+        return get
+
+    return {
+        name: harness.measure(listing(query), repeat=repeat, warmup=warmup)
+        for name, query in QUERIES.items()
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--callers', type=int, default=1000000)
+    parser.add_argument('--calls', type=int, default=10000000)
+    # Listings take tens of seconds each on the full dataset.
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    harness.setup()
+    with harness.test_database():
+        seed(args.callers, args.calls)
+        harness.report('caller_listings', {'callers': args.callers, 'calls': args.calls, **run(args.repeat, warmup=0)})
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+"""
+Compares event loop backends (see :mod:`callblocker.core.eventloops`) by running the modem and call monitor
+against a scripted modem on each of them. Reports throughput, as modem events per second when calls arrive
+back to back, and dispatch latency, from a caller id line reaching the modem's read buffer to the call
+monitor's screening decision, when calls arrive one at a time.
+"""
+import argparse
+import itertools
+import time
+from threading import Event
+from typing import Any, Dict, List, Tuple
+
+from benchmarks import harness
+
+#: Numbers of the callers we make up. Each call comes from a new one, so every call goes down the same path.
+#: Landline numbers starting with 7 are never generated by gendata, which keeps them apart from seeded callers.
+_numbers = itertools.count(70000000)
+
+
+class Pipeline(object):
+    """A modem and a call monitor on their own event loop, fed by a scripted modem."""
+
+    def __init__(self, loop_factory):
+        from callblocker.blocker.callmonitor import CallMonitor
+        from callblocker.blocker.telcos import Vivo
+        from callblocker.core.modem import Modem
+        from callblocker.core.service import AsyncioEventLoop
+        from callblocker.core.tests.fakeserial import CX930xx_fake, ScriptedModem
+
+        self.aio_loop = AsyncioEventLoop(loop_factory=loop_factory)
+        # Command mode keeps the scripted modem running once its (empty) script is done.
+        self.device = ScriptedModem(self.aio_loop, command_mode=True)
+        self.modem = Modem(CX930xx_fake, self.device, self.aio_loop)
+        self.monitor = CallMonitor(Vivo(), self.modem, self.aio_loop)
+        self.monitor.add_listener(self._decided)
+        self.encoding = CX930xx_fake.encoding
+        self.newline = CX930xx_fake.newline
+
+        self._decisions: Dict[str, float] = {}
+        self._expected = 0
+        self._done = Event()
+
+    def start(self):
+        self.aio_loop.sync_start(10)
+        self.modem.sync_start(10)
+        self.monitor.sync_start(10)
+
+    def stop(self):
+        from callblocker.core.service import ServiceState
+
+        for service in [self.monitor, self.modem, self.device, self.aio_loop]:
+            # Stopping the modem closes the scripted modem along with it.
+            if service.status().state == ServiceState.READY:
+                service.sync_stop(10)
+
+    def call(self, numbers: List[str]) -> Dict[str, Tuple[float, float]]:
+        """
+        Rings with calls from `numbers`, back to back, and waits for all of them to be screened.
+
+        :return: when each call got fed to the modem, and when it got screened, by number.
+        """
+        self._decisions = {}
+        self._expected = len(numbers)
+        self._done.clear()
+
+        sent = {}
+        for number in numbers:
+            sent[number] = time.perf_counter()
+            self._feed(f'RING\nNMBR = 2111{number}')
+
+        if not self._done.wait(60):
+            raise TimeoutError(f'Only {len(self._decisions)} out of {len(numbers)} calls got screened.')
+        return {number: (sent[number], self._decisions[number]) for number in numbers}
+
+    def _feed(self, lines: str):
+        data = b''.join(line.encode(self.encoding) + self.newline for line in lines.splitlines())
+        self.aio_loop.aio_loop.call_soon_threadsafe(self.device.out_buffer.feed_data, data)
+
+    def _decided(self, caller, _):
+        self._decisions[caller.number] = time.perf_counter()
+        if len(self._decisions) == self._expected:
+            self._done.set()
+
+
+def run(backend: str, calls: int, samples: int, warmup: int) -> Dict[str, Any]:
+    from callblocker.core import eventloops
+
+    try:
+        factory = eventloops.resolve(backend)
+    except ImportError as ex:
+        return {'available': False, 'reason': str(ex)}
+
+    pipeline = Pipeline(factory)
+    pipeline.start()
+    try:
+        pipeline.call(_next_numbers(warmup))
+
+        timings = pipeline.call(_next_numbers(calls))
+        elapsed = max(decided for _, decided in timings.values()) - min(sent for sent, _ in timings.values())
+
+        latencies = []
+        for _ in range(samples):
+            (sent, decided), = pipeline.call(_next_numbers(1)).values()
+            latencies.append((decided - sent) * 1000)
+    finally:
+        pipeline.stop()
+
+    return {
+        'available': True,
+        'calls': calls,
+        # Every call is a RING and a caller id.
+        'events_per_second': 2 * calls / elapsed,
+        'latency': harness.percentiles(latencies)
+    }
+
+
+def _next_numbers(n: int) -> List[str]:
+    return [str(number) for number in itertools.islice(_numbers, n)]
+
+
+def main():
+    from callblocker.core.eventloops import BACKENDS
+
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--backends', nargs='+', default=list(BACKENDS),
+                        help='backend names, or dotted paths to event loop factories')
+    parser.add_argument('--calls', type=int, default=1000, help='calls to ring with back to back')
+    parser.add_argument('--samples', type=int, default=200, help='calls to measure dispatch latency on')
+    parser.add_argument('--warmup', type=int, default=50)
+    args = parser.parse_args()
+
+    harness.setup()
+    with harness.test_database():
+        harness.report('event_loops', {
+            backend: run(backend, args.calls, args.samples, args.warmup) for backend in args.backends
+        })
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Iterable, Sequence
+
+import django
+
+
+def setup():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conf.settings.development')
+    django.setup()
+
+
+@contextmanager
+def test_database():
+    """
+    Creates a fresh test database (with migrations and base fixtures applied) for the duration of the
+    block, and destroys it afterwards. This is the same database pytest would use.
+    """
+    from django.core.management import call_command
+    from django.db import connection
+
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True)
+    try:
+        call_command('loaddata', 'initial.yaml', verbosity=0)
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+
+
+def measure(fun: Callable[[], Any], repeat: int = 20, warmup: int = 2) -> Dict[str, float]:
+    """
+    Runs `fun` `warmup + repeat` times, and returns timing statistics (in milliseconds) for the
+    last `repeat` runs.
+    """
+    for _ in range(warmup):
+        fun()
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fun()
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'min_ms': min(timings),
+        'median_ms': statistics.median(timings),
+        'mean_ms': statistics.mean(timings),
+        'max_ms': max(timings)
+    }
+
+
+def percentiles(timings: Sequence[float], points: Iterable[int] = (50, 90, 99)) -> Dict[str, float]:
+    """
+    :param timings: timings, in milliseconds.
+    :return: the given percentiles (nearest-rank) of `timings`, along with the maximum.
+    """
+    timings = sorted(timings)
+    results = {
+        f'p{point}_ms': timings[max(0, -(-point * len(timings) // 100) - 1)]
+        for point in points
+    }
+    results['max_ms'] = timings[-1]
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    """:return: what the results depend on besides the code, plus the commit the code is at, if known."""
+    try:
+        commit = subprocess.run(
+            ['git', 'describe', '--always', '--dirty'], stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+
+    return {
+        'commit': commit,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python': platform.python_version(),
+        'platform': platform.platform()
+    }
+
+
+def report(name: str, results: Dict[str, Any], out=sys.stdout):
+    json.dump({'benchmark': name, 'results': results}, out, indent=2)
+    out.write('\n')
@@ -0,0 +1,106 @@
+"""
+Benchmarks the modem's hot paths: matching the lines read off the serial line into events, and fanning
+events out to the event streams of the services which listen to the modem.
+"""
+import argparse
+import asyncio
+import itertools
+import time
+from typing import Any, Dict, List
+
+from benchmarks import harness
+
+#: What a modem typically sends our way, ordered from the most to the least frequent token type.
+LINES = [
+    '',
+    'RING',
+    'DATE = 0321',
+    'TIME = 1405',
+    'NMBR = 2111992223451',
+    'NMBR = \x102111992223451',
+    'OK',
+    'ATZ',
+]
+
+
+def match_token(lines: int, repeat: int) -> Dict[str, Any]:
+    from callblocker.core.modem import Modem
+    from callblocker.core.modems import CX930xx
+
+    modem = Modem(CX930xx, None, None)
+    corpus = list(itertools.islice(itertools.cycle(LINES), lines))
+
+    def match():
+        for line in corpus:
+            modem._match_token(line)
+
+    timings = harness.measure(match, repeat=repeat)
+    return {
+        'lines': lines,
+        'lines_per_second': lines / (timings['median_ms'] / 1000),
+        'timings': timings
+    }
+
+
+def fan_out(subscribers: List[int], events: int) -> Dict[str, Any]:
+    from callblocker.core.modem import Modem, ModemEvent
+    from callblocker.core.modems import CX930xx
+    from callblocker.core.service import AsyncioEventLoop
+
+    aio_loop = AsyncioEventLoop()
+    aio_loop.sync_start(10)
+    modem = Modem(CX930xx, None, aio_loop)
+
+    async def consume(stream):
+        received = 0
+        async for _ in stream:
+            received += 1
+            if received == events:
+                return
+
+    async def broadcast(n: int) -> float:
+        streams = [modem.event_stream() for _ in range(n)]
+        consumers = [asyncio.ensure_future(consume(stream)) for stream in streams]
+        event = ModemEvent('CALL_ID', '2111992223451')
+
+        start = time.perf_counter()
+        for _ in range(events):
+            modem._dispatch(event)
+            # The modem yields to its listeners while it waits for the next line.
+            await asyncio.sleep(0)
+        await asyncio.gather(*consumers)
+        elapsed = time.perf_counter() - start
+
+        for stream in streams:
+            stream.close()
+        return elapsed
+
+    results = {}
+    try:
+        for n in subscribers:
+            elapsed = asyncio.run_coroutine_threadsafe(broadcast(n), aio_loop.aio_loop).result(60)
+            results[n] = {
+                'events_per_second': events / elapsed,
+                'deliveries_per_second': events * n / elapsed
+            }
+    finally:
+        aio_loop.sync_stop(10)
+
+    return {'events': events, 'subscribers': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--lines', type=int, default=100000)
+    parser.add_argument('--events', type=int, default=10000)
+    parser.add_argument('--subscribers', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    harness.setup()
+    harness.report('match_token', match_token(args.lines, args.repeat))
+    harness.report('event_stream_fan_out', fan_out(args.subscribers, args.events))
+
+
+if __name__ == '__main__':
+    main()
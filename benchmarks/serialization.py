@@ -0,0 +1,80 @@
+"""
+Compares the regular :class:`CallerSerializer` path with the :class:`ValuesListSerializer` fast path
+for a single page of caller listings.
+"""
+import argparse
+import random
+from datetime import timedelta
+
+from benchmarks import harness
+
+
+def seed(n_callers: int):
+    from django.utils import timezone
+    from callblocker.blocker.models import Caller, Call, Source, number_key
+
+    now = timezone.now()
+    callers = [
+        Caller(
+            id=number_key(f'11{i:08d}'),
+            full_number=f'11{i:08d}',
+            area_code='11',
+            number=f'{i:08d}',
+            description=f'Caller {i}',
+            block=random.random() < 0.5,
+            last_call=now - timedelta(minutes=i),
+            source_id=random.choice([Source.CID, Source.USER])
+        ) for i in range(n_callers)
+    ]
+    Caller.objects.bulk_create(callers)
+    Call.objects.bulk_create([
+        Call(caller=caller, time=now, blocked=caller.block) for caller in callers
+    ])
+
+
+def run(page_size: int, repeat: int):
+    from rest_framework.request import Request
+    from rest_framework.test import APIRequestFactory
+
+    from callblocker.blocker.api.serializer_extensions import ValuesListSerializer
+    from callblocker.blocker.api.serializers import CallerSerializer
+    from callblocker.blocker.api.views import CallerViewSet
+
+    view = CallerViewSet(
+        request=Request(APIRequestFactory().get('/api/callers/', HTTP_HOST='localhost')),
+        format_kwarg=None,
+        kwargs={}
+    )
+    context = view.get_serializer_context()
+    queryset = view.get_queryset()[:page_size]
+
+    def model_serializer():
+        return CallerSerializer(list(queryset), many=True, context=context).data
+
+    def values_serializer():
+        serializer = ValuesListSerializer(CallerSerializer, context)
+        return serializer.to_representation(serializer.values(queryset))
+
+    assert model_serializer() == values_serializer()
+
+    return {
+        'page_size': page_size,
+        'before': harness.measure(model_serializer, repeat=repeat),
+        'after': harness.measure(values_serializer, repeat=repeat)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    harness.setup()
+    with harness.test_database():
+        seed(args.page_size)
+        harness.report('caller_list_serialization', run(args.page_size, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Benchmarks caller id parsing with the :class:`Vivo` provider, both for the handful of numbers which call
+over and over again, which parsers cache, and for numbers which never call twice, which they don't.
+"""
+import argparse
+from typing import Any, Dict
+
+from benchmarks import harness
+
+#: Mobile and landline numbers, with and without operator codes.
+CIDS = ['2111992223451', '11992223451', '211132223451', '1132223451']
+
+
+def parse_cid(cids: int, repeat: int) -> Dict[str, Any]:
+    from callblocker.blocker.telcos import Vivo
+
+    provider = Vivo()
+    repeated = [CIDS[i % len(CIDS)] for i in range(cids)]
+    distinct = ['%s%08d' % (CIDS[i % len(CIDS)][:-8], i) for i in range(cids)]
+
+    def parse(corpus, cached):
+        def run():
+            if not cached:
+                provider._parse.cache_clear()
+            for cid in corpus:
+                provider.parse_cid(cid)
+        return run
+
+    results = {'cids': cids}
+    for name, corpus, cached in [('repeated', repeated, True), ('distinct', distinct, False)]:
+        timings = harness.measure(parse(corpus, cached), repeat=repeat)
+        results[name] = {'cids_per_second': cids / (timings['median_ms'] / 1000), 'timings': timings}
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--cids', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    harness.setup()
+    harness.report('parse_cid', parse_cid(args.cids, args.repeat))
+
+
+if __name__ == '__main__':
+    main()
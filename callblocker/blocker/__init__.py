@@ -6,10 +6,13 @@ default_app_config = 'callblocker.blocker.apps.BlockerConfig'
 class BootstrapMode(Enum):
     SERVER = 'server'
     FAKE_SERVER = 'fake_server'
+    DAEMON = 'daemon'
+    FAKE_DAEMON = 'fake_daemon'
     COMMAND = 'command'
 
 
-#: This is an ugly hack. See the blocker.bootstrap module documentation for more information.
+#: Which group of services gets bootstrapped when services are first needed. See the blocker.services module
+#: documentation for more information.
 BOOTSTRAP_MODE: BootstrapMode = BootstrapMode.COMMAND
 
 
@@ -0,0 +1,93 @@
+"""
+Streaming exporters for bulk data. Rows are read with server-side cursors and encoded in batches as they
+are read, so memory use does not depend on the size of the table being exported.
+"""
+import csv
+import json
+from datetime import datetime
+from typing import Iterator, List, Tuple
+
+from django.db.models import CharField, QuerySet
+from django.db.models.functions import Cast, Substr
+
+from callblocker.blocker.models import Call, Caller, COUNTRY_CODE
+
+#: Exported columns, as (header, queryset lookup or expression) pairs.
+CALLER_COLUMNS = [
+    ('full_number', 'full_number'),
+    ('area_code', 'area_code'),
+    ('number', 'number'),
+    ('block', 'block'),
+    ('date_inserted', 'date_inserted'),
+    ('last_call', 'last_call'),
+    ('description', 'description'),
+    ('notes', 'notes'),
+    ('source', 'source__name')
+]
+
+CALL_COLUMNS = [
+    ('id', 'id'),
+    # Callers by full number (see blocker.models.number_key), as the API knows them.
+    ('caller', Substr(Cast('caller_id', CharField()), len(COUNTRY_CODE) + 1)),
+    ('time', 'time'),
+    ('blocked', 'blocked')
+]
+
+
+class _Echo(object):
+    """File-like object which returns what is written to it, so csv.writer can encode one row at a time."""
+
+    def write(self, value):
+        return value
+
+
+class Exporter(object):
+    CONTENT_TYPES = {
+        'csv': 'text/csv',
+        'ndjson': 'application/x-ndjson'
+    }
+
+    def __init__(self, queryset: QuerySet, columns: List[Tuple[str, str]], chunk_size: int):
+        self.queryset = queryset.values_list(*[lookup for _, lookup in columns])
+        self.headers = [header for header, _ in columns]
+        self.chunk_size = chunk_size
+
+    def csv(self) -> Iterator[str]:
+        writer = csv.writer(_Echo())
+        yield writer.writerow(self.headers)
+        for batch in self._batches():
+            yield ''.join(writer.writerow(
+                [value.isoformat() if isinstance(value, datetime) else value for value in row]
+            ) for row in batch)
+
+    def ndjson(self) -> Iterator[str]:
+        headers = self.headers
+        for batch in self._batches():
+            yield ''.join(
+                json.dumps(dict(zip(headers, row)), default=_json_default) + '\n' for row in batch
+            )
+
+    def _batches(self) -> Iterator[List[tuple]]:
+        batch = []
+        for row in self.queryset.iterator(chunk_size=self.chunk_size):
+            batch.append(row)
+            if len(batch) == self.chunk_size:
+                yield batch
+                batch = []
+
+        if batch:
+            yield batch
+
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'Cannot serialize {type(value).__name__}')
+
+
+def callers(chunk_size: int) -> Exporter:
+    return Exporter(Caller.objects.order_by('full_number'), CALLER_COLUMNS, chunk_size)
+
+
+def calls(chunk_size: int) -> Exporter:
+    return Exporter(Call.objects.order_by('id'), CALL_COLUMNS, chunk_size)
@@ -0,0 +1,79 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+
+from callblocker.blocker.api.views import control
+from callblocker.blocker.services import profile_store
+from callblocker.core.db.queries import QueryCounter
+from callblocker.core.profiling import profiled
+
+logger = logging.getLogger(__name__)
+
+
+class ProfilingMiddleware(object):
+    """
+    Profiles the API requests under settings.PROFILE_PATHS while the profiler service is running (see
+    :mod:`callblocker.core.profiling`). The profiler may run in a modem daemon, so we only check on it every
+    settings.PROFILE_STATE_TTL seconds. Streaming responses only get profiled up to the start of the stream.
+    """
+
+    #: The profiles API itself, which would otherwise fill the store with profiles of people looking at it.
+    EXCLUDED_PATHS = ['/api/profiles/']
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.store = profile_store()
+        self._enabled = False
+        self._checked = None
+
+    def __call__(self, request):
+        if not self._selected(request.path) or not self._profiling():
+            return self.get_response(request)
+
+        with profiled(self.store, 'request', f'{request.method} {request.path}'):
+            return self.get_response(request)
+
+    def _selected(self, path: str) -> bool:
+        return any(path.startswith(prefix) for prefix in settings.PROFILE_PATHS) \
+            and not any(path.startswith(prefix) for prefix in self.EXCLUDED_PATHS)
+
+    def _profiling(self) -> bool:
+        now = time.monotonic()
+        if self._checked is None or now - self._checked >= settings.PROFILE_STATE_TTL:
+            self._checked = now
+            self._enabled = _profiler_running()
+        return self._enabled
+
+
+def _profiler_running() -> bool:
+    try:
+        return control().get_service('profiler')['status']['state'] == 'READY'
+    except LookupError:
+        # No profiler in this group.
+        return False
+    except Exception:
+        logger.exception('Failed to check whether profiling is on.')
+        return False
+
+
+class QueryCountMiddleware(object):
+    """
+    Counts the SQL queries each request runs, and the time spent running them, and reports both in the
+    X-DB-Queries and X-DB-Time (in milliseconds) response headers. Only used in debug mode. Streaming
+    responses only get counted up to the start of the stream.
+    """
+
+    def __init__(self, get_response):
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with QueryCounter() as counter:
+            response = self.get_response(request)
+
+        response['X-DB-Queries'] = str(counter.queries)
+        response['X-DB-Time'] = f'{counter.time * 1000:.1f}'
+        return response
@@ -1,18 +1,29 @@
 from functools import reduce
+from typing import Any, Dict, Iterable, List
 
+from django.db.models import QuerySet
 from rest_framework.exceptions import ValidationError
-from rest_framework.fields import SkipField, Field, ChoiceField
+from rest_framework.fields import SkipField, Field, ChoiceField, ReadOnlyField
+from rest_framework.relations import RelatedField, PKOnlyObject, HyperlinkedRelatedField
 from rest_framework.serializers import Serializer
 from rest_framework.settings import api_settings
 from rest_framework.utils import html
 from rest_framework_bulk import BulkListSerializer
 
+from callblocker.blocker.models import key_number
+
 
 # We have to patch BulkListSerializer to deal with https://github.com/miki725/django-rest-framework-bulk/issues/68
 # This may break with newer versions of restframework, so it would be nice to get rid of it, eventually.
 
 
 class PatchedBulkListSerializer(BulkListSerializer):
+    """
+    Bulk list serializer which runs a constant number of queries regardless of how many items get updated:
+    instances get looked up all at once while validating, and updated in a single query with
+    :meth:`~django.db.models.query.QuerySet.bulk_update`, which skips :meth:`Model.save` and model signals.
+    """
+
     def to_internal_value(self, data):
         """
         List of dicts of native values <- List of dicts of primitive datatypes.
@@ -41,11 +52,16 @@ class PatchedBulkListSerializer(BulkListSerializer):
         errors = []
 
         id_attr = getattr(self.child.Meta, 'update_lookup_field', 'id')
+        self._instances = {
+            getattr(instance, id_attr): instance
+            for instance in self.instance.filter(**{f'{id_attr}__in': [item.get(id_attr) for item in data]})
+        }
 
         for item in data:
             try:
                 # --------------------- patched pieces --------------------------------
-                self.child.instance = self.instance.get(**{id_attr: item.get(id_attr)})
+                # Items we can't find fail in update.
+                self.child.instance = self._instances.get(item.get(id_attr))
                 self.child.initial_data = item
                 # ---------------------------------------------------------------------
                 validated = self.child.run_validation(item)
@@ -60,6 +76,45 @@ class PatchedBulkListSerializer(BulkListSerializer):
 
         return ret
 
+    def update(self, queryset, all_validated_data):
+        id_attr = getattr(self.child.Meta, 'update_lookup_field', 'id')
+        all_validated_data_by_id = {
+            validated.pop(id_attr): validated
+            for validated in all_validated_data
+        }
+
+        instances = [self._instances.get(id) for id in all_validated_data_by_id]
+        if not all(instances):
+            raise ValidationError('Could not find all objects to update.')
+
+        fields = set()
+        for instance in instances:
+            for field, value in all_validated_data_by_id[getattr(instance, id_attr)].items():
+                setattr(instance, field, value)
+                fields.add(field)
+
+        if fields:
+            queryset.model.objects.bulk_update(instances, fields)
+
+        return instances
+
+
+class CachedHyperlinkedRelatedField(HyperlinkedRelatedField):
+    """
+    :class:`HyperlinkedRelatedField` which looks every distinct URL up only once, so that list serializers
+    don't look up the same related object once per item. Fields get copied for every serializer instance,
+    so lookups are cached for as long as the serializer lives (i.e. a request).
+    """
+
+    def to_internal_value(self, data):
+        if not isinstance(data, str):
+            return super().to_internal_value(data)
+
+        lookups = self.__dict__.setdefault('_lookups', {})
+        if data not in lookups:
+            lookups[data] = super().to_internal_value(data)
+        return lookups[data]
+
 
 class EnumField(ChoiceField):
     def __init__(self, enum, **kwargs):
@@ -107,6 +162,13 @@ class GeneratedCharField(Field):
         return value
 
 
+class NumberKeyField(ReadOnlyField):
+    """Shows caller keys (see :func:`~callblocker.blocker.models.number_key`) as the full numbers they key."""
+
+    def to_representation(self, value):
+        return key_number(value)
+
+
 class ExceptionField(Field):
     def __init__(self, **kwargs):
         # Our typical use case for Exceptions is reporting. Clients are not usually
@@ -125,3 +187,48 @@ class ROSerializer(Serializer):
 
     def update(self, instance, validated_data):
         raise NotImplemented('Cannot update readonly objects.')
+
+
+class ValuesListSerializer(object):
+    """
+    Read-only serializer which produces the same representation as a :class:`ModelSerializer`, but
+    from ``values_list`` rows instead of model instances. This skips model instantiation and
+    field-by-field attribute lookups, and computes hyperlinks for related fields once per distinct
+    key instead of once per row. Meant for list-only, read-only paths.
+    """
+
+    def __init__(self, serializer_class, context: Dict[str, Any]):
+        fields = [
+            field for field in serializer_class(context=context).fields.values()
+            if not field.write_only
+        ]
+        self.sources = [field.source for field in fields]
+        self._converters = [(field.field_name, self._converter(field)) for field in fields]
+
+    def values(self, queryset: QuerySet) -> QuerySet:
+        return queryset.values_list(*self.sources)
+
+    def to_representation(self, rows: Iterable[tuple]) -> List[Dict[str, Any]]:
+        converters = self._converters
+        return [
+            {
+                name: None if value is None else convert(value)
+                for (name, convert), value in zip(converters, row)
+            } for row in rows
+        ]
+
+    @staticmethod
+    def _converter(field: Field):
+        if not isinstance(field, RelatedField):
+            return field.to_representation
+
+        # values_list gives us the key for related fields. Related fields only need the pk to
+        # build their representation, and we only have a handful of distinct keys per request.
+        cache = {}
+
+        def related(pk):
+            if pk not in cache:
+                cache[pk] = field.to_representation(PKOnlyObject(pk))
+            return cache[pk]
+
+        return related
@@ -6,12 +6,16 @@ from rest_framework.validators import UniqueValidator
 from rest_framework_bulk import BulkSerializerMixin
 
 from callblocker.blocker.api.serializer_extensions import GeneratedCharField, PatchedBulkListSerializer, EnumField, \
-    ExceptionField, ROSerializer
-from callblocker.blocker.models import Call, Source, Caller
+    ExceptionField, ROSerializer, CachedHyperlinkedRelatedField, NumberKeyField
+from callblocker.blocker.models import Call, Source, Caller, validate_full_number
 from callblocker.core.service import ServiceState
 
 
 class CallSerializer(ModelSerializer):
+    # Calls refer to callers by key, but the API knows callers by their full number. Going from one to the
+    # other spares us a join with callers.
+    caller = NumberKeyField(source='caller_id')
+
     class Meta:
         model = Call
         fields = [
@@ -40,7 +44,10 @@ class SourceSerializer(ModelSerializer):
 # it appears that the easiest way to accomplish that is by defining separate serializers
 # and then dispatch based on the verb.
 
-class CallerSerializer(HyperlinkedModelSerializer, BulkSerializerMixin):
+class CallerSerializer(BulkSerializerMixin, HyperlinkedModelSerializer):
+    # Bulk updates would otherwise look sources up once per caller.
+    serializer_related_field = CachedHyperlinkedRelatedField
+
     calls = serializers.IntegerField(read_only=True)
     text_score = serializers.FloatField(read_only=True)
 
@@ -66,6 +73,10 @@ class CallerSerializer(HyperlinkedModelSerializer, BulkSerializerMixin):
         ]
 
         read_only_fields = [
+            # Only used to find the caller to update (BulkSerializerMixin adds it back for that, hence it comes
+            # first), and derived from the area code and number anyway. Being read-only saves checking that it is
+            # unique for every caller in bulk updates.
+            'full_number',
             'area_code',
             'number',
             'date_inserted',
@@ -76,7 +87,7 @@ class CallerSerializer(HyperlinkedModelSerializer, BulkSerializerMixin):
 class CallerPOSTSerializer(ModelSerializer):
     full_number = GeneratedCharField(
         ['area_code', 'number'],
-        validators=[UniqueValidator(queryset=Caller.objects.all())]
+        validators=[UniqueValidator(queryset=Caller.objects.all()), validate_full_number]
     )
 
     source = HyperlinkedRelatedField(
@@ -110,6 +121,7 @@ class ServiceStatusSerializer(ROSerializer):
     state = EnumField(ServiceState)
     exception = ExceptionField()
     traceback = ListField(child=serializers.CharField())
+    info = serializers.DictField(read_only=True)
 
 
 class ServiceSerializer(ROSerializer):
@@ -1,26 +1,34 @@
 import logging
+from threading import Lock
 
 from django.conf import settings
-from django.db import ProgrammingError
 
 logger = logging.getLogger(__name__)
 
+# Databases which we know have pg_trgm installed.
+_extension_installed = set()
+_extension_lock = Lock()
 
-def handle_connection(**kwargs):
-    with kwargs['connection'].cursor() as cursor:
-        # Ideally, we'd do this as a migration. But set_limit has to be set on a session basis, so we
-        # have to do it here. But then 'manage.py migrate' will trip when it tries to create a connection and
-        # calls set_limit before having created pg_trgm. So we have no choice but to probe if the extension
-        # has been installed at every connection attempt. We use a long connection life (we expect our DB
-        # to be essentially private) so performance should not be a problem.
-        try:
-            logger.info('installing the pg_trgm extension')
-            cursor.execute('CREATE EXTENSION pg_trgm')
-        except ProgrammingError as ex:
-            # Well this sucks and will break soon, but as usual the info coming from API exception signalling
-            # is shit so we have no choice.
-            if '"pg_trgm" already exists' not in ex.args[0]:
-                raise ex
-            logger.info('pg_trgm extension already installed')
-
-        cursor.execute(f'SELECT set_limit({settings.TRGM_SIM_THRESHOLD})')
+
+def handle_connection(connection, **kwargs):
+    # Pooled connections (see callblocker.core.db) keep their session settings, so we only need to
+    # set them up once.
+    if not getattr(connection, 'new_session', True):
+        return
+
+    with connection.cursor() as cursor:
+        _ensure_extension(connection, cursor)
+        # set_limit has to be set on a session basis, so it can't go in a migration.
+        cursor.execute('SELECT set_limit(%s)', [settings.TRGM_SIM_THRESHOLD])
+
+
+def _ensure_extension(connection, cursor):
+    # Ideally, we'd do this as a migration. But then 'manage.py migrate' would trip when it creates a
+    # connection and calls set_limit before having created pg_trgm. So we check once per database instead.
+    database = connection.settings_dict['NAME']
+    with _extension_lock:
+        if database in _extension_installed:
+            return
+        logger.info('installing the pg_trgm extension')
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        _extension_installed.add(database)
@@ -1,29 +1,44 @@
-import asyncio
-from typing import Dict, Any
-
+import codecs
+import json
+from contextlib import contextmanager
+from datetime import datetime
+from logging import getLevelName
+from typing import Dict, Any, Union
+
+from django.conf import settings
 from django.contrib.postgres.search import TrigramSimilarity
-from django.db.models import Count, Value, FloatField
+from django.db.models import Count, Value, FloatField, Sum
 from django.db.models import Q
-from django.db.models.functions import Greatest, Lower
-from django.http import Http404
+from django.db.models.functions import Greatest, Lower, Trunc
+from django.http import Http404, StreamingHttpResponse, HttpResponseBadRequest, HttpResponse, FileResponse
+from django.utils.dateparse import parse_datetime
+from django.utils.timezone import utc, is_aware, make_aware
+from django.views.decorators.http import require_GET
 from rest_framework import status
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.exceptions import ValidationError
 from rest_framework.generics import get_object_or_404
 from rest_framework.mixins import RetrieveModelMixin, ListModelMixin
 from rest_framework.pagination import LimitOffsetPagination
-from rest_framework.parsers import JSONParser
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.response import Response
 from rest_framework.status import HTTP_400_BAD_REQUEST, HTTP_202_ACCEPTED, HTTP_200_OK
 from rest_framework.viewsets import ModelViewSet, GenericViewSet, ViewSet
 from rest_framework_bulk import BulkUpdateModelMixin, BulkDestroyModelMixin
 
+from callblocker.blocker import telcos
+from callblocker.blocker.api import export
 from callblocker.blocker.api.exceptions import BadRequest400
+from callblocker.blocker.api.serializer_extensions import ValuesListSerializer
 from callblocker.blocker.api.serializers import CallerSerializer, CallSerializer, CallerPOSTSerializer, \
     SourceSerializer, ServiceSerializer
-from callblocker.blocker.models import Caller, Call, Source
-from callblocker.blocker.services import services
-from callblocker.core.logging import tail
+from callblocker.blocker.blocklist import import_blocklist
+from callblocker.blocker.control import LocalControl, RemoteControl
+from callblocker.blocker.models import Caller, Call, Source, HourlyCallRollup, DailyCallRollup, number_key
+from callblocker.blocker.services import services, profile_store
+from callblocker.core import metrics as core_metrics
+from callblocker.core.broadcast import Subscription, SubscriptionClosed
+from callblocker.core.rpc import RPCStream
 from callblocker.core.service import ServiceState
 
 
@@ -46,6 +61,18 @@ class CallerViewSet(ModelViewSet, BulkUpdateModelMixin, BulkDestroyModelMixin):
     pagination_class = LimitOffsetPagination
     lookup_value_regex = r'(?P<full_number>[0-9\-]+)'
 
+    def list(self, request, *args, **kwargs):
+        # Listings are by far our most frequent request, and are read-only. We therefore
+        # bypass model instantiation and serialize straight from the annotated queryset rows.
+        serializer = ValuesListSerializer(CallerSerializer, self.get_serializer_context())
+        queryset = serializer.values(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(serializer.to_representation(page))
+
+        return Response(serializer.to_representation(queryset))
+
     def get_serializer_class(self):
         # Dispatch to the right serializer based on the verb.
         return (
@@ -141,8 +168,13 @@ class CallViewSet(RetrieveModelMixin, ListModelMixin, BulkDestroyModelMixin, Gen
     pagination_class = LimitOffsetPagination
 
     def get_queryset(self):
-        full_number = self.kwargs['full_number'].replace('-', '')
-        return Call.objects.filter(caller__full_number=full_number).order_by('-time')
+        try:
+            key = number_key(self.kwargs['full_number'].replace('-', ''))
+        except ValueError:
+            # No such caller.
+            return Call.objects.none()
+        # Going by the key spares us a join with callers.
+        return Call.objects.filter(caller_id=key).order_by('-time')
 
 
 class SourceViewSet(ListModelMixin, RetrieveModelMixin, GenericViewSet):
@@ -158,14 +190,13 @@ class ServicesViewset(ViewSet):
     ALLOWED_TARGET_STATES = [ServiceState.READY, ServiceState.TERMINATED]
 
     def list(self, _):
-        return Response(ServiceSerializer(instance=services().services, many=True).data)
+        return Response(control().list_services())
 
     def retrieve(self, _, pk):
-        service = self._get_service_or_404(pk)
-        return Response(ServiceSerializer(instance=service).data)
+        with _not_found_as_404():
+            return Response(control().get_service(pk))
 
     def partial_update(self, request, pk):
-        service = self._get_service_or_404(pk)
         data = request.data
 
         try:
@@ -178,13 +209,14 @@ class ServicesViewset(ViewSet):
             return Response(f'Cannot set service to {target}.')
 
         # Either start or stop.
-        if target == ServiceState.READY:
-            service.start()
-        elif target == ServiceState.TERMINATED:
-            service.stop()
-        else:
-            # Should never happen.
-            raise Exception(f'Bad target state {target}.')
+        with _not_found_as_404():
+            if target == ServiceState.READY:
+                control().start_service(pk)
+            elif target == ServiceState.TERMINATED:
+                control().stop_service(pk)
+            else:
+                # Should never happen.
+                raise Exception(f'Bad target state {target}.')
 
         return Response(status=status.HTTP_202_ACCEPTED)
 
@@ -194,16 +226,155 @@ class ServicesViewset(ViewSet):
             raise BadRequest400(detail=f'Missing element {element} in {str(content)}')
         return self._get_element_or_400(content[element], *path[1:]) if len(path) > 1 else content[element]
 
-    def _get_service_or_404(self, pk):
-        service = getattr(services(), pk, None)
-        if service is None:
-            raise Http404(f'No services match {pk}.')
-        return service
+
+def control():
+    """
+    :return: a :class:`RemoteControl` if the services run in a modem daemon, or a :class:`LocalControl`
+             for the services in this process otherwise.
+    """
+    if settings.MODEM_DAEMON_SOCKET:
+        return RemoteControl(settings.MODEM_DAEMON_SOCKET, settings.MODEM_DAEMON_TIMEOUT)
+    return LocalControl(services())
+
+
+@contextmanager
+def _not_found_as_404():
+    try:
+        yield
+    except LookupError as ex:
+        raise Http404(str(ex))
 
 
 @api_view(['GET'])
 def log(request):
-    return Response(data=tail(), status=HTTP_200_OK)
+    params = request.query_params
+    try:
+        after = _number(params, 'after', int, -1)
+        wait = min(_number(params, 'wait', float, 0), settings.LOG_MAX_WAIT)
+        filters = _log_filters(params)
+    except ValueError as ex:
+        raise BadRequest400(detail=str(ex))
+
+    result = control().log(after=after, wait=wait, **filters)
+
+    # Without a cursor, we return a list of formatted lines, as we always have.
+    if 'after' not in params:
+        return Response(data=[entry['message'] for entry in result['entries']], status=HTTP_200_OK)
+
+    return Response(data=result, status=HTTP_200_OK)
+
+
+def _log_filters(params) -> Dict[str, Any]:
+    filters = {'logger': params.get('logger', '')}
+
+    if 'level' in params:
+        level = getLevelName(params['level'].upper())
+        if not isinstance(level, int):
+            raise ValueError(f'Unknown log level {params["level"]}.')
+        filters['level'] = level
+
+    for bound in ['since', 'until']:
+        if bound in params:
+            filters[bound] = _timestamp(params, bound)
+
+    return filters
+
+
+def _number(params, name: str, number_type: type, default):
+    try:
+        return number_type(params.get(name, default))
+    except ValueError:
+        raise ValueError(f'Parameter "{name}" must be a number.')
+
+
+def _timestamp(params, name: str) -> float:
+    # Either seconds since the epoch, or an ISO 8601 datetime.
+    value = params[name]
+    try:
+        return float(value)
+    except ValueError:
+        pass
+
+    parsed = parse_datetime(value)
+    if parsed is None:
+        raise ValueError(f'Parameter "{name}" must be a timestamp or an ISO 8601 datetime.')
+
+    return (parsed if is_aware(parsed) else make_aware(parsed)).timestamp()
+
+
+#: Rollup table each stats granularity is computed from.
+STATS_ROLLUPS = {
+    'hour': HourlyCallRollup,
+    'day': DailyCallRollup,
+    'week': DailyCallRollup,
+    'month': DailyCallRollup,
+    'year': DailyCallRollup
+}
+
+
+@api_view(['GET'])
+def stats(request):
+    """
+    Blocked and allowed call counts per period, served from the call rollups. Supports the `granularity`
+    (hour, day, week, month or year), `since` and `until` (as in the log API), `area_code`, and
+    `by=area_code` (splits periods by area code) parameters.
+    """
+    params = request.query_params
+    granularity = params.get('granularity', 'day')
+    if granularity not in STATS_ROLLUPS:
+        raise BadRequest400(detail=f'Granularity must be one of: {", ".join(STATS_ROLLUPS)}')
+
+    queryset = STATS_ROLLUPS[granularity].objects.all()
+    try:
+        if 'since' in params:
+            queryset = queryset.filter(bucket__gte=datetime.fromtimestamp(_timestamp(params, 'since'), tz=utc))
+        if 'until' in params:
+            queryset = queryset.filter(bucket__lt=datetime.fromtimestamp(_timestamp(params, 'until'), tz=utc))
+    except ValueError as ex:
+        raise BadRequest400(detail=str(ex))
+
+    if 'area_code' in params:
+        queryset = queryset.filter(area_code=params['area_code'])
+
+    keys = ['period'] + (['area_code'] if params.get('by') == 'area_code' else [])
+    rows = queryset.annotate(
+        period=Trunc('bucket', granularity)
+    ).values(*keys, 'blocked').annotate(calls=Sum('calls')).order_by(*keys)
+
+    series = {}
+    for row in rows:
+        key = tuple(row[key] for key in keys)
+        entry = series.setdefault(key, dict(zip(keys, key), blocked=0, allowed=0))
+        entry['blocked' if row['blocked'] else 'allowed'] += row['calls']
+
+    for entry in series.values():
+        entry['period'] = entry['period'].isoformat()
+
+    return Response(data={'granularity': granularity, 'series': list(series.values())}, status=HTTP_200_OK)
+
+
+@api_view(['POST'])
+@parser_classes((MultiPartParser,))
+def import_callers(request):
+    upload = request.FILES.get('file')
+    if upload is None:
+        raise BadRequest400(detail='Missing blocklist file.')
+
+    try:
+        source = int(request.query_params.get('source', Source.USER))
+    except ValueError:
+        raise BadRequest400(detail='Source must be a source id.')
+
+    try:
+        result = import_blocklist(
+            codecs.iterdecode(upload, 'utf-8'),
+            telcos.get_telco(settings.MODEM_TELCO_PROVIDER),
+            source=source
+        )
+    except ValueError as ex:
+        raise BadRequest400(detail=str(ex))
+
+    return Response(data=result._asdict(), status=HTTP_200_OK)
 
 
 @api_view(['POST'])
@@ -214,7 +385,110 @@ def modem(request):
     if not command:
         return Response(data={'error': 'command missing'}, status=HTTP_400_BAD_REQUEST)
 
-    the_modem = services().modem
-    asyncio.run_coroutine_threadsafe(the_modem.async_command(command), loop=the_modem.aio_loop)
+    control().modem_command(command)
 
     return Response(status=HTTP_202_ACCEPTED)
+
+
+@require_GET
+def live(request):
+    try:
+        subscription = control().subscribe(heartbeat=settings.LIVE_FEED_HEARTBEAT)
+    except LookupError:
+        raise Http404('The live feed is not available.')
+
+    return _event_stream(subscription)
+
+
+@require_GET
+def service_events(request):
+    """Streams service state transitions as they happen."""
+    return _event_stream(control().subscribe_transitions(heartbeat=settings.LIVE_FEED_HEARTBEAT))
+
+
+def _event_stream(subscription: Union[Subscription, RPCStream]) -> StreamingHttpResponse:
+    response = StreamingHttpResponse(
+        server_sent_events(subscription, settings.LIVE_FEED_HEARTBEAT),
+        content_type='text/event-stream'
+    )
+    response['Cache-Control'] = 'no-cache'
+    # Keeps reverse proxies from buffering the stream.
+    response['X-Accel-Buffering'] = 'no'
+    return response
+
+
+def server_sent_events(subscription: Union[Subscription, RPCStream], heartbeat: float):
+    """
+    Renders the events in a :class:`Subscription` as a `server-sent event
+    <https://html.spec.whatwg.org/multipage/server-sent-events.html>`_ stream. Events are expected to
+    have `type` and `data` attributes. A comment frame is sent every `heartbeat` seconds when there is
+    nothing else to send, so that clients and proxies can tell a quiet stream from a dead one.
+    """
+    dropped = 0
+    with subscription:
+        try:
+            while True:
+                event = subscription.get(timeout=heartbeat)
+                if subscription.dropped != dropped:
+                    dropped = subscription.dropped
+                    yield _sse_frame('overflow', {'dropped': dropped})
+
+                yield _sse_frame(event.type, event.data) if event is not None else ': heartbeat\n\n'
+        except SubscriptionClosed:
+            pass
+
+
+def _sse_frame(event_type: str, data) -> str:
+    return f'event: {event_type}\ndata: {json.dumps(data)}\n\n'
+
+
+@require_GET
+def export_callers(request):
+    return _export(request, 'callers', export.callers(settings.EXPORT_CHUNK_SIZE))
+
+
+@require_GET
+def export_calls(request):
+    return _export(request, 'calls', export.calls(settings.EXPORT_CHUNK_SIZE))
+
+
+def _export(request, name: str, exporter: export.Exporter):
+    output_format = request.GET.get('format', 'csv')
+    if output_format not in export.Exporter.CONTENT_TYPES:
+        return HttpResponseBadRequest(
+            f'Format must be one of: {", ".join(export.Exporter.CONTENT_TYPES)}'
+        )
+
+    response = StreamingHttpResponse(
+        getattr(exporter, output_format)(),
+        content_type=export.Exporter.CONTENT_TYPES[output_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="{name}.{output_format}"'
+    return response
+
+
+@api_view(['GET'])
+def profiles(_):
+    """Lists the profiles taken while profiling was on, latest first. See callblocker.core.profiling."""
+    return Response(data=[
+        dict(profile._asdict(), time=profile.time.isoformat()) for profile in profile_store().list()
+    ], status=HTTP_200_OK)
+
+
+@require_GET
+def profile(_, name: str):
+    """Downloads a profile, for use with pstats or a profile viewer."""
+    with _not_found_as_404():
+        path = profile_store().path(name)
+
+    try:
+        return FileResponse(open(path, 'rb'), as_attachment=True, filename=name,
+                            content_type='application/octet-stream')
+    except FileNotFoundError:
+        # Pruned in the meantime.
+        raise Http404(f'No such profile {name}.')
+
+
+@require_GET
+def metrics(_):
+    return HttpResponse(control().metrics(), content_type=core_metrics.CONTENT_TYPE)
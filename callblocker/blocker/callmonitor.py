@@ -1,70 +1,131 @@
 import abc
 import logging
+import time
 from abc import abstractmethod
+from collections import namedtuple
+from typing import Callable, Optional, Tuple
 
-from django.db import transaction
+from django.db import transaction, close_old_connections
 from django.utils import timezone
 
-from callblocker.blocker.models import Caller, Call
+from callblocker.blocker import rollups
+from callblocker.blocker.models import Caller, Call, Source
+from callblocker.core.db.pool import use_reserved_connections
+from callblocker.core.metrics import Counter, Summary
 from callblocker.core.modem import Modem, ModemType, ModemEvent
+from callblocker.core.profiling import Profiler, unprofiled
 from callblocker.core.service import AsyncioService, AsyncioEventLoop
 
 logger = logging.getLogger(__name__)
 
+CALLS_SCREENED = Counter('callblocker_calls_screened_total', 'Calls screened, by decision.', ['decision'])
+CALL_DB_TIME = Summary('callblocker_call_db_seconds', 'Time spent in the database per screened call.')
+
 
 class CIDParseError(Exception):
     pass
 
 
+class CID(namedtuple('CID', ['area_code', 'number'])):
+    """A caller ID (CID) string, split into its area code and phone number."""
+    __slots__ = ()
+
+    def __str__(self):
+        return '(%s) %s' % (self.area_code, self.number)
+
+
 class TelcoProvider(abc.ABC):
 
     @abstractmethod
-    def parse_cid(self, string: str) -> Caller:
+    def split_cid(self, string: str) -> Tuple[str, str]:
         """
-        Parses a Caller ID (CID) string into a :class:`Caller` object.
+        Splits a Caller ID (CID) string into its area code and phone number.
 
         :param string: a CID string.
         :raise CIDParseError: if the CID string is not in accordance to this provider's rules.
-        :return: a :class:`Caller`.
+        :return: an (area code, number) tuple.
         """
         pass
 
+    def parse_cid(self, string: str) -> CID:
+        """
+        Parses a Caller ID (CID) string into a :class:`CID`.
+
+        :param string: a CID string.
+        :raise CIDParseError: if the CID string is not in accordance to this provider's rules.
+        :return: a :class:`CID`.
+        """
+        return CID(*self.split_cid(string))
+
 
 class CallMonitor(AsyncioService):
     name = 'call monitor'
 
-    def __init__(self, provider: TelcoProvider, modem: Modem, aio_loop_service: AsyncioEventLoop):
+    def __init__(self, provider: TelcoProvider, modem: Modem, aio_loop_service: AsyncioEventLoop,
+                 profiler: Optional[Profiler] = None):
         super().__init__(aio_loop_service=aio_loop_service)
         self.provider = provider
         self.modem = modem
+        #: Profiles the screening of every call while on, if given.
+        self.profiler = profiler
+        self.listeners = []
+
+    def add_listener(self, listener: Callable[[Caller, Call], None]):
+        """
+        Registers a callable to be notified of every screening decision, with the :class:`Caller` and the
+        :class:`Call` that has been logged for it. Listeners run in the asyncio event loop, and must
+        therefore not block.
+        """
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[Caller, Call], None]):
+        self.listeners.remove(listener)
 
     async def _event_loop(self):
+        # We query the DB right on the event loop thread, so waiting for request threads to give back
+        # connections would stall it.
+        use_reserved_connections()
         self._signal_started()
         with self.modem.event_stream() as stream:
             async for event in stream:
-                await self._process_event(event)
+                try:
+                    await self._process_event(event)
+                finally:
+                    # Gives our connection back to the pool, if we're using one, as there are no requests
+                    # in this thread to do it for us.
+                    close_old_connections()
 
     async def _process_event(self, event: ModemEvent):
         # We only care about call ids. It's easier.
         if event.event_type != 'CALL_ID':
-            logger.info('Discarding uninteresting modem event %s' % str(event))
+            logger.info('Discarding uninteresting modem event %s', event)
             return
 
+        with self.profiler.profile('event', event.event_type) if self.profiler is not None else unprofiled():
+            await self._screen(event)
+
+    async def _screen(self, event: ModemEvent):
         # Parses the phone number.
         number = self.provider.parse_cid(event.contents)
-        logger.info('Got call from number %s ' % str(number))
+        logger.info('Got call from number %s ', number)
 
+        start = time.perf_counter()
         # Looks for blacklisted counterpart:
         try:
             matching = Caller.objects.get(
                 number__endswith=number.number,
                 area_code=number.area_code
             )
-            logger.info('Number %s was found in the phonebook.' % str(number))
+            logger.info('Number %s was found in the phonebook.', number)
         except Caller.objects.model.DoesNotExist:
-            logger.info('Number %s is a new number.' % str(number))
-            matching = number
-            number.date_inserted = timezone.now()
+            logger.info('Number %s is a new number.', number)
+            matching = Caller(
+                number=number.number,
+                area_code=number.area_code,
+                source_id=Source.CID,
+                block=False,
+                date_inserted=timezone.now()
+            )
 
         now = timezone.now()
 
@@ -74,11 +135,23 @@ class CallMonitor(AsyncioService):
             matching.save()
 
             # Logs the call.
-            Call(
+            call = Call(
                 caller=matching,
                 time=now,
                 blocked=matching.block
-            ).save()
+            )
+            call.save()
+            rollups.record(call, matching.area_code)
+
+        CALL_DB_TIME.observe(time.perf_counter() - start)
+        CALLS_SCREENED.labels('blocked' if matching.block else 'allowed').inc()
+
+        for listener in self.listeners:
+            try:
+                listener(matching, call)
+            except Exception:
+                # A misbehaving listener should never stop us from screening calls.
+                logger.exception('Call listener %s failed.', listener)
 
         # Number is blacklisted. Hangs up!
         if matching.block:
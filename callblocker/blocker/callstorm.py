@@ -0,0 +1,243 @@
+"""
+Load generator which storms the call monitor with calls, to measure how screening holds up as lines get
+added (see the callstorm command). Every virtual line is a :class:`ScriptedModem` with its own
+:class:`Modem` and :class:`CallMonitor`, and all of them share a single event loop, as they would in
+production.
+
+Calls arrive either as a Poisson process, or in bursts (with Poisson arrivals of bursts), and go to a random
+idle line. Calls which find every line busy are turned away, as the phone network would do. Callers are
+drawn from a fixed pool, a fraction of which is blocked, so that both the "known caller" and the "hang up"
+paths get exercised. The pool is made of numbers which are not in the phonebook yet, so storms never change
+callers they didn't make up. Storms do leave their callers and calls behind, which is why the callstorm
+command runs them in a throwaway database by default.
+
+The report covers:
+
+* throughput, in calls screened per second;
+* decision latency, from the caller id reaching the modem to the screening decision being logged;
+* write lag, from the caller id reaching the modem to the time the call gets logged with. Calls are
+  written from the event loop, one at a time, so this grows as writes queue up behind each other;
+* time spent in the database per call.
+"""
+import asyncio
+import logging
+import random
+import time
+from typing import Any, Dict, List, Optional
+
+from django.utils import timezone
+
+from benchmarks.harness import percentiles
+from callblocker.blocker.callmonitor import CallMonitor, CALL_DB_TIME
+from callblocker.blocker.models import Caller, Source, number_key
+from callblocker.blocker.telcos import Vivo
+from callblocker.core.modem import Modem
+from callblocker.core.service import AsyncioEventLoop, ServiceState
+from callblocker.core.tests.fakeserial import CX930xx_fake, ScriptedModem
+
+logger = logging.getLogger(__name__)
+
+POISSON = 'poisson'
+BURSTY = 'bursty'
+ARRIVALS = [POISSON, BURSTY]
+
+#: Area code of the callers we make up. Their numbers are landlines starting with 7, which the gendata
+#: command never generates.
+AREA_CODE = '11'
+#: Prefix of the full numbers of the callers we make up.
+PREFIX = AREA_CODE + '7'
+#: Time between the calls within a burst, in seconds.
+BURST_SPACING = 0.01
+
+
+class VirtualLine(object):
+    def __init__(self, index: int, aio_loop: AsyncioEventLoop, on_decision):
+        self.index = index
+        self.device = ScriptedModem(aio_loop, auto_reply=True)
+        self.modem = Modem(CX930xx_fake, self.device, aio_loop)
+        self.monitor = CallMonitor(Vivo(), self.modem, aio_loop)
+        self.monitor.add_listener(lambda caller, call: on_decision(self, caller, call))
+        #: Wall clock and monotonic times at which the call being screened rang, if any.
+        self.ringing: Optional[Dict[str, float]] = None
+        self._hangups = 0
+
+    @property
+    def busy(self) -> bool:
+        # Lines stay busy until the monitor is done hanging up on blocked callers.
+        return self.ringing is not None or self.device.hangups < self._hangups
+
+    @property
+    def services(self):
+        # The modem starts the device itself, as it connects to it.
+        return [self.modem, self.monitor]
+
+    def ring(self, number: str):
+        self.ringing = {'wall': time.time(), 'monotonic': time.monotonic()}
+        self.device.ring(AREA_CODE + number)
+
+    def screened(self, blocked: bool) -> Dict[str, float]:
+        ringing, self.ringing = self.ringing, None
+        if blocked:
+            self._hangups += 1
+        return ringing
+
+
+class CallStorm(object):
+    """
+    Storms `lines` virtual lines with `rate` calls per second for `duration` seconds. Bursty arrivals come in
+    bursts of `burst_size` calls, `BURST_SPACING` seconds apart. `blocked_fraction` of the calls
+    come from blocked callers, out of a pool of `callers` callers.
+    """
+
+    def __init__(self, lines: int, rate: float, duration: float, arrival: str = POISSON, burst_size: int = 10,
+                 blocked_fraction: float = 0.1, callers: int = 1000, seed: int = 0):
+        if arrival not in ARRIVALS:
+            raise ValueError(f'Arrivals must be one of {ARRIVALS}.')
+        if not 0 <= blocked_fraction <= 1:
+            raise ValueError('The blocked fraction must be between 0 and 1.')
+
+        self.rate = rate
+        self.duration = duration
+        self.arrival = arrival
+        self.burst_size = burst_size
+        self.blocked_fraction = blocked_fraction
+        self.callers = callers
+        self.rng = random.Random(seed)
+        # Picked when the storm runs, out of the numbers which are free then.
+        self.blocked_numbers: List[str] = []
+        self.allowed_numbers: List[str] = []
+
+        self.aio_loop = AsyncioEventLoop()
+        self.lines = [VirtualLine(i, self.aio_loop, self._screened) for i in range(lines)]
+
+        self._latencies: List[float] = []
+        self._write_lags: List[float] = []
+        self._offered = 0
+        self._turned_away = 0
+        self._blocked = 0
+        self._done: Optional[asyncio.Event] = None
+
+    def run(self, drain_timeout: float = 30) -> Dict[str, Any]:
+        """
+        Runs the storm, and waits for up to `drain_timeout` seconds for the calls in flight to get screened.
+
+        :return: the report.
+        """
+        self._prepare_callers()
+        db_time = CALL_DB_TIME.labels()
+        db_count, db_sum = db_time.count, db_time.sum
+
+        self.aio_loop.sync_start(10)
+        try:
+            for line in self.lines:
+                for service in line.services:
+                    service.sync_start(10)
+
+            start = time.monotonic()
+            asyncio.run_coroutine_threadsafe(self._storm(), self.aio_loop.aio_loop).result()
+            storm = time.monotonic() - start
+            drained = asyncio.run_coroutine_threadsafe(
+                self._drain(drain_timeout), self.aio_loop.aio_loop
+            ).result()
+            elapsed = time.monotonic() - start
+            failed = [line.index for line in self.lines if line.monitor.status().state != ServiceState.READY]
+        finally:
+            for line in self.lines:
+                for service in reversed([line.device] + line.services):
+                    if service.status().state == ServiceState.READY:
+                        service.sync_stop(10)
+            self.aio_loop.sync_stop(10)
+
+        screened = len(self._latencies)
+        return {
+            'lines': len(self.lines),
+            'arrival': self.arrival,
+            'rate': self.rate,
+            'duration': storm,
+            'offered': self._offered,
+            'turned_away': self._turned_away,
+            'screened': screened,
+            'blocked': self._blocked,
+            'unscreened': self._offered - self._turned_away - screened,
+            'drained': drained,
+            'failed_lines': failed,
+            'calls_per_second': screened / elapsed,
+            'latency': percentiles(self._latencies) if self._latencies else None,
+            'write_lag': percentiles(self._write_lags) if self._write_lags else None,
+            'db_ms_per_call': (
+                (db_time.sum - db_sum) / (db_time.count - db_count) * 1000 if db_time.count > db_count else None
+            )
+        }
+
+    def _prepare_callers(self):
+        # Numbers already in the phonebook, be it from earlier storms or not, are skipped.
+        taken = set(Caller.objects.filter(full_number__startswith=PREFIX).values_list('full_number', flat=True))
+        numbers = []
+        for i in range(10 ** 7):
+            if len(numbers) == self.callers:
+                break
+            if f'{PREFIX}{i:07d}' not in taken:
+                numbers.append(f'7{i:07d}')
+        else:
+            raise ValueError(f'Not enough free numbers for {self.callers} callers.')
+
+        blocked = min(max(round(self.callers * self.blocked_fraction), 1 if self.blocked_fraction else 0), self.callers)
+        self.blocked_numbers, self.allowed_numbers = numbers[:blocked], numbers[blocked:]
+
+        # Blocked callers have to be in the phonebook up front. Allowed ones get added as they call in.
+        now = timezone.now()
+        Caller.objects.bulk_create([
+            Caller(id=number_key(AREA_CODE + number), full_number=AREA_CODE + number, area_code=AREA_CODE,
+                   number=number, block=True, source_id=Source.CID, description='Call storm', date_inserted=now)
+            for number in self.blocked_numbers
+        ])
+
+    async def _storm(self):
+        loop = self.aio_loop.aio_loop
+        self._done = asyncio.Event(loop=loop)
+        burst = self.burst_size if self.arrival == BURSTY else 1
+        end = loop.time() + self.duration
+        arrival = loop.time()
+        while True:
+            # Bursts arrive less often, so that the average rate stays the same.
+            arrival += self.rng.expovariate(self.rate / burst)
+            if arrival >= end:
+                await asyncio.sleep(end - loop.time(), loop=loop)
+                break
+            await asyncio.sleep(arrival - loop.time(), loop=loop)
+
+            for i in range(burst):
+                if i:
+                    await asyncio.sleep(BURST_SPACING, loop=loop)
+                self._call()
+
+    def _call(self):
+        self._offered += 1
+        idle = [line for line in self.lines if not line.busy]
+        if not idle:
+            self._turned_away += 1
+            return
+
+        if self.blocked_numbers and self.rng.random() < self.blocked_fraction:
+            number = self.rng.choice(self.blocked_numbers)
+        else:
+            number = self.rng.choice(self.allowed_numbers)
+        self.rng.choice(idle).ring(number)
+
+    def _screened(self, line: VirtualLine, caller: Caller, call):
+        ringing = line.screened(caller.block)
+        self._blocked += caller.block
+        self._latencies.append((time.monotonic() - ringing['monotonic']) * 1000)
+        self._write_lags.append((call.time.timestamp() - ringing['wall']) * 1000)
+        if not any(line.ringing for line in self.lines):
+            self._done.set()
+
+    async def _drain(self, timeout: float) -> bool:
+        if not any(line.ringing for line in self.lines):
+            return True
+        self._done.clear()
+        try:
+            await asyncio.wait_for(self._done.wait(), timeout, loop=self.aio_loop.aio_loop)
+            return True
+        except asyncio.TimeoutError:
+            return False
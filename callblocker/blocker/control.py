@@ -0,0 +1,165 @@
+"""
+Operations the web API performs on the services: listing, starting and stopping them, sending modem commands,
+and subscribing to the live feed and to service state transitions. :class:`LocalControl` performs them on a
+:class:`ServiceGroup` running in the current process; :class:`RemoteControl` forwards them to a modem daemon
+(see the rundaemon command) over RPC, which lets the web tier run as several processes without touching the
+serial line.
+"""
+import asyncio
+import os
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging import NOTSET, getLevelName
+from typing import Any, Dict, List, Optional
+
+from callblocker.blocker.api.serializers import ServiceSerializer
+from callblocker.blocker.livefeed import FeedEvent
+from callblocker.core import metrics
+from callblocker.core import logging as core_logging
+from callblocker.core.metrics import Family
+from callblocker.core.broadcast import Subscription
+from callblocker.core.rpc import RPCClient, RPCServer, RPCStream
+from callblocker.core.service import Service, AsyncioEventLoop, StateTransition
+from callblocker.core.servicegroup import ServiceGroup
+
+
+class LocalControl(object):
+    #: Operations exposed over RPC.
+    METHODS = [
+        'list_services', 'get_service', 'start_service', 'stop_service', 'modem_command', 'metric_families', 'log'
+    ]
+
+    def __init__(self, group: ServiceGroup):
+        self.group = group
+
+    def list_services(self) -> List[Dict[str, Any]]:
+        return ServiceSerializer(instance=self.group.services, many=True).data
+
+    def get_service(self, service_id: str) -> Dict[str, Any]:
+        return ServiceSerializer(instance=self._service(service_id)).data
+
+    def start_service(self, service_id: str):
+        self._service(service_id).start()
+
+    def stop_service(self, service_id: str):
+        self._service(service_id).stop()
+
+    def modem_command(self, command: str):
+        modem = self._service('modem')
+        asyncio.run_coroutine_threadsafe(modem.async_command(command), loop=modem.aio_loop)
+
+    def subscribe(self, heartbeat: float = None) -> Subscription:
+        # Heartbeats are up to the consumer of local subscriptions.
+        return self._service('livefeed').subscribe()
+
+    def subscribe_transitions(self, heartbeat: float = None) -> Subscription:
+        return self.group.transitions.subscribe(transform=_transition_event)
+
+    def metrics(self) -> str:
+        return metrics.REGISTRY.exposition()
+
+    def metric_families(self) -> List[Family]:
+        return metrics.REGISTRY.families()
+
+    def log(self, after: int = -1, wait: float = 0, level: int = NOTSET, logger: str = '',
+            since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        """
+        :return: the log entries after sequence number `after` which pass the filters (see
+                 :func:`callblocker.core.logging.select`), waiting up to `wait` seconds for some to show up,
+                 along with the last sequence number seen.
+        """
+        entries = core_logging.buffer()
+        # Cursors from the future mean the server has restarted since the client last asked.
+        if after > entries.last:
+            after = -1
+
+        new = entries.wait(after, wait) if wait > 0 else entries.since(after)
+        handler = core_logging.handler()
+        return {
+            # Entries we filtered out count as seen, so the cursor moves past them.
+            'last': new[-1][0] if new else after,
+            'entries': [{
+                'seq': seq,
+                'time': datetime.fromtimestamp(entry.created, tz=timezone.utc).isoformat(),
+                'level': getLevelName(entry.levelno),
+                'logger': entry.name,
+                'message': handler.render(entry)
+            } for seq, entry in core_logging.select(new, level, logger, since, until)]
+        }
+
+    def rpc_server(self, path: str, aio_loop_service: AsyncioEventLoop) -> RPCServer:
+        return RPCServer(
+            path,
+            methods={method: getattr(self, method) for method in self.METHODS},
+            streams={'subscribe': self.subscribe, 'subscribe_transitions': self.subscribe_transitions},
+            aio_loop_service=aio_loop_service,
+            waiting=['log']
+        )
+
+    def _service(self, service_id: str) -> Service:
+        service = next((service for service in self.group.services if service.id == service_id), None)
+        if service is None:
+            raise LookupError(f'No services match {service_id}.')
+        return service
+
+
+class RemoteControl(object):
+    def __init__(self, path: str, timeout: float):
+        self.client = RPCClient(path, timeout)
+
+    def list_services(self) -> List[Dict[str, Any]]:
+        return self.client.call('list_services')
+
+    def get_service(self, service_id: str) -> Dict[str, Any]:
+        return self.client.call('get_service', service_id=service_id)
+
+    def start_service(self, service_id: str):
+        self.client.call('start_service', service_id=service_id)
+
+    def stop_service(self, service_id: str):
+        self.client.call('stop_service', service_id=service_id)
+
+    def modem_command(self, command: str):
+        self.client.call('modem_command', command=command)
+
+    def subscribe(self, heartbeat: float) -> RPCStream:
+        return self.client.stream('subscribe', heartbeat=heartbeat, decode=lambda event: FeedEvent(*event))
+
+    def subscribe_transitions(self, heartbeat: float) -> RPCStream:
+        return self.client.stream(
+            'subscribe_transitions', heartbeat=heartbeat, decode=lambda event: FeedEvent(*event)
+        )
+
+    def log(self, after: int = -1, wait: float = 0, level: int = NOTSET, logger: str = '',
+            since: Optional[float] = None, until: Optional[float] = None) -> Dict[str, Any]:
+        return self.client.call_waiting(
+            'log', wait, after=after, wait=wait, level=level, logger=logger, since=since, until=until
+        )
+
+    def metrics(self) -> str:
+        # Ours matter too, e.g. for DB connection pools. Scrapes land on any of the web processes, so each
+        # needs a label of its own, or their counters would look like they keep getting reset.
+        return metrics.merge(OrderedDict([
+            ('daemon', [_decode_family(family) for family in self.client.call('metric_families')]),
+            (f'web-{os.getpid()}', metrics.REGISTRY.families())
+        ]))
+
+
+def _decode_family(family: List[Any]) -> Family:
+    # JSON turns tuples into lists.
+    name, help_text, metric_type, samples = family
+    return Family(name, help_text, metric_type, [
+        (sample, tuple(tuple(label) for label in labels), value) for sample, labels, value in samples
+    ])
+
+
+def _transition_event(transition: StateTransition) -> FeedEvent:
+    # Rendered as the transition gets published, as services are not safe to look at from other threads.
+    exception = transition.exception
+    return FeedEvent('transition', {
+        'service': transition.service.id,
+        'time': transition.time.isoformat(),
+        'previous': transition.previous.name,
+        'state': transition.state.name,
+        'exception': f'{type(exception).__name__}: {exception}' if exception is not None else None
+    })
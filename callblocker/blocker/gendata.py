@@ -0,0 +1,255 @@
+"""
+Generates synthetic phonebooks and call logs at production scale, for reproducing search and pagination
+problems locally (see the gendata command). Data comes from a seeded random number generator, so the same
+arguments always generate the same data.
+
+Numbers are made up as Vivo caller id strings (operator code, area code and a mobile or landline number),
+and split the way the call monitor would split them. Calls follow a long-tailed distribution over callers,
+as a few callers (e.g. telemarketers) make most of the calls, and cluster in daytime hours on weekdays.
+Rows are streamed into the database with COPY, in a transaction per chunk.
+"""
+import csv
+import io
+import logging
+import random
+from collections import namedtuple
+from datetime import datetime, timedelta
+from typing import Iterator, List
+
+from django.db import connection, transaction
+
+from callblocker.blocker import partitions, rollups
+from callblocker.blocker.models import Call, Caller, Source, number_key
+from callblocker.blocker.telcos import Vivo
+
+logger = logging.getLogger(__name__)
+
+#: What got generated. `callers` counts the callers actually inserted, which may be less than requested if
+#: some numbers were already in the phonebook.
+GenerationResult = namedtuple('GenerationResult', ['callers', 'calls'])
+
+#: A generated caller. Times are offsets, in seconds, from the start of the generated period.
+SyntheticCaller = namedtuple('SyntheticCaller', ['area_code', 'number', 'description', 'block', 'inserted'])
+
+#: Brazilian area codes (DDDs).
+AREA_CODES = [
+    '11', '12', '13', '14', '15', '16', '17', '18', '19', '21', '22', '24', '27', '28', '31', '32', '33', '34',
+    '35', '37', '38', '41', '42', '43', '44', '45', '46', '47', '48', '49', '51', '53', '54', '55', '61', '62',
+    '63', '64', '65', '66', '67', '68', '69', '71', '73', '74', '75', '77', '79', '81', '82', '83', '84', '85',
+    '86', '87', '88', '89', '91', '92', '93', '94', '95', '96', '97', '98', '99'
+]
+
+#: Operator codes which show up in front of caller ids, if any.
+OPERATOR_CODES = ['', '', '21', '15', '41', '31']
+
+FIRST_NAMES = [
+    'Ana', 'Bruno', 'Carla', 'Daniel', 'Eduarda', 'Felipe', 'Gabriela', 'Heitor', 'Isabela', 'João', 'Karina',
+    'Lucas', 'Mariana', 'Nicolas', 'Olivia', 'Pedro', 'Rafaela', 'Samuel', 'Tatiana', 'Vinicius', 'Yasmin',
+    'Zed', 'Marinda', 'Kimberley', 'Fermin', 'Yoshiko'
+]
+LAST_NAMES = [
+    'Almeida', 'Barbosa', 'Cardoso', 'Dias', 'Esteves', 'Ferreira', 'Gomes', 'Hoffmann', 'Lima', 'Machado',
+    'Nunes', 'Oliveira', 'Pereira', 'Queiroz', 'Ribeiro', 'Santos', 'Teixeira', 'Vieira', 'Albright',
+    'Stgeorge', 'Mccausland', 'Shope', 'Beahm'
+]
+BUSINESSES = [
+    'Telemarketing', 'Bank', 'Insurance', 'Pharmacy', 'Pizzeria', 'Clinic', 'Survey', 'Internet Provider',
+    'Credit Card', 'Debt Collection'
+]
+
+#: Share of callers which only ever came in through caller id, and therefore have no description.
+UNDESCRIBED_RATIO = 0.3
+#: Share of described callers which are businesses rather than people.
+BUSINESS_RATIO = 0.2
+#: Share of mobile numbers.
+MOBILE_RATIO = 0.7
+#: How skewed calls are towards the busiest callers. Caller ranks are drawn as u ** CALL_SKEW, for a uniform u.
+CALL_SKEW = 3
+#: Relative call volume by hour of day, and by day of week (Monday first).
+HOURLY_WEIGHTS = [1, 1, 1, 1, 1, 2, 4, 8, 12, 14, 14, 13, 12, 13, 14, 14, 13, 12, 10, 8, 6, 4, 2, 1]
+DAILY_WEIGHTS = [10, 10, 10, 10, 9, 5, 3]
+
+#: How many rows to COPY per transaction.
+CHUNK_SIZE = 50000
+
+_STAGING_TABLE = 'gendata_callers'
+_CALL_STAGING_TABLE = 'gendata_calls'
+
+_INSERT_CALLERS = f"""
+    INSERT INTO {Caller._meta.db_table}
+        (id, full_number, area_code, number, description, block, source_id, date_inserted, last_call, notes)
+    SELECT
+        id, area_code || number, area_code, number, COALESCE(description, ''), block, source_id, date_inserted,
+        last_call, ''
+    FROM {_STAGING_TABLE}
+    ON CONFLICT (id) DO NOTHING
+"""
+
+# Callers which were already in the phonebook keep their decision, but get their last call moved up.
+_UPDATE_LAST_CALLS = f"""
+    UPDATE {Caller._meta.db_table} AS caller SET last_call = staged.last_call
+    FROM {_STAGING_TABLE} AS staged
+    WHERE caller.id = staged.id AND staged.last_call > COALESCE(caller.last_call, '-infinity')
+"""
+
+# Calls get the decision of the caller in the phonebook, which is not necessarily the one we made up.
+_INSERT_CALLS = f"""
+    INSERT INTO {Call._meta.db_table} (time, blocked, caller_id)
+    SELECT staged.time, caller.block, staged.caller_id
+    FROM {_CALL_STAGING_TABLE} AS staged
+    JOIN {Caller._meta.db_table} AS caller ON caller.id = staged.caller_id
+"""
+
+
+def synthetic_callers(rng: random.Random, n: int, blocked_ratio: float, period: float) -> List[SyntheticCaller]:
+    """Makes up `n` callers with distinct numbers, inserted into the phonebook within `period` seconds."""
+    provider = Vivo()
+    seen = set()
+    callers = []
+    while len(callers) < n:
+        mobile = rng.random() < MOBILE_RATIO
+        cid = (
+            rng.choice(OPERATOR_CODES) + rng.choice(AREA_CODES)
+            + (f'9{rng.randrange(10 ** 8):08d}' if mobile else f'{rng.randint(2, 5)}{rng.randrange(10 ** 7):07d}')
+        )
+        area_code, number = provider.split_cid(cid)
+        if area_code + number in seen:
+            continue
+        seen.add(area_code + number)
+        callers.append(SyntheticCaller(
+            area_code, number, _description(rng), rng.random() < blocked_ratio, rng.random() * period
+        ))
+
+    return callers
+
+
+def call_counts(rng: random.Random, callers: int, calls: int) -> List[int]:
+    """Spreads `calls` over `callers`, with most of them going to a few callers."""
+    counts = [0] * callers
+    for _ in range(calls):
+        counts[int(callers * rng.random() ** CALL_SKEW)] += 1
+    return counts
+
+
+def call_times(rng: random.Random, n: int, start: datetime, days: int) -> Iterator[datetime]:
+    """Makes up `n` call times within the `days` days after `start`, clustered in business hours."""
+    for _ in range(n):
+        while True:
+            day = rng.randrange(days)
+            moment = start + timedelta(days=day, hours=rng.choices(range(24), HOURLY_WEIGHTS)[0],
+                                       seconds=rng.random() * 3600)
+            if rng.random() * max(DAILY_WEIGHTS) < DAILY_WEIGHTS[moment.weekday()]:
+                yield moment
+                break
+
+
+def generate(callers: int, calls: int, blocked_ratio: float, end: datetime, days: int = 365, seed: int = 0,
+             chunk_size: int = CHUNK_SIZE) -> GenerationResult:
+    """
+    Generates `callers` callers and `calls` calls over the `days` days before `end`, and inserts them into
+    the database. Callers whose numbers are already in the phonebook are left alone, and their calls get
+    logged against the existing caller (and its decision). Rollups for the period get recomputed once done.
+
+    :return: a :class:`GenerationResult`.
+    """
+    rng = random.Random(seed)
+    start = end - timedelta(days=days)
+    phonebook = synthetic_callers(rng, callers, blocked_ratio, days * 86400)
+    counts = call_counts(rng, callers, calls)
+
+    _create_partitions(start, end)
+
+    inserted = 0
+    caller_rows, call_rows = _Buffer(), _Buffer()
+    for caller, count in zip(phonebook, counts):
+        key = number_key(caller.area_code + caller.number)
+        times = sorted(call_times(rng, count, start, days))
+        # Callers make it into the phonebook with their first call, if not before.
+        date_inserted = min([start + timedelta(seconds=caller.inserted)] + times[:1])
+
+        caller_rows.write(
+            key, caller.area_code, caller.number, caller.description, caller.block,
+            Source.USER if caller.description else Source.CID, date_inserted, times[-1] if times else None
+        )
+        for time in times:
+            call_rows.write(time, key)
+
+        if caller_rows.rows + call_rows.rows >= chunk_size:
+            inserted += _flush(caller_rows, call_rows)
+    inserted += _flush(caller_rows, call_rows)
+
+    with transaction.atomic():
+        rollups.backfill(start)
+
+    result = GenerationResult(callers=inserted, calls=calls)
+    logger.info('Generated data: %s', result)
+    return result
+
+
+def _description(rng: random.Random) -> str:
+    if rng.random() < UNDESCRIBED_RATIO:
+        return ''
+    if rng.random() < BUSINESS_RATIO:
+        return f'{rng.choice(LAST_NAMES)} {rng.choice(BUSINESSES)}'
+    return f'{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}'
+
+
+def _create_partitions(start: datetime, end: datetime):
+    # Calls would otherwise all land in the default partition, which is not what production looks like.
+    existing = {partition.month for partition in partitions.partitions()}
+    month = partitions.month_of(start)
+    while month <= end:
+        if month not in existing:
+            partitions.create_partition(month)
+        month = partitions.add_months(month, 1)
+
+
+def _flush(caller_rows: '_Buffer', call_rows: '_Buffer') -> int:
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {_STAGING_TABLE} ('
+            f'  id bigint, area_code varchar(8), number varchar(20), description varchar(200), block boolean,'
+            f'  source_id integer, date_inserted timestamptz, last_call timestamptz'
+            f') ON COMMIT DROP'
+        )
+        cursor.execute(
+            f'CREATE TEMPORARY TABLE {_CALL_STAGING_TABLE} (time timestamptz, caller_id bigint) ON COMMIT DROP'
+        )
+        caller_rows.copy(cursor, _STAGING_TABLE)
+        cursor.execute(_INSERT_CALLERS)
+        inserted = cursor.rowcount
+        cursor.execute(_UPDATE_LAST_CALLS)
+        call_rows.copy(cursor, _CALL_STAGING_TABLE)
+        cursor.execute(_INSERT_CALLS)
+        cursor.execute(f'DROP TABLE {_STAGING_TABLE}, {_CALL_STAGING_TABLE}')
+
+    return inserted
+
+
+class _Buffer(object):
+    # Rows waiting to be copied into a table, as CSV.
+
+    def __init__(self):
+        self.rows = 0
+        self._buffer = io.StringIO()
+        # Both None and empty strings come out as empty fields, which COPY reads as NULLs.
+        self._writer = csv.writer(self._buffer)
+
+    def write(self, *row):
+        self._writer.writerow(_csv_value(value) for value in row)
+        self.rows += 1
+
+    def copy(self, cursor, table: str):
+        self._buffer.seek(0)
+        cursor.copy_expert(f'COPY {table} FROM STDIN WITH (FORMAT csv)', self._buffer)
+        self._buffer.seek(0)
+        self._buffer.truncate()
+        self.rows = 0
+
+
+def _csv_value(value):
+    if isinstance(value, bool):
+        return 't' if value else 'f'
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
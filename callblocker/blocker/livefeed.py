@@ -0,0 +1,55 @@
+import logging
+from collections import namedtuple
+
+from callblocker.blocker.callmonitor import CallMonitor
+from callblocker.blocker.models import Caller, Call
+from callblocker.core.broadcast import Broadcaster, Subscription
+from callblocker.core.modem import Modem
+from callblocker.core.service import AsyncioService, AsyncioEventLoop
+
+logger = logging.getLogger(__name__)
+
+#: An event in the live feed. `type` is either 'modem' or 'call', and `data` is a JSON-serializable dict.
+FeedEvent = namedtuple('FeedEvent', ['type', 'data'])
+
+
+class LiveFeed(AsyncioService):
+    """
+    Pushes modem events and screening decisions, as they happen, to any number of :class:`Subscription`
+    objects. This allows clients to learn about calls while the phone is still ringing, without polling
+    the database.
+    """
+    name = 'live feed'
+
+    def __init__(self, modem: Modem, call_monitor: CallMonitor, aio_loop_service: AsyncioEventLoop,
+                 buffer_size: int = 100):
+        super().__init__(aio_loop_service=aio_loop_service)
+        self.modem = modem
+        self.call_monitor = call_monitor
+        self.broadcaster = Broadcaster(buffer_size)
+
+    def subscribe(self) -> Subscription:
+        return self.broadcaster.subscribe()
+
+    async def _event_loop(self):
+        self.call_monitor.add_listener(self._call_screened)
+        try:
+            with self.modem.event_stream() as stream:
+                self._signal_started()
+                async for event in stream:
+                    self.broadcaster.publish(FeedEvent('modem', {
+                        'event_type': event.event_type,
+                        'contents': event.contents
+                    }))
+        finally:
+            self.call_monitor.remove_listener(self._call_screened)
+
+    def _call_screened(self, caller: Caller, call: Call):
+        self.broadcaster.publish(FeedEvent('call', {
+            'full_number': caller.full_number,
+            'area_code': caller.area_code,
+            'number': caller.number,
+            'description': caller.description,
+            'time': call.time.isoformat(),
+            'blocked': call.blocked
+        }))
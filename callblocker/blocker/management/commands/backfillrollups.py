@@ -0,0 +1,30 @@
+from datetime import datetime, time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import transaction
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils.timezone import is_aware, make_aware
+
+from callblocker.blocker import rollups
+
+
+class Command(BaseCommand):
+    help = 'Recomputes the hourly and daily call rollups from the call log.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--since', help='Only recompute from this ISO 8601 date (or the day of this datetime) onwards.')
+
+    def handle(self, *args, **options):
+        since = options['since']
+        if since is not None:
+            parsed = parse_datetime(since)
+            if parsed is None and parse_date(since) is not None:
+                parsed = datetime.combine(parse_date(since), time())
+            if parsed is None:
+                raise CommandError(f'Invalid datetime {since}.')
+            since = parsed if is_aware(parsed) else make_aware(parsed)
+
+        with transaction.atomic():
+            written = rollups.backfill(since)
+
+        self.stdout.write(f'{written} rollup rows written.')
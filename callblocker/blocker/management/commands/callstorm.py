@@ -0,0 +1,82 @@
+import json
+from contextlib import contextmanager
+
+from django.core.management import BaseCommand, CommandError
+
+from benchmarks.harness import test_database
+from callblocker.blocker import callstorm
+
+
+class Command(BaseCommand):
+    help = 'Storms the call monitor with calls over virtual lines, and reports how screening held up. Storms run ' \
+           'in a throwaway database unless told otherwise.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--lines', type=int, default=4, help='How many virtual lines to screen calls on.')
+        parser.add_argument('--rate', type=float, default=10, help='Average calls per second.')
+        parser.add_argument('--duration', type=float, default=10, help='How long to storm for, in seconds.')
+        parser.add_argument('--arrival', choices=callstorm.ARRIVALS, default=callstorm.POISSON,
+                            help='Whether calls arrive one by one, or in bursts.')
+        parser.add_argument('--burst-size', type=int, default=10, help='How many calls come in per burst.')
+        parser.add_argument('--blocked-fraction', type=float, default=0.1,
+                            help='Share of calls which come from blocked callers.')
+        parser.add_argument('--callers', type=int, default=1000, help='How many distinct callers call in.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the random number generator.')
+        parser.add_argument('--drain-timeout', type=float, default=30,
+                            help='How long to wait for calls in flight to get screened once the storm is over.')
+        parser.add_argument('--json', action='store_true', help='Prints the report as JSON.')
+        parser.add_argument('--current-database', action='store_true',
+                            help='Storms the configured database instead of a throwaway one. The callers and calls '
+                                 'the storm makes up are left behind.')
+
+    def handle(self, *args, **options):
+        for option in ['lines', 'rate', 'duration', 'burst_size', 'callers']:
+            if options[option] <= 0:
+                raise CommandError(f'--{option.replace("_", "-")} must be positive.')
+
+        try:
+            storm = callstorm.CallStorm(
+                options['lines'],
+                options['rate'],
+                options['duration'],
+                arrival=options['arrival'],
+                burst_size=options['burst_size'],
+                blocked_fraction=options['blocked_fraction'],
+                callers=options['callers'],
+                seed=options['seed']
+            )
+        except ValueError as ex:
+            raise CommandError(str(ex))
+
+        with (_current_database() if options['current_database'] else test_database()):
+            try:
+                report = storm.run(drain_timeout=options['drain_timeout'])
+            except ValueError as ex:
+                raise CommandError(str(ex))
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
+            return
+
+        self.stdout.write(
+            f'{report["offered"]} calls offered to {report["lines"]} lines over {report["duration"]:.1f}s '
+            f'({report["arrival"]}, {report["rate"]:g}/s): {report["screened"]} screened '
+            f'({report["blocked"]} blocked), {report["turned_away"]} turned away, '
+            f'{report["unscreened"]} unscreened.'
+        )
+        self.stdout.write(f'Throughput: {report["calls_per_second"]:.1f} calls/s.')
+        for name, key in [('Decision latency', 'latency'), ('Write lag', 'write_lag')]:
+            if report[key] is not None:
+                self.stdout.write(f'{name}: ' + ', '.join(f'{point[:-3]} {value:.1f}ms'
+                                                          for point, value in report[key].items()) + '.')
+        if report['db_ms_per_call'] is not None:
+            self.stdout.write(f'Database time: {report["db_ms_per_call"]:.1f}ms per call.')
+        if not report['drained']:
+            self.stderr.write('Some calls were still being screened when the drain timeout ran out.')
+        if report['failed_lines']:
+            self.stderr.write(f'Lines {report["failed_lines"]} stopped screening calls.')
+
+
+@contextmanager
+def _current_database():
+    yield
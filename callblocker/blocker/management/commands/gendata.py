@@ -0,0 +1,55 @@
+import time
+from datetime import datetime
+
+from django.core.management import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime, parse_date
+from django.utils.timezone import is_aware, make_aware
+
+from callblocker.blocker import gendata
+
+
+class Command(BaseCommand):
+    help = 'Generates a synthetic phonebook and call log, for reproducing problems which only show up at scale.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--callers', type=int, required=True, help='How many callers to generate.')
+        parser.add_argument('--calls', type=int, required=True, help='How many calls to generate.')
+        parser.add_argument('--blocked-ratio', type=float, default=0.1, help='Share of blocked callers.')
+        parser.add_argument('--days', type=int, default=365, help='How many days of call log to generate.')
+        parser.add_argument('--end', help='ISO 8601 date (or datetime) the call log ends at. Defaults to today. '
+                                          'Data only comes out the same for the same seed and end.')
+        parser.add_argument('--seed', type=int, default=0, help='Seed for the random number generator.')
+        parser.add_argument('--chunk-size', type=int, default=gendata.CHUNK_SIZE,
+                            help='How many rows to insert per transaction.')
+
+    def handle(self, *args, **options):
+        if not 0 <= options['blocked_ratio'] <= 1:
+            raise CommandError('The blocked ratio must be between 0 and 1.')
+
+        start = time.perf_counter()
+        result = gendata.generate(
+            options['callers'],
+            options['calls'],
+            options['blocked_ratio'],
+            self._end(options['end']),
+            days=options['days'],
+            seed=options['seed'],
+            chunk_size=options['chunk_size']
+        )
+
+        self.stdout.write(
+            f'{result.callers} callers and {result.calls} calls generated in {time.perf_counter() - start:.1f}s.'
+        )
+
+    @staticmethod
+    def _end(end) -> datetime:
+        if end is None:
+            return timezone.now().replace(hour=0, minute=0, second=0, microsecond=0)
+
+        parsed = parse_datetime(end)
+        if parsed is None and parse_date(end) is not None:
+            parsed = datetime.combine(parse_date(end), datetime.min.time())
+        if parsed is None:
+            raise CommandError(f'Invalid datetime {end}.')
+        return parsed if is_aware(parsed) else make_aware(parsed)
@@ -0,0 +1,30 @@
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from callblocker.blocker import telcos
+from callblocker.blocker.blocklist import import_blocklist
+from callblocker.blocker.models import Source
+
+
+class Command(BaseCommand):
+    help = 'Imports a CSV blocklist into the phonebook. See the blocker.blocklist module for the file format.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('file', help='Path to the CSV file.')
+        parser.add_argument('--source', type=int, default=Source.USER,
+                            help=f'Source id for new callers (defaults to {Source.USER}).')
+
+    def handle(self, *args, **options):
+        with open(options['file'], encoding='utf-8', newline='') as lines:
+            try:
+                result = import_blocklist(
+                    lines,
+                    telcos.get_telco(settings.MODEM_TELCO_PROVIDER),
+                    source=options['source']
+                )
+            except ValueError as ex:
+                raise CommandError(str(ex))
+
+        self.stdout.write(
+            f'{result.inserted} inserted, {result.updated} updated, {result.skipped} skipped.'
+        )
@@ -0,0 +1,31 @@
+from django.conf import settings
+from django.core.management import BaseCommand
+from django.utils import timezone
+
+from callblocker.blocker import partitions
+
+
+class Command(BaseCommand):
+    help = 'Creates upcoming call log partitions and applies the retention policy. Meant to be run periodically.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--ahead', type=int, default=settings.CALL_PARTITIONS_AHEAD,
+                            help='How many months ahead to create partitions for.')
+        parser.add_argument('--retention', type=int, default=settings.CALL_RETENTION_MONTHS,
+                            help='How many months of call log to keep, besides the current one.')
+        parser.add_argument('--archive', action='store_true', default=settings.CALL_RETENTION_ARCHIVE,
+                            help='Detach expired partitions instead of dropping them.')
+
+    def handle(self, *args, **options):
+        for partition in partitions.ensure_partitions(options['ahead']):
+            self.stdout.write(f'Created {partition.name}.')
+
+        if options['retention'] is None:
+            return
+
+        before = partitions.add_months(partitions.month_of(timezone.now()), -options['retention'])
+        for partition in partitions.expire(before, archive=options['archive']):
+            self.stdout.write(
+                f'Archived {partition.name} as {partitions.archive_name(partition)}.' if options['archive']
+                else f'Dropped {partition.name}.'
+            )
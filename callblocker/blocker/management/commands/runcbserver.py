@@ -2,7 +2,7 @@ from django.conf import settings
 from django.core.management import BaseCommand, call_command
 
 from callblocker import blocker
-from callblocker.blocker import BootstrapMode
+from callblocker.blocker import BootstrapMode, services
 
 
 class Command(BaseCommand):
@@ -13,18 +13,13 @@ class Command(BaseCommand):
     """
     help = 'Runs the Callblocker development server.'
 
-    def execute(self, *args, **options):
-        # Sigh. This has to be put here as otherwise BaseCommand
-        # will go for urls.py before we had a chance to toggle the flag.
-        # Damn this freaking hack.
+    def handle(self, *args, **options):
         blocker.bootstrap_mode(
             BootstrapMode.FAKE_SERVER
             if settings.MODEM_USE_FAKE
             else BootstrapMode.SERVER
         )
+        services.services()
 
-        super().execute(*args, **options)
-
-    def handle(self, *args, **options):
         # Runs the actual server.
         call_command('runserver', '--noreload')
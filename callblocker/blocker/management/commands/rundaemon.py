@@ -0,0 +1,31 @@
+import signal
+from threading import Event
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from callblocker.blocker import BootstrapMode, services
+
+
+class Command(BaseCommand):
+    """
+    Runs the modem services in a standalone process, so that the web tier does not have to. Web processes
+    find the daemon through the MODEM_DAEMON_SOCKET setting, and control it over RPC.
+    """
+    help = 'Runs the modem daemon.'
+
+    def handle(self, *args, **options):
+        if not settings.MODEM_DAEMON_SOCKET:
+            raise CommandError('MODEM_DAEMON_SOCKET must be set.')
+
+        mode = BootstrapMode.FAKE_DAEMON if settings.MODEM_USE_FAKE else BootstrapMode.DAEMON
+        group = services.bootstrap(mode.value)
+        group.start(settings.SERVICE_START_TIMEOUT)
+        self.stdout.write(f'Modem daemon listening on {settings.MODEM_DAEMON_SOCKET}.')
+
+        stop = Event()
+        for signum in [signal.SIGINT, signal.SIGTERM]:
+            signal.signal(signum, lambda *_: stop.set())
+        stop.wait()
+
+        group.shutdown(settings.SERVICE_STOP_TIMEOUT)
@@ -0,0 +1,79 @@
+import json
+import os
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+
+from callblocker.blocker import BootstrapMode
+
+
+class Command(BaseCommand):
+    """
+    Reports how long startup takes, and which imports are the slowest. The profile is taken in a fresh
+    interpreter (see :mod:`callblocker.blocker.startup`), since everything is already imported by the time
+    this command runs.
+    """
+    help = 'Reports where startup time goes.'
+    requires_system_checks = False
+
+    def add_arguments(self, parser):
+        parser.add_argument('--mode', choices=[mode.value for mode in BootstrapMode],
+                            help='Also bootstraps the services for this mode.')
+        parser.add_argument('--start', action='store_true', help='Also starts the bootstrapped services.')
+        parser.add_argument('--top', type=int, default=20, help='How many of the slowest imports to list.')
+        parser.add_argument('--json', action='store_true', help='Prints the profile as JSON.')
+
+    def handle(self, *args, **options):
+        if options['start'] and options['mode'] is None:
+            raise CommandError('--start requires --mode.')
+
+        command = [sys.executable, '-m', 'callblocker.blocker.startup', '--top', str(options['top'])]
+        if options['mode'] is not None:
+            command += ['--mode', options['mode']]
+        if options['start']:
+            command.append('--start')
+
+        start = time.perf_counter()
+        result = subprocess.run(
+            command,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=settings.BASE_DIR,
+            env=dict(os.environ, DJANGO_SETTINGS_MODULE=os.environ['DJANGO_SETTINGS_MODULE'])
+        )
+        total = time.perf_counter() - start
+
+        if result.returncode != 0:
+            raise CommandError(f'Profiling failed:\n{result.stderr.decode("utf-8", "replace")}')
+
+        profile = json.loads(result.stdout.decode('utf-8').splitlines()[-1])
+        profile['total'] = total
+
+        if options['json']:
+            self.stdout.write(json.dumps(profile, indent=2))
+            return
+
+        self.stdout.write(f'Startup profile (mode: {profile["mode"] or "none"}):')
+        self.stdout.write(f'  {"total, including interpreter":<32}{_ms(total)}')
+        for phase, elapsed in profile['phases'].items():
+            self.stdout.write(f'  {phase:<32}{_ms(elapsed)}')
+
+        if profile['services']:
+            self.stdout.write('\nService startup timeline:')
+            for entry in profile['services']:
+                self.stdout.write(
+                    f'  {entry["service"]:<16}at {_ms(entry["started"])}, '
+                    f'took {_ms(entry["elapsed"])}, {entry["state"]}'
+                )
+
+        self.stdout.write(f'\nSlowest imports ({profile["modules"]} modules imported):')
+        self.stdout.write(f'  {"cumulative":>12}{"self":>12}  module')
+        for timing in profile['imports']:
+            self.stdout.write(f'  {_ms(timing["cumulative"])}{_ms(timing["self"])}  {timing["module"]}')
+
+
+def _ms(seconds: float) -> str:
+    return f'{seconds * 1000:>9.1f} ms'
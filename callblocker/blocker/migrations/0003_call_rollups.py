@@ -0,0 +1,41 @@
+# Generated by Django 2.2.24 on 2026-10-19 18:46
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocker', '0002_auto_20190803_0115'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HourlyCallRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('area_code', models.CharField(max_length=8)),
+                ('blocked', models.BooleanField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+                'unique_together': {('bucket', 'area_code', 'blocked')},
+            },
+        ),
+        migrations.CreateModel(
+            name='DailyCallRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('bucket', models.DateTimeField()),
+                ('area_code', models.CharField(max_length=8)),
+                ('blocked', models.BooleanField()),
+                ('calls', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'abstract': False,
+                'unique_together': {('bucket', 'area_code', 'blocked')},
+            },
+        ),
+    ]
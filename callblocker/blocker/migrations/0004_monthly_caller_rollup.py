@@ -0,0 +1,29 @@
+# Generated by Django 2.2.24 on 2026-10-19 18:48
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocker', '0003_call_rollups'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MonthlyCallerRollup',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('month', models.DateTimeField()),
+                ('calls', models.PositiveIntegerField()),
+                ('blocked_calls', models.PositiveIntegerField()),
+                ('first_call', models.DateTimeField()),
+                ('last_call', models.DateTimeField()),
+                ('caller', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='blocker.Caller')),
+            ],
+            options={
+                'unique_together': {('caller', 'month')},
+            },
+        ),
+    ]
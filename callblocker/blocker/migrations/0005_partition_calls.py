@@ -0,0 +1,82 @@
+"""
+Turns blocker_call into a table partitioned by month on time, with a default partition catching rows for
+months which have no partition yet. Partitions are named blocker_call_pYYYY_MM, and span UTC months. The
+partitions for existing rows are created here; new ones are created by the partitioncalls command.
+
+Postgres requires the partition key to be part of the primary key, so the primary key becomes (id, time).
+"""
+from django.db import migrations
+
+PARTITION = """
+    ALTER TABLE blocker_call RENAME TO blocker_call_unpartitioned;
+    ALTER INDEX blocker_call_pkey RENAME TO blocker_call_unpartitioned_pkey;
+
+    CREATE TABLE blocker_call (
+        id integer NOT NULL DEFAULT nextval('blocker_call_id_seq'),
+        time timestamp with time zone NOT NULL,
+        blocked boolean NOT NULL,
+        caller_id varchar(28) NOT NULL
+            CONSTRAINT blocker_call_caller_id_fk_blocker_caller_full_number
+            REFERENCES blocker_caller (full_number) DEFERRABLE INITIALLY DEFERRED,
+        CONSTRAINT blocker_call_pkey PRIMARY KEY (id, time)
+    ) PARTITION BY RANGE (time);
+
+    -- Call listings are per caller, and ordered by time.
+    CREATE INDEX blocker_call_caller_id_time ON blocker_call (caller_id, time);
+
+    CREATE TABLE blocker_call_default PARTITION OF blocker_call DEFAULT;
+
+    DO $$
+    DECLARE
+        month timestamp;
+    BEGIN
+        FOR month IN SELECT DISTINCT date_trunc('month', time AT TIME ZONE 'UTC') FROM blocker_call_unpartitioned
+        LOOP
+            EXECUTE format(
+                'CREATE TABLE %I PARTITION OF blocker_call FOR VALUES FROM (%L) TO (%L)',
+                'blocker_call_p' || to_char(month, 'YYYY_MM'),
+                month AT TIME ZONE 'UTC',
+                (month + interval '1 month') AT TIME ZONE 'UTC'
+            );
+        END LOOP;
+    END $$;
+
+    INSERT INTO blocker_call (id, time, blocked, caller_id)
+        SELECT id, time, blocked, caller_id FROM blocker_call_unpartitioned;
+
+    ALTER SEQUENCE blocker_call_id_seq OWNED BY blocker_call.id;
+    DROP TABLE blocker_call_unpartitioned;
+"""
+
+UNPARTITION = """
+    CREATE TABLE blocker_call_unpartitioned (
+        id integer NOT NULL DEFAULT nextval('blocker_call_id_seq'),
+        time timestamp with time zone NOT NULL,
+        blocked boolean NOT NULL,
+        caller_id varchar(28) NOT NULL
+    );
+
+    INSERT INTO blocker_call_unpartitioned (id, time, blocked, caller_id)
+        SELECT id, time, blocked, caller_id FROM blocker_call;
+
+    ALTER SEQUENCE blocker_call_id_seq OWNED BY blocker_call_unpartitioned.id;
+    DROP TABLE blocker_call;
+    ALTER TABLE blocker_call_unpartitioned RENAME TO blocker_call;
+
+    ALTER TABLE blocker_call ADD CONSTRAINT blocker_call_pkey PRIMARY KEY (id);
+    ALTER TABLE blocker_call ADD CONSTRAINT blocker_call_caller_id_96e07d24_fk_blocker_caller_full_number
+        FOREIGN KEY (caller_id) REFERENCES blocker_caller (full_number) DEFERRABLE INITIALLY DEFERRED;
+    CREATE INDEX blocker_call_caller_id_96e07d24 ON blocker_call (caller_id);
+    CREATE INDEX blocker_call_caller_id_96e07d24_like ON blocker_call (caller_id varchar_pattern_ops);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocker', '0004_monthly_caller_rollup'),
+    ]
+
+    operations = [
+        migrations.RunSQL(PARTITION, UNPARTITION)
+    ]
@@ -0,0 +1,121 @@
+"""
+Keys callers by their number as a bigint (see blocker.models.number_key) rather than as a varchar, and has
+calls and monthly caller rollups refer to callers by that key. full_number stays around, with a unique index,
+as it is what the API knows callers by.
+
+Calls archived by the retention policy (blocker_call_archive_pYYYY_MM tables) get rekeyed too, and lose their
+foreign keys to callers, as archives made since do (see blocker.partitions.expire).
+
+Callers whose numbers can't be keyed (non-digits, or more than 17 digits) have to be fixed, or deleted, before
+migrating.
+"""
+from django.db import migrations, models
+
+import callblocker.blocker.models
+
+FORWARD = r"""
+    DO $$
+    BEGIN
+        IF EXISTS (SELECT 1 FROM blocker_caller WHERE full_number !~ '^[0-9]{1,17}$') THEN
+            RAISE EXCEPTION 'Some callers have numbers which are not made of 1 to 17 digits. Fix them first.';
+        END IF;
+    END $$;
+
+    DO $$
+    DECLARE
+        archive text;
+        fk text;
+    BEGIN
+        FOR archive IN SELECT relname FROM pg_class WHERE relname LIKE 'blocker\_call\_archive\_p%' AND relkind = 'r'
+        LOOP
+            FOR fk IN SELECT conname FROM pg_constraint WHERE conrelid = archive::regclass AND contype = 'f'
+            LOOP
+                EXECUTE format('ALTER TABLE %I DROP CONSTRAINT %I', archive, fk);
+            END LOOP;
+            EXECUTE format(
+                'ALTER TABLE %I ALTER COLUMN caller_id TYPE bigint USING (''55'' || caller_id)::bigint', archive
+            );
+        END LOOP;
+    END $$;
+
+    ALTER TABLE blocker_call DROP CONSTRAINT blocker_call_caller_id_fk_blocker_caller_full_number;
+    ALTER TABLE blocker_monthlycallerrollup DROP CONSTRAINT blocker_monthlycalle_caller_id_6a6cb635_fk_blocker_c;
+    DROP INDEX blocker_monthlycallerrollup_caller_id_6a6cb635_like;
+
+    -- Setting keys through a type change rewrites the table, where an UPDATE would leave it twice its size.
+    ALTER TABLE blocker_caller ADD COLUMN id bigint;
+    ALTER TABLE blocker_caller ALTER COLUMN id TYPE bigint USING ('55' || full_number)::bigint;
+    ALTER TABLE blocker_caller ALTER COLUMN id SET NOT NULL;
+    ALTER TABLE blocker_caller DROP CONSTRAINT blocker_caller_pkey;
+    ALTER TABLE blocker_caller ADD CONSTRAINT blocker_caller_pkey PRIMARY KEY (id);
+    ALTER TABLE blocker_caller ADD CONSTRAINT blocker_caller_full_number_32d738ce_uniq UNIQUE (full_number);
+
+    -- Rewrites every partition, and rebuilds the indexes on caller_id.
+    ALTER TABLE blocker_call ALTER COLUMN caller_id TYPE bigint USING ('55' || caller_id)::bigint;
+    ALTER TABLE blocker_call ADD CONSTRAINT blocker_call_caller_id_fk_blocker_caller_id
+        FOREIGN KEY (caller_id) REFERENCES blocker_caller (id) DEFERRABLE INITIALLY DEFERRED;
+
+    ALTER TABLE blocker_monthlycallerrollup ALTER COLUMN caller_id TYPE bigint USING ('55' || caller_id)::bigint;
+    ALTER TABLE blocker_monthlycallerrollup ADD CONSTRAINT blocker_monthlycallerrollup_caller_id_fk_blocker_caller_id
+        FOREIGN KEY (caller_id) REFERENCES blocker_caller (id) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+BACKWARD = r"""
+    DO $$
+    DECLARE
+        archive text;
+    BEGIN
+        FOR archive IN SELECT relname FROM pg_class WHERE relname LIKE 'blocker\_call\_archive\_p%' AND relkind = 'r'
+        LOOP
+            EXECUTE format(
+                'ALTER TABLE %I ALTER COLUMN caller_id TYPE varchar(28) USING substr(caller_id::text, 3)', archive
+            );
+        END LOOP;
+    END $$;
+
+    ALTER TABLE blocker_call DROP CONSTRAINT blocker_call_caller_id_fk_blocker_caller_id;
+    ALTER TABLE blocker_monthlycallerrollup DROP CONSTRAINT blocker_monthlycallerrollup_caller_id_fk_blocker_caller_id;
+
+    ALTER TABLE blocker_call ALTER COLUMN caller_id TYPE varchar(28) USING substr(caller_id::text, 3);
+    ALTER TABLE blocker_monthlycallerrollup ALTER COLUMN caller_id TYPE varchar(28) USING substr(caller_id::text, 3);
+    CREATE INDEX blocker_monthlycallerrollup_caller_id_6a6cb635_like
+        ON blocker_monthlycallerrollup (caller_id varchar_pattern_ops);
+
+    ALTER TABLE blocker_caller DROP CONSTRAINT blocker_caller_full_number_32d738ce_uniq;
+    ALTER TABLE blocker_caller DROP CONSTRAINT blocker_caller_pkey;
+    ALTER TABLE blocker_caller ADD CONSTRAINT blocker_caller_pkey PRIMARY KEY (full_number);
+    ALTER TABLE blocker_caller DROP COLUMN id;
+
+    ALTER TABLE blocker_call ADD CONSTRAINT blocker_call_caller_id_fk_blocker_caller_full_number
+        FOREIGN KEY (caller_id) REFERENCES blocker_caller (full_number) DEFERRABLE INITIALLY DEFERRED;
+    ALTER TABLE blocker_monthlycallerrollup ADD CONSTRAINT blocker_monthlycalle_caller_id_6a6cb635_fk_blocker_c
+        FOREIGN KEY (caller_id) REFERENCES blocker_caller (full_number) DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blocker', '0005_partition_calls'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[migrations.RunSQL(FORWARD, BACKWARD)],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='caller',
+                    name='full_number',
+                    field=models.CharField(
+                        max_length=28, unique=True, validators=[callblocker.blocker.models.validate_full_number]
+                    ),
+                ),
+                migrations.AddField(
+                    model_name='caller',
+                    name='id',
+                    field=models.BigIntegerField(primary_key=True, serialize=False),
+                    preserve_default=False,
+                ),
+            ]
+        )
+    ]
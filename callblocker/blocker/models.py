@@ -1,3 +1,6 @@
+import re
+
+from django.core.exceptions import ValidationError
 from django.db import models
 
 
@@ -13,13 +16,48 @@ class Source(models.Model):
         return Source.objects.get(pk=pk)
 
 
+#: Country code our numbers are keyed with (see :func:`number_key`). Changing it requires rekeying every caller,
+#: and every call.
+COUNTRY_CODE = '55'
+#: Longest full number which still fits a key.
+MAX_KEYED_DIGITS = 17
+
+_KEYABLE = re.compile(r'[0-9]{1,%d}' % MAX_KEYED_DIGITS)
+
+
+def number_key(full_number: str) -> int:
+    """
+    :return: the key of the caller with number `full_number` (area code and number), which is the number in
+             E.164 form (i.e. prefixed with :data:`COUNTRY_CODE`), as an integer. Numbers starting with zeroes
+             keep them, as the country code comes first.
+    :raise ValueError: if `full_number` is not made of digits, or is too long to fit a key.
+    """
+    if not _KEYABLE.fullmatch(full_number):
+        raise ValueError(f'Cannot key number {full_number}.')
+    return int(COUNTRY_CODE + full_number)
+
+
+def key_number(key: int) -> str:
+    """:return: the full number keyed by `key` (the inverse of :func:`number_key`)."""
+    return str(key)[len(COUNTRY_CODE):]
+
+
+def validate_full_number(full_number: str):
+    try:
+        number_key(full_number)
+    except ValueError:
+        raise ValidationError(
+            f'Phone numbers must be made of at most {MAX_KEYED_DIGITS} digits, area code included.'
+        )
+
+
 class Caller(models.Model):
-    # This may sound redundant but it's actually the best
-    # primary key for our callers. Further, many other
-    # pieces of the framework are not good at working with
-    # composite keys, so having a single primary key makes
-    # things much simpler.
-    full_number = models.CharField(max_length=28, primary_key=True)
+    # Callers are keyed by their full number, but as an integer (see number_key) rather than a string, which
+    # makes for much smaller indexes, and for narrower call rows. Many other pieces of the framework are not
+    # good at working with composite keys, so having a single primary key makes things much simpler.
+    id = models.BigIntegerField(primary_key=True)
+    # This is what the API knows callers by.
+    full_number = models.CharField(max_length=28, unique=True, validators=[validate_full_number])
 
     area_code = models.CharField(max_length=8)
     number = models.CharField(max_length=20)
@@ -37,6 +75,7 @@ class Caller(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_number = self.area_code.strip() + self.number.strip()
+        self.id = number_key(self.full_number)
         super().save(*args, **kwargs)
 
     def __str__(self):
@@ -44,7 +83,50 @@ class Caller(models.Model):
 
 
 class Call(models.Model):
+    # Calls are partitioned by month in the database (see migration 0005 and the blocker.partitions
+    # module), so the actual primary key is (id, time). ids are still unique as they come from a
+    # single sequence.
+    #
     # Beware of https://code.djangoproject.com/ticket/25012
     caller = models.ForeignKey(Caller, on_delete=models.CASCADE)
     time = models.DateTimeField()
     blocked = models.BooleanField()
+
+
+class CallRollup(models.Model):
+    """
+    Number of calls screened per time bucket, area code and decision. Rollups are kept up to date as calls
+    come in (see the blocker.rollups module), and outlive the calls they count.
+    """
+    bucket = models.DateTimeField()
+    area_code = models.CharField(max_length=8)
+    blocked = models.BooleanField()
+    calls = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        abstract = True
+        unique_together = ['bucket', 'area_code', 'blocked']
+
+
+class HourlyCallRollup(CallRollup):
+    granularity = 'hour'
+
+
+class DailyCallRollup(CallRollup):
+    granularity = 'day'
+
+
+class MonthlyCallerRollup(models.Model):
+    """
+    Per-caller call counts for a month of call log which has been dropped or archived by the retention
+    policy (see the blocker.partitions module).
+    """
+    caller = models.ForeignKey(Caller, on_delete=models.CASCADE)
+    month = models.DateTimeField()
+    calls = models.PositiveIntegerField()
+    blocked_calls = models.PositiveIntegerField()
+    first_call = models.DateTimeField()
+    last_call = models.DateTimeField()
+
+    class Meta:
+        unique_together = ['caller', 'month']
@@ -0,0 +1,142 @@
+"""
+Maintenance of the monthly partitions of the :class:`Call` table (see migration 0005). Partitions are named
+blocker_call_pYYYY_MM and span UTC months. Calls for months without a partition land in the default
+partition, from which :func:`create_partition` moves them once their partition gets created.
+
+Old months are expired by dropping (or detaching, to archive them) their partitions, which takes constant
+time regardless of how many calls they hold. The hourly and daily rollups are kept up to date as calls come
+in, so they are unaffected; per-caller counts are summarized into :class:`MonthlyCallerRollup` before a month
+goes away.
+"""
+import re
+from collections import namedtuple
+from datetime import datetime
+from typing import List
+
+from django.db import connection, transaction
+from django.utils import timezone
+
+from callblocker.blocker import rollups
+from callblocker.blocker.models import Call
+
+TABLE = Call._meta.db_table
+DEFAULT_PARTITION = f'{TABLE}_default'
+
+_PARTITION_NAME = re.compile(rf'^{TABLE}_p(\d{{4}})_(\d{{2}})$')
+
+#: A monthly partition. `month` is the first instant of the month, in UTC.
+Partition = namedtuple('Partition', ['name', 'month'])
+
+
+def month_of(time: datetime) -> datetime:
+    return time.astimezone(timezone.utc).replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month: datetime, months: int) -> datetime:
+    index = month.year * 12 + month.month - 1 + months
+    return month.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(month: datetime) -> str:
+    return f'{TABLE}_p{month.year:04d}_{month.month:02d}'
+
+
+def partitions() -> List[Partition]:
+    """Lists the monthly partitions currently attached to the :class:`Call` table, oldest first."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            'SELECT child.relname FROM pg_inherits '
+            'JOIN pg_class child ON child.oid = pg_inherits.inhrelid '
+            'WHERE pg_inherits.inhparent = %s::regclass',
+            [TABLE]
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    monthly = []
+    for name in names:
+        match = _PARTITION_NAME.match(name)
+        if match:
+            monthly.append(Partition(name, datetime(int(match.group(1)), int(match.group(2)), 1, tzinfo=timezone.utc)))
+
+    return sorted(monthly, key=lambda partition: partition.month)
+
+
+def create_partition(month: datetime) -> Partition:
+    """Creates the partition for `month`, moving any calls for it out of the default partition."""
+    partition = Partition(partition_name(month), month)
+    bounds = {'start': month, 'end': add_months(month, 1)}
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'CREATE TABLE {partition.name} (LIKE {TABLE} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)')
+        # Postgres won't attach a partition while the default partition holds rows which belong to it.
+        cursor.execute(
+            f'WITH moved AS ('
+            f'  DELETE FROM {DEFAULT_PARTITION} WHERE time >= %(start)s AND time < %(end)s'
+            f'  RETURNING id, time, blocked, caller_id'
+            f') INSERT INTO {partition.name} (id, time, blocked, caller_id) SELECT * FROM moved',
+            bounds
+        )
+        cursor.execute(
+            f'ALTER TABLE {TABLE} ATTACH PARTITION {partition.name} FOR VALUES FROM (%(start)s) TO (%(end)s)',
+            bounds
+        )
+
+    return partition
+
+
+def ensure_partitions(ahead: int) -> List[Partition]:
+    """
+    Creates partitions for the current month and the `ahead` months after it, and for any month which has
+    calls sitting in the default partition.
+
+    :return: the partitions which have been created.
+    """
+    current = month_of(timezone.now())
+    months = {add_months(current, i) for i in range(ahead + 1)}
+
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT date_trunc('month', time AT TIME ZONE 'UTC') FROM {DEFAULT_PARTITION}")
+        months.update(month.replace(tzinfo=timezone.utc) for month, in cursor.fetchall())
+
+    existing = {partition.month for partition in partitions()}
+    return [create_partition(month) for month in sorted(months - existing)]
+
+
+def expire(before: datetime, archive: bool = False) -> List[Partition]:
+    """
+    Drops the partitions for months which end on or before `before`. If `archive` is true, partitions are
+    detached and renamed to blocker_call_archive_pYYYY_MM instead, so they can be dumped and dropped by hand.
+    Archived calls no longer refer to callers through a foreign key, so callers can still be deleted.
+
+    :return: the partitions which have been expired.
+    """
+    expired = [partition for partition in partitions() if add_months(partition.month, 1) <= before]
+    for partition in expired:
+        with transaction.atomic(), connection.cursor() as cursor:
+            rollups.summarize_callers(partition.name, partition.month)
+            if archive:
+                cursor.execute(f'ALTER TABLE {TABLE} DETACH PARTITION {partition.name}')
+                cursor.execute(f'ALTER TABLE {partition.name} RENAME TO {archive_name(partition)}')
+                _drop_foreign_keys(cursor, archive_name(partition))
+            else:
+                cursor.execute(f'DROP TABLE {partition.name}')
+
+    return expired
+
+
+def archive_name(partition: Partition) -> str:
+    return partition.name.replace(f'{TABLE}_p', f'{TABLE}_archive_p')
+
+
+def _drop_foreign_keys(cursor, table: str):
+    # Detached partitions keep their own copies of the foreign keys they had as partitions.
+    cursor.execute("SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'f'", [table])
+    names = [name for name, in cursor.fetchall()]
+    if not names:
+        return
+
+    # Tables referenced by foreign keys can't be altered while checks of (deferred) foreign keys are pending, so
+    # they get run now. Django makes all of its foreign keys deferred, which is what we go back to.
+    cursor.execute('SET CONSTRAINTS ALL IMMEDIATE')
+    for name in names:
+        cursor.execute(f'ALTER TABLE {table} DROP CONSTRAINT {name}')
+    cursor.execute('SET CONSTRAINTS ALL DEFERRED')
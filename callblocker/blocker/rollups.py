@@ -0,0 +1,114 @@
+"""
+Maintenance of the :class:`HourlyCallRollup` and :class:`DailyCallRollup` tables, which count calls per
+time bucket, area code and screening decision. :func:`record` is called for every screened call, so that
+dashboards can be served from a few hundred rollup rows instead of scanning the whole :class:`Call` table.
+:func:`backfill` recomputes rollups from the calls which are still around, and keeps those from before the
+oldest of them (e.g. for expired call partitions).
+
+Buckets are truncated in the server's time zone (settings.TIME_ZONE), which is also what the Django ORM
+uses when truncating dates, so rollups can be further aggregated into weeks or months with
+:class:`django.db.models.functions.Trunc`.
+"""
+from datetime import datetime
+from typing import Optional
+
+from django.conf import settings
+from django.db import connection
+
+from callblocker.blocker.models import Call, Caller, HourlyCallRollup, DailyCallRollup, MonthlyCallerRollup
+
+ROLLUPS = (HourlyCallRollup, DailyCallRollup)
+
+_BUCKET = "date_trunc('{granularity}', {time} AT TIME ZONE %(tz)s) AT TIME ZONE %(tz)s"
+
+_INCREMENT = """
+    INSERT INTO {table} AS rollup (bucket, area_code, blocked, calls)
+    VALUES ({bucket}, %(area_code)s, %(blocked)s, 1)
+    ON CONFLICT (bucket, area_code, blocked) DO UPDATE SET calls = rollup.calls + 1
+"""
+
+_BACKFILL_START = f"""
+    SELECT greatest(
+        {_BUCKET.format(granularity=DailyCallRollup.granularity, time='%(since)s::timestamptz')},
+        {_BUCKET.format(granularity=DailyCallRollup.granularity, time='min(time)')}
+    )
+    FROM {Call._meta.db_table}
+    HAVING count(*) > 0
+"""
+
+_BACKFILL = f"""
+    INSERT INTO {{table}} (bucket, area_code, blocked, calls)
+    SELECT {{bucket}}, caller.area_code, call.blocked, count(*)
+    FROM {Call._meta.db_table} AS call
+    JOIN {Caller._meta.db_table} AS caller ON caller.id = call.caller_id
+    WHERE call.time >= %(start)s
+    GROUP BY 1, 2, 3
+    ON CONFLICT (bucket, area_code, blocked) DO UPDATE SET calls = EXCLUDED.calls
+"""
+
+_SUMMARIZE = f"""
+    INSERT INTO {MonthlyCallerRollup._meta.db_table}
+        (caller_id, month, calls, blocked_calls, first_call, last_call)
+    SELECT caller_id, %(month)s, count(*), count(*) FILTER (WHERE blocked), min(time), max(time)
+    FROM {{table}}
+    GROUP BY caller_id
+    ON CONFLICT (caller_id, month) DO UPDATE SET
+        calls = EXCLUDED.calls,
+        blocked_calls = EXCLUDED.blocked_calls,
+        first_call = EXCLUDED.first_call,
+        last_call = EXCLUDED.last_call
+"""
+
+
+def record(call: Call, area_code: str):
+    """Counts a newly logged call into the rollups. Should run in the same transaction as the call insert."""
+    with connection.cursor() as cursor:
+        for rollup in ROLLUPS:
+            cursor.execute(
+                _INCREMENT.format(
+                    table=rollup._meta.db_table,
+                    bucket=_BUCKET.format(granularity=rollup.granularity, time='%(time)s::timestamptz')
+                ),
+                {'tz': settings.TIME_ZONE, 'time': call.time, 'area_code': area_code, 'blocked': call.blocked}
+            )
+
+
+def backfill(since: Optional[datetime] = None) -> int:
+    """
+    Recomputes the rollups from the day of `since` onwards (or for all of them), replacing the buckets in
+    that range, so that this is safe to run repeatedly. Buckets from before the oldest logged call are
+    left alone, as they can't be recomputed.
+
+    :return: the number of rollup rows written.
+    """
+    written = 0
+    with connection.cursor() as cursor:
+        # Starts at a day boundary, so that we never overwrite a bucket with a partial count.
+        cursor.execute(_BACKFILL_START, {'tz': settings.TIME_ZONE, 'since': since})
+        row = cursor.fetchone()
+        if row is None:
+            return 0
+        start, = row
+
+        for rollup in ROLLUPS:
+            # Buckets whose calls are all gone must go too.
+            rollup.objects.filter(bucket__gte=start).delete()
+            cursor.execute(
+                _BACKFILL.format(
+                    table=rollup._meta.db_table,
+                    bucket=_BUCKET.format(granularity=rollup.granularity, time='call.time')
+                ),
+                {'tz': settings.TIME_ZONE, 'start': start}
+            )
+            written += cursor.rowcount
+
+    return written
+
+
+def summarize_callers(table: str, month: datetime):
+    """
+    Summarizes the calls in `table`, which must hold a month's worth of call log (e.g. a partition of
+    the :class:`Call` table), into :class:`MonthlyCallerRollup` rows for `month`.
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(_SUMMARIZE.format(table=table), {'month': month})
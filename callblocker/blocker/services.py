@@ -1,61 +1,132 @@
 """
 This module contains the service configurations for the various run modes of callblocker. The fundamental distinction
 is between server mode (which runs most/all services) and command mode (which run selected services).
+
+Groups are bootstrapped lazily: the group for the current :data:`~callblocker.blocker.BOOTSTRAP_MODE` gets built
+and started the first time :func:`services` is called, so management commands which never touch services (e.g.
+``migrate`` or ``loaddata``) don't pay for them. Servers call :func:`services` on startup to get the modem going
+before the first request comes in.
 """
 import sys
+from threading import Lock
 from typing import Optional
 
 from django.conf import settings
 
+from callblocker import blocker
 from callblocker.blocker import telcos
 from callblocker.blocker.callmonitor import CallMonitor
+from callblocker.blocker.control import LocalControl
+from callblocker.blocker.livefeed import LiveFeed
 from callblocker.core import modems
+from callblocker.core.eventloops import loop_factory
+from callblocker.core.metrics import Gauge
 from callblocker.core.modem import Modem, PySerialDevice
-from callblocker.core.service import AsyncioEventLoop
-from callblocker.core.servicegroup import ServiceGroupSpec, ServiceGroup
-from callblocker.core.tests.fakeserial import CX930xx_fake, ScriptedModem
+from callblocker.core.profiling import Profiler, ProfileStore
+from callblocker.core.service import AsyncioEventLoop, ServiceState
+from callblocker.core.servicegroup import ServiceEntry, ServiceGroupSpec, ServiceGroup
+from callblocker.core.supervisor import RestartPolicy, Supervisor
 
 #: Server mode services.
 server = ServiceGroupSpec(
-    aio_loop=lambda _: (
-        AsyncioEventLoop()
+    aio_loop=lambda _: _aio_loop(),
+    # Off until started through the services API.
+    profiler=lambda _: _profiler(),
+    modem=ServiceEntry(
+        lambda services: (
+            Modem(
+                modems.get_modem(settings.MODEM_TYPE),
+                PySerialDevice(settings.MODEM_DEVICE, settings.MODEM_BAUD),
+                services.aio_loop,
+                auto_init=True
+            )
+        ),
+        deps=['aio_loop']
+    ),
+    callmonitor=ServiceEntry(
+        lambda services: (
+            CallMonitor(
+                telcos.get_telco(settings.MODEM_TELCO_PROVIDER),
+                services.modem,
+                services.aio_loop,
+                services.profiler
+            )
+        ),
+        deps=['aio_loop', 'modem']
     ),
-    modem=lambda services: (
-        Modem(
-            modems.get_modem(settings.MODEM_TYPE),
-            PySerialDevice(settings.MODEM_DEVICE, settings.MODEM_BAUD),
-            services.aio_loop,
-            auto_init=True
-        )
+    livefeed=ServiceEntry(
+        lambda services: (
+            LiveFeed(
+                services.modem,
+                services.callmonitor,
+                services.aio_loop,
+                settings.LIVE_FEED_BUFFER_SIZE
+            )
+        ),
+        # Only listens to the call monitor, so it needn't wait for it to start.
+        deps=['aio_loop', 'modem']
     ),
-    callmonitor=lambda services: (
-        CallMonitor(
-            telcos.get_telco(settings.MODEM_TELCO_PROVIDER)(),
-            services.modem,
-            services.aio_loop
-        )
+    supervisor=lambda services: (
+        _supervisor(services)
     )
 )
 
 #: Fake server mode.
 fake_server = ServiceGroupSpec(
-    aio_loop=lambda _: (
-        AsyncioEventLoop()
+    aio_loop=lambda _: _aio_loop(),
+    profiler=lambda _: _profiler(),
+    modem=ServiceEntry(
+        lambda services: (
+            _fake_modem(services.aio_loop)
+        ),
+        deps=['aio_loop']
+    ),
+    callmonitor=ServiceEntry(
+        lambda services: (
+            CallMonitor(
+                telcos.get_telco(settings.MODEM_TELCO_PROVIDER),
+                services.modem,
+                services.aio_loop,
+                services.profiler
+            )
+        ),
+        deps=['aio_loop', 'modem']
     ),
-    modem=lambda services: (
-        Modem(
-            CX930xx_fake,
-            ScriptedModem.from_modem_type(CX930xx_fake, services.aio_loop),
-            services.aio_loop,
-            auto_init=True
-        )
+    livefeed=ServiceEntry(
+        lambda services: (
+            LiveFeed(
+                services.modem,
+                services.callmonitor,
+                services.aio_loop,
+                settings.LIVE_FEED_BUFFER_SIZE
+            )
+        ),
+        deps=['aio_loop', 'modem']
     ),
-    callmonitor=lambda services: (
-        CallMonitor(
-            telcos.get_telco(settings.MODEM_TELCO_PROVIDER)(),
-            services.modem,
-            services.aio_loop
-        )
+    supervisor=lambda services: (
+        _supervisor(services)
+    )
+)
+
+#: Daemon mode: server mode services, plus the RPC server through which web processes control them.
+daemon = ServiceGroupSpec(
+    **server.services,
+    rpc=ServiceEntry(
+        lambda services: (
+            LocalControl(services).rpc_server(settings.MODEM_DAEMON_SOCKET, services.aio_loop)
+        ),
+        deps=['aio_loop']
+    )
+)
+
+#: Fake daemon mode.
+fake_daemon = ServiceGroupSpec(
+    **fake_server.services,
+    rpc=ServiceEntry(
+        lambda services: (
+            LocalControl(services).rpc_server(settings.MODEM_DAEMON_SOCKET, services.aio_loop)
+        ),
+        deps=['aio_loop']
     )
 )
 
@@ -64,15 +135,106 @@ command = ServiceGroupSpec()
 
 # Global containing the group that gets bootstrapped.
 _services: Optional[ServiceGroup] = None
+_bootstrap_lock = Lock()
+
+
+def _aio_loop() -> AsyncioEventLoop:
+    _, factory = loop_factory(settings.EVENT_LOOP_BACKEND)
+    return AsyncioEventLoop(
+        settings.EVENT_LOOP_PROBE_INTERVAL, settings.EVENT_LOOP_SLOW_CALLBACK_THRESHOLD, factory
+    )
+
+
+def _profiler() -> Profiler:
+    return Profiler(profile_store())
+
+
+def profile_store() -> ProfileStore:
+    """:return: the store profiles get saved to, which is shared by the modem daemon and web processes."""
+    return ProfileStore(settings.PROFILE_DIR, settings.PROFILE_MAX_PROFILES)
+
+
+def _fake_modem(aio_loop: AsyncioEventLoop) -> Modem:
+    # The fake modem lives with the tests, and is only imported when asked for.
+    from callblocker.core.tests.fakeserial import CX930xx_fake, ScriptedModem
+    return Modem(
+        CX930xx_fake,
+        ScriptedModem.from_modem_type(CX930xx_fake, aio_loop),
+        aio_loop,
+        auto_init=True
+    )
+
+
+def _supervisor(group: ServiceGroup) -> Supervisor:
+    policies = {id: RestartPolicy(**policy) for id, policy in settings.SERVICE_RESTART_POLICIES.items()}
+    return Supervisor(
+        group,
+        policies,
+        policies.pop('default', RestartPolicy()),
+        settings.SUPERVISOR_INTERVAL,
+        settings.SERVICE_START_TIMEOUT
+    )
 
 
 def bootstrap(mode: str):
     global _services
-    _services = getattr(sys.modules[__name__], mode).bootstrap()
+    _services = _spec(mode).bootstrap()
     return _services
 
 
 def services() -> ServiceGroup:
+    """
+    :return: the bootstrapped group. If nothing has been bootstrapped yet, bootstraps and starts the
+             group for the current bootstrap mode.
+    """
+    global _services
     if _services is None:
-        raise Exception('Services have not yet been bootstrapped. Call bootstrap first!')
+        with _bootstrap_lock:
+            if _services is None:
+                group = _spec(blocker.BOOTSTRAP_MODE.value).bootstrap()
+                # Only published once started, so that other threads never see a half-started group.
+                group.start(settings.SERVICE_START_TIMEOUT)
+                _services = group
     return _services
+
+
+def _spec(mode: str) -> ServiceGroupSpec:
+    return getattr(sys.modules[__name__], mode)
+
+
+def _service_states():
+    if _services is None:
+        return
+    for service in _services.services:
+        current = service.status().state
+        for state in ServiceState:
+            yield (service.id, state.name), int(state == current)
+
+
+def _stream_depths():
+    the_modem = getattr(_services, 'modem', None)
+    if the_modem is None:
+        return
+    for stream in list(the_modem.streams):
+        yield (str(stream.id),), len(stream.events)
+
+
+def _loop_lag(measurement: str):
+    def collect():
+        monitor = getattr(getattr(_services, 'aio_loop', None), 'monitor', None)
+        if monitor is None:
+            return
+        yield (), getattr(monitor, measurement)
+
+    return collect
+
+
+# Metrics about the bootstrapped group, computed at scrape time.
+Gauge('callblocker_service_state', 'Whether each service is in a given state.', ['service', 'state'],
+      collect=_service_states)
+Gauge('callblocker_modem_stream_depth', 'Modem events waiting to be consumed, by event stream.', ['stream'],
+      collect=_stream_depths)
+Gauge('callblocker_event_loop_lag_seconds', 'How late the last asyncio event loop lag probe ran.',
+      collect=_loop_lag('lag'))
+Gauge('callblocker_event_loop_max_lag_seconds', 'How late the latest asyncio event loop lag probe ever ran.',
+      collect=_loop_lag('max_lag'))
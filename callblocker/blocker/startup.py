@@ -0,0 +1,68 @@
+"""
+Startup profile of callblocker, as reported by the startupprofile command. Profiles have to be taken in a
+fresh interpreter, so this module doubles as a script which prints the profile as JSON:
+
+    python -m callblocker.blocker.startup [--mode MODE] [--start] [--top N]
+
+Without a mode, the profile covers what every management command pays for: Django setup, importing the
+URLconf, and running the system checks.
+"""
+import argparse
+import json
+import sys
+from importlib import import_module
+from typing import Any, Dict, Optional
+
+from callblocker.core.startup import ImportTimer, Phases
+
+
+def profile(mode: Optional[str] = None, start: bool = False, top: int = 20) -> Dict[str, Any]:
+    phases = Phases()
+    group = None
+    with ImportTimer() as timer:
+        with phases.phase('django setup'):
+            import django
+            django.setup()
+
+        with phases.phase('urlconf'):
+            from django.conf import settings
+            import_module(settings.ROOT_URLCONF)
+
+        with phases.phase('system checks'):
+            from django.core.checks import run_checks
+            run_checks()
+
+        if mode is not None:
+            with phases.phase('bootstrap'):
+                from callblocker.blocker import services
+                group = services.bootstrap(mode)
+
+            if start:
+                with phases.phase('start'):
+                    group.start(settings.SERVICE_START_TIMEOUT)
+                group.shutdown(settings.SERVICE_STOP_TIMEOUT)
+
+    return {
+        'mode': mode,
+        'phases': phases.timings,
+        'services': [
+            dict(entry._asdict(), state=entry.state.name) for entry in (group.timeline if start else [])
+        ],
+        'modules': len(timer.imports),
+        'imports': [timing._asdict() for timing in timer.slowest(top)]
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Prints a startup profile of callblocker as JSON.')
+    parser.add_argument('--mode', help='Also bootstraps the services for this mode.')
+    parser.add_argument('--start', action='store_true', help='Also starts the bootstrapped services.')
+    parser.add_argument('--top', type=int, default=20, help='How many of the slowest imports to report.')
+    args = parser.parse_args(argv)
+
+    json.dump(profile(args.mode, args.start, args.top), sys.stdout)
+    sys.stdout.write('\n')
+
+
+if __name__ == '__main__':
+    main()
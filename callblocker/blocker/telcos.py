@@ -1,67 +1,123 @@
+"""
+Telco providers, which split the caller ID (CID) strings their modems send into area codes and numbers.
+Providers are described by rules rather than code (see :data:`RULES`), so that operators can be added, or
+their rules fixed, through the TELCO_RULES setting. Rules get compiled into parsers once, the first time
+their provider is asked for, and parsers cache the numbers they parse most often.
+
+A rule set is a dict with:
+
+* ``area_code_length``: how many digits area codes have. Area codes are always present;
+* ``numbers``: how to tell how long the number is, as a list of ``{'length': ..., 'prefix': ...}`` rules.
+  The number is made of the last `length` digits of the CID string, for the first rule whose number starts
+  with `prefix` (or any rule without one), and which leaves enough digits for the area code;
+* ``operator_code_length``: how many digits the operator code, which may come before the area code and
+  gets thrown away, is expected to have at most. Longer ones get logged, so that rules can be improved.
+"""
 import logging
+from functools import lru_cache
+from typing import Any, Callable, Dict
 
-import sys
+from django.conf import settings
 
-from callblocker.blocker.callmonitor import TelcoProvider, CIDParseError
-from callblocker.blocker.models import Caller, Source
+from callblocker.blocker.callmonitor import TelcoProvider, CIDParseError, CID
 
 logger = logging.getLogger(__name__)
 
+#: Rule sets of the built-in providers, by name.
+RULES = {
+    # Vivo CID strings are of the form:
+    #
+    #    [Operator Code]*[Area Code][8-or-9-digit Phone Number]
+    #
+    # The [Operator Code] is not always present, and I wouldn't know if their length is fixed or not. The
+    # [Area Code] of length 2 seems to be always present, as does the [Phone Number], but it is of variable
+    # length: 9 digits for numbers starting with "9" (mobile numbers), and 8 digits for other numbers.
+    'Vivo': {
+        'area_code_length': 2,
+        'numbers': [{'length': 9, 'prefix': '9'}, {'length': 8}],
+        'operator_code_length': 2
+    }
+}
 
-class Vivo(TelcoProvider):
-    """
-      A provider which works on `Vivo <https://www.vivo.com.br>` CID strings.
 
-      Vivo CID strings are of the form:
+class RuleBasedProvider(TelcoProvider):
+    """A :class:`TelcoProvider` which follows a rule set (see the module documentation)."""
 
-         [Operator Code]*[Area Code][8-or-9-digit Phone Number]
+    def __init__(self, name: str, rules: Dict[str, Any], cache_size: int = 1024):
+        self.name = name
+        self._parse = lru_cache(maxsize=cache_size)(compile_rules(name, rules))
 
-      The [Operator Code] is not always present, and I wouldn't know if their
-      length is fixed or not. The [Area Code] of length 2 seems to be always present,
-      as does the [Phone Number], but it is of variable length: 9 digits for
-      numbers starting with "9" (mobile numbers), and 8 digits for other numbers.
+    def split_cid(self, string: str) -> CID:
+        return self._parse(string)
 
-      We therefore assume that:
+    def parse_cid(self, string: str) -> CID:
+        return self._parse(string)
 
-        * the last 8 digits always belong to the phone number;
-        * if the 9-th digit from the last is a "9" we will deduce this is a cellphone number, except
-          when the CID string has 10 characters. This would make the area code; which
-          has 2 digits and is always present, too short.
 
-       everything that is left after extracting the phone number and the area code
-       suffixes is considered to be operator code and therefore thrown away (not useful
-       for identifying the caller).
+class Vivo(RuleBasedProvider):
+    """A provider which works on `Vivo <https://www.vivo.com.br>` CID strings."""
 
-    """
+    def __init__(self, cache_size: int = 1024):
+        super().__init__('Vivo', RULES['Vivo'], cache_size)
 
-    MOBILE_BOUNDARY = -9
-    LANDLINE_BOUNDARY = -8
-    AREA_CODE_LENGTH = 2
-    OPERATOR_CODE_LENGTH = 2
 
-    def parse_cid(self, cid_string: str) -> Caller:
-        if len(cid_string) < 10:
-            raise CIDParseError('CID string too short for Vivo', cid_string)
+def compile_rules(name: str, rules: Dict[str, Any]) -> Callable[[str], CID]:
+    """
+    :return: a function which splits CID strings into :class:`CID` tuples according to `rules`, and raises
+             :class:`CIDParseError` for those it can't split.
+    :raise ValueError: if the rules are malformed.
+    """
+    unknown = set(rules) - {'area_code_length', 'numbers', 'operator_code_length'}
+    if unknown:
+        raise ValueError(f'Unknown {name} rules {sorted(unknown)}.')
+    try:
+        area_code_length = int(rules['area_code_length'])
+        operator_code_length = int(rules.get('operator_code_length', 0))
+        numbers = [(int(number['length']), number.get('prefix', '')) for number in rules['numbers']]
+    except (KeyError, TypeError, ValueError) as ex:
+        raise ValueError(f'Malformed {name} rules: {ex!r}.')
+    if not numbers:
+        raise ValueError(f'{name} rules have no number rules.')
+
+    # Lengths get worked out up front: the shortest CID string any rule fits, and for every rule, the shortest
+    # string it fits and the longest one without too long an operator code.
+    shortest = area_code_length + min(length for length, _ in numbers)
+    numbers = [
+        (length, prefix, length + area_code_length, length + area_code_length + operator_code_length)
+        for length, prefix in numbers
+    ]
+
+    def parse(string: str) -> CID:
+        if len(string) < shortest:
+            raise CIDParseError(f'CID string too short for {name}', string)
+
+        for length, prefix, minimum, longest in numbers:
+            if len(string) >= minimum and string.startswith(prefix, len(string) - length):
+                break
+        else:
+            raise CIDParseError(f'No {name} number rule matches CID string', string)
 
-        boundary = self.MOBILE_BOUNDARY if cid_string[-9] == '9' else self.LANDLINE_BOUNDARY
+        # Report the weirdness so we can improve things.
+        if len(string) > longest:
+            logger.warning('Operator code too long in CID string %s', string)
 
-        rest, number = self._isplit(cid_string, boundary)
-        rest, area_code = self._isplit(rest, -self.AREA_CODE_LENGTH)
+        return CID(string[-minimum:-length], string[-length:])
 
-        # Report the weirdness so we can improve things.
-        if len(rest) > self.OPERATOR_CODE_LENGTH:
-            logger.warning('Operator code too long in CID string %s' % cid_string)
+    return parse
 
-        return Caller(
-            number=number,
-            area_code=area_code,
-            source=Source.predef_source(Source.CID),
-            block=False
-        )
 
-    def _isplit(self, string: str, index: int):
-        return string[:index], string[index:]
+def get_telco(telco: str) -> TelcoProvider:
+    """
+    :return: the provider named `telco`, out of the built-in ones and those in settings.TELCO_RULES.
+             Providers get compiled once, and are shared.
+    :raise LookupError: if there is no such provider.
+    """
+    return _provider(telco)
 
 
-def get_telco(telco: str):
-    return getattr(sys.modules[__name__], telco)
+@lru_cache(maxsize=None)
+def _provider(telco: str) -> TelcoProvider:
+    rules = {**RULES, **settings.TELCO_RULES}
+    if telco not in rules:
+        raise LookupError(f'Unknown telco provider {telco}. Known providers are: {", ".join(sorted(rules))}.')
+    return RuleBasedProvider(telco, rules[telco], settings.TELCO_CID_CACHE_SIZE)
@@ -80,7 +80,8 @@ def generate_caller(name):
 
     instance = {
         'model': 'blocker.Caller',
-        'pk': f'{area_code}{full_number}',
+        # Callers are keyed by their number, in E.164 form (see blocker.models.number_key).
+        'pk': int(f'55{area_code}{full_number}'),
         'fields': {
             'area_code': area_code,
             'number': full_number,
@@ -2,8 +2,10 @@ import json
 
 import pytest
 from rest_framework.status import HTTP_201_CREATED, HTTP_400_BAD_REQUEST
+from rest_framework.test import APIClient
 
-from callblocker.blocker.models import Caller, Source
+from callblocker.blocker.models import Caller, Source, number_key, key_number
+from callblocker.core.tests.utils import query_budget
 
 
 @pytest.mark.django_db
@@ -115,6 +117,28 @@ def test_post_disallows_duplicate(api_client):
     assert response.json()['full_number'][0] == 'This field must be unique.'
 
 
+@pytest.mark.django_db
+def test_post_keys_callers_by_number(api_client):
+    response = api_client.post('/api/callers/', data=json.dumps({
+        'area_code': '01',
+        'number': '23456789'
+    }), content_type='application/json')
+    assert response.status_code == HTTP_201_CREATED
+
+    # Leading zeroes survive the trip to a key and back.
+    caller = Caller.objects.get(full_number='0123456789')
+    assert caller.pk == number_key('0123456789') == 550123456789
+    assert key_number(caller.pk) == '0123456789'
+
+    for number in ['2345-6789', '234567890123456789']:
+        response = api_client.post('/api/callers/', data=json.dumps({
+            'area_code': '11',
+            'number': number
+        }), content_type='application/json')
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert 'full_number' in response.json()
+
+
 @pytest.mark.django_db
 def test_nulls_come_last(api_client):
     # We can't create those via API as the API does not allow setting last_call.
@@ -148,3 +172,66 @@ def test_nulls_come_last(api_client):
 
     assert callers[0]['full_number'] == caller_b.full_number
     assert callers[-1]['full_number'] == caller_a.full_number
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('query', ['ordering=last_call', 'ordering=description', 'text=Mar&ordering=text_score'])
+def test_list_matches_detail_representation(api_client, query):
+    callers = api_client.get(f'/api/callers/?limit=1000&{query}').json()['results']
+    assert len(callers) > 0
+
+    for caller in callers:
+        detail = api_client.get(f'/api/callers/{caller["area_code"]}-{caller["number"]}/').json()
+        # Detail views do not carry a search score.
+        detail['text_score'] = caller['text_score']
+        assert list(caller.keys()) == list(detail.keys())
+        assert caller == detail
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('limit', [1, 10, 100])
+def test_listing_query_budget(api_client, limit):
+    # Counting callers, and fetching the page.
+    with query_budget(3):
+        response = api_client.get(f'/api/callers/?limit={limit}&ordering=calls')
+    assert len(response.json()['results']) == min(limit, Caller.objects.count())
+
+    with query_budget(3):
+        api_client.get(f'/api/callers/?limit={limit}&text=a&ordering=text_score')
+
+
+@pytest.mark.django_db
+def test_bulk_patch_query_budget(api_client):
+    callers = list(Caller.objects.order_by('full_number')[:20])
+    source = api_client.get('/api/callers/%s/' % callers[0].full_number).json()['source']
+
+    def patch(callers, description):
+        return api_client.patch('/api/callers/', json.dumps([{
+            'full_number': caller.full_number,
+            'description': description,
+            'source': source
+        } for caller in callers]), content_type='application/json')
+
+    # Looking the callers and their source up, and updating them.
+    with query_budget(3) as few:
+        assert patch(callers[:2], 'few').status_code == 200
+    with query_budget(few.queries):
+        assert patch(callers, 'many').status_code == 200
+
+    assert Caller.objects.filter(description='many').count() == 20
+    # Callers which don't exist fail the whole update.
+    response = api_client.patch('/api/callers/', json.dumps([
+        {'full_number': callers[0].full_number, 'block': not callers[0].block},
+        {'full_number': '000', 'block': True}
+    ]), content_type='application/json')
+    assert response.status_code == HTTP_400_BAD_REQUEST
+    assert Caller.objects.get(full_number=callers[0].full_number).block == callers[0].block
+
+
+@pytest.mark.django_db
+def test_reports_queries_in_debug_mode(settings):
+    settings.DEBUG = True
+    # Middleware gets set up with the first request, so we need a fresh client.
+    response = APIClient().get('/api/callers/?limit=5')
+    assert int(response['X-DB-Queries']) == 2
+    assert float(response['X-DB-Time']) > 0
@@ -0,0 +1,111 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from callblocker.blocker.blocklist import import_blocklist, ImportResult
+from callblocker.blocker.models import Caller, Source
+from callblocker.blocker.telcos import Vivo
+
+BLOCKLIST = """number,description,block
+(11) 9962-7477,Telemarketing,true
+21 1131457681,,true
+1131457681,Repeated,true
+123,Too short,true
+{existing},,true
+{existing_blocked},,true
+"""
+
+
+def blocklist():
+    existing = Caller.objects.filter(block=False).exclude(description='').first()
+    existing_blocked = Caller.objects.filter(block=True).first()
+    return existing, existing_blocked, BLOCKLIST.format(
+        existing=existing.full_number,
+        existing_blocked=existing_blocked.full_number
+    )
+
+
+@pytest.mark.django_db
+def test_imports_blocklist():
+    existing, existing_blocked, contents = blocklist()
+
+    result = import_blocklist(io.StringIO(contents), Vivo(), source=Source.CID)
+
+    # Two new numbers, one existing caller which gets blocked, and the rest skipped: the repeated
+    # number, the one that won't parse, and the caller that was already blocked.
+    assert result == ImportResult(inserted=2, updated=1, skipped=3)
+
+    telemarketer = Caller.objects.get(full_number='1199627477')
+    assert telemarketer.area_code == '11'
+    assert telemarketer.number == '99627477'
+    assert telemarketer.description == 'Telemarketing'
+    assert telemarketer.block
+    assert telemarketer.source_id == Source.CID
+
+    assert Caller.objects.get(full_number='1131457681').block
+
+    # Empty descriptions do not overwrite existing ones.
+    updated = Caller.objects.get(full_number=existing.full_number)
+    assert updated.block
+    assert updated.description == existing.description
+
+
+@pytest.mark.django_db
+def test_last_repeated_row_wins():
+    contents = 'number,description,block\n' + ''.join(
+        f'1131457681,Take {take},{block}\n' for take, block in enumerate(['true', 'false', 'true', 'false'] * 50)
+    )
+
+    result = import_blocklist(io.StringIO(contents), Vivo())
+
+    assert result == ImportResult(inserted=1, updated=0, skipped=199)
+    caller = Caller.objects.get(full_number='1131457681')
+    assert (caller.description, caller.block) == ('Take 199', False)
+
+
+@pytest.mark.django_db
+def test_import_endpoint(api_client):
+    _, _, contents = blocklist()
+    upload = io.BytesIO(contents.encode('utf-8'))
+    upload.name = 'blocklist.csv'
+
+    response = api_client.post('/api/import/callers/', {'file': upload}, format='multipart')
+
+    assert response.status_code == 200
+    assert response.json() == {'inserted': 2, 'updated': 1, 'skipped': 3}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('source', ['spam', '9999'])
+def test_import_endpoint_rejects_bad_sources(api_client, source):
+    _, _, contents = blocklist()
+    upload = io.BytesIO(contents.encode('utf-8'))
+    upload.name = 'blocklist.csv'
+
+    response = api_client.post(f'/api/import/callers/?source={source}', {'file': upload}, format='multipart')
+
+    assert response.status_code == 400
+    assert not Caller.objects.filter(full_number='1199627477').exists()
+
+
+@pytest.mark.django_db
+def test_import_command(tmpdir):
+    _, _, contents = blocklist()
+    path = tmpdir.join('blocklist.csv')
+    path.write(contents)
+
+    out = io.StringIO()
+    call_command('importblocklist', str(path), stdout=out)
+
+    assert out.getvalue().strip() == '2 inserted, 1 updated, 3 skipped.'
+    assert Caller.objects.get(full_number='1199627477').source_id == Source.USER
+
+
+@pytest.mark.django_db
+def test_rejects_blocklist_without_number_column(api_client):
+    upload = io.BytesIO(b'phone\n1199627477\n')
+    upload.name = 'blocklist.csv'
+
+    response = api_client.post('/api/import/callers/', {'file': upload}, format='multipart')
+    assert response.status_code == 400
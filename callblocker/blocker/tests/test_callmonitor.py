@@ -4,10 +4,11 @@ import textwrap
 import pytest
 from django.utils import timezone
 
-from callblocker.blocker.callmonitor import CallMonitor
+from callblocker.blocker.callmonitor import CallMonitor, CALLS_SCREENED, CALL_DB_TIME
 from callblocker.blocker.models import Caller, Call, Source
 from callblocker.blocker.telcos import Vivo
 from callblocker.core.modem import Modem
+from callblocker.core.profiling import Profiler, ProfileStore
 from callblocker.core.service import ServiceState
 from callblocker.core.tests.fakeserial import CX930xx_fake
 from callblocker.core.tests.utils import await_predicate
@@ -40,6 +41,9 @@ def test_register_calls(fake_serial, aio_loop):
     modem = Modem(CX930xx_fake, fake_serial, aio_loop)
     monitor = CallMonitor(Vivo(), modem, aio_loop)
 
+    allowed = CALLS_SCREENED.labels('allowed').value
+    timed = CALL_DB_TIME.labels().count
+
     modem.sync_start()
     monitor.sync_start()
 
@@ -62,6 +66,9 @@ def test_register_calls(fake_serial, aio_loop):
     assert [event.caller.number for event in events] == ['992223451', '992223451', '992223452']
     assert not any(event.blocked for event in events)
 
+    assert CALLS_SCREENED.labels('allowed').value == allowed + 3
+    assert CALL_DB_TIME.labels().count == timed + 3
+
 
 @pytest.mark.django_db(transaction=True)
 def test_blocks_calls(fake_serial, aio_loop):
@@ -111,3 +118,30 @@ def test_blocks_calls(fake_serial, aio_loop):
     )
 
     assert event.blocked
+
+
+@pytest.mark.django_db
+def test_profiles_calls(fake_serial, aio_loop, tmp_path):
+    fake_serial.load_script(textwrap.dedent(
+        """
+        RING\n
+        \n
+        NMBR = 2111992223453\n
+        """
+    ), step=0)
+
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    profiler = Profiler(store)
+    profiler.sync_start()
+    modem = Modem(CX930xx_fake, fake_serial, aio_loop)
+    monitor = CallMonitor(Vivo(), modem, aio_loop, profiler)
+
+    modem.sync_start()
+    monitor.sync_start()
+    fake_serial.run_scripted_actions()
+
+    await_predicate(lambda: monitor.status().state == ServiceState.ERRORED, 5)
+
+    # Only calls get profiled.
+    assert [(profile.kind, profile.label) for profile in store.list()] == [('event', 'CALL_ID')]
+    profiler.sync_stop()
@@ -0,0 +1,71 @@
+import io
+import json
+
+import pytest
+from django.core.management import call_command
+
+from callblocker.blocker import callstorm
+from callblocker.blocker.models import Call, Caller, Source
+
+
+@pytest.fixture
+def sources(transactional_db):
+    # Calls get written from the event loop's thread, so storms need a transactional database. Those get flushed
+    # after every test, sources included.
+    call_command('loaddata', 'initial.yaml')
+
+
+def test_storms_call_monitor(sources):
+    report = callstorm.CallStorm(3, rate=20, duration=1, blocked_fraction=0.5, callers=20, seed=1).run()
+
+    assert report['offered'] > 0
+    assert report['drained']
+    assert report['failed_lines'] == []
+    assert report['unscreened'] == 0
+    assert report['screened'] == report['offered'] - report['turned_away']
+    assert 0 < report['blocked'] < report['screened']
+    assert set(report['latency']) == {'p50_ms', 'p90_ms', 'p99_ms', 'max_ms'}
+    assert report['latency']['p50_ms'] <= report['latency']['max_ms']
+    assert report['db_ms_per_call'] > 0
+
+    # Calls got screened against, and logged to, the database.
+    calls = Call.objects.filter(caller__full_number__startswith=callstorm.PREFIX)
+    assert calls.count() == report['screened']
+    assert calls.filter(blocked=True).count() == report['blocked']
+    assert not calls.filter(blocked=True, caller__block=False).exists()
+
+
+def test_bursts(sources):
+    report = callstorm.CallStorm(
+        2, rate=20, duration=1, arrival=callstorm.BURSTY, burst_size=5, blocked_fraction=0, seed=2
+    ).run()
+
+    assert report['offered'] > 0
+    assert report['offered'] % 5 == 0
+    assert report['unscreened'] == 0
+    assert report['blocked'] == 0
+    assert not Caller.objects.filter(full_number__startswith=callstorm.PREFIX, block=True).exists()
+
+
+def test_leaves_existing_callers_alone(sources):
+    existing = [
+        Caller.objects.create(area_code=callstorm.AREA_CODE, number=f'7{i:07d}', block=block, source_id=Source.USER)
+        for i, block in [(0, True), (2, False)]
+    ]
+
+    report = callstorm.CallStorm(2, rate=20, duration=0.5, blocked_fraction=0.5, callers=4, seed=3).run()
+    assert report['screened'] > 0
+
+    for caller in existing:
+        assert Caller.objects.get(pk=caller.pk).block == caller.block
+        assert not Call.objects.filter(caller=caller).exists()
+
+
+def test_callstorm_command(sources):
+    out = io.StringIO()
+    call_command('callstorm', '--lines', '2', '--rate', '5', '--duration', '0.5', '--json', '--current-database',
+                 stdout=out)
+    report = json.loads(out.getvalue())
+    assert report['lines'] == 2
+    assert report['drained']
+    assert Call.objects.count() == report['screened']
@@ -0,0 +1,153 @@
+import json
+import logging
+import os
+import time
+from threading import Timer
+
+import pytest
+
+from callblocker.blocker.control import LocalControl, RemoteControl
+from callblocker.blocker.livefeed import FeedEvent
+from callblocker.blocker.tests.test_livefeed import FakeFeed
+from callblocker.blocker.tests.test_service_api import FlippinService
+from callblocker.core.broadcast import Broadcaster
+from callblocker.core.rpc import RPCClient, RPCError, RPCServer
+from callblocker.core.servicegroup import ServiceGroupSpec
+from callblocker.core.service import ServiceState
+from callblocker.core.tests.test_service import BuggyThreadedService
+
+
+FLIPPIN = ServiceGroupSpec(fp1=lambda _: FlippinService('FlippingService 1'))
+
+
+@pytest.fixture
+def daemon(request, aio_loop, tmp_path, settings):
+    """The group of services from the test's :class:`ServiceGroupSpec` parameter, served over RPC."""
+    group = request.param.bootstrap()
+    settings.MODEM_DAEMON_SOCKET = str(tmp_path / 'daemon.sock')
+    server = LocalControl(group).rpc_server(settings.MODEM_DAEMON_SOCKET, aio_loop)
+    server.sync_start(10)
+    yield group
+    server.sync_stop(10)
+
+
+@pytest.mark.parametrize('daemon', [FLIPPIN], indirect=True)
+def test_controls_services_remotely(daemon, api_client):
+    group = daemon
+    group.start()
+
+    summary = api_client.get('/api/services/').json()
+    assert [(service['id'], service['status']['state']) for service in summary] == [('fp1', 'READY')]
+
+    result = api_client.patch(
+        '/api/services/fp1/',
+        data=json.dumps({'status': {'state': 'TERMINATED'}}),
+        content_type='application/json'
+    )
+    assert result.status_code == 202
+    assert group.fp1.status().state == ServiceState.TERMINATED
+    assert api_client.get('/api/services/fp1/').json()['status']['state'] == 'TERMINATED'
+
+    assert api_client.get('/api/services/fp2/').status_code == 404
+    assert api_client.get('/api/live/').status_code == 404
+
+    exposition = api_client.get('/api/metrics/').content.decode('utf-8')
+    assert exposition.count('# TYPE callblocker_service_state gauge') == 1
+    # Both the daemon's metrics and the web process's own.
+    assert 'process="daemon"} ' in exposition
+    assert f'process="web-{os.getpid()}"}} ' in exposition
+
+
+@pytest.mark.parametrize('daemon', [FLIPPIN], indirect=True)
+def test_reads_log_remotely(daemon, api_client, settings):
+    logger = logging.getLogger('callblocker.test.remote')
+    logger.warning('first entry')
+
+    first = api_client.get('/api/log/?after=-1&logger=callblocker.test.remote').json()
+    assert [entry['message'] for entry in first['entries']] == api_client.get(
+        '/api/log/?logger=callblocker.test.remote'
+    ).json()
+    assert 'first entry' in first['entries'][-1]['message']
+
+    # Long polls outlast the usual RPC timeout.
+    settings.MODEM_DAEMON_TIMEOUT = 0.2
+    Timer(0.5, lambda: logger.warning('second entry')).start()
+    second = api_client.get(f'/api/log/?after={first["last"]}&wait=5&logger=callblocker.test.remote').json()
+    assert [entry['message'] for entry in second['entries']][-1].endswith('second entry')
+
+
+@pytest.mark.parametrize('daemon', [FLIPPIN], indirect=True)
+def test_raises_remote_errors(daemon, settings):
+    control = RemoteControl(settings.MODEM_DAEMON_SOCKET, timeout=5)
+
+    with pytest.raises(LookupError):
+        control.modem_command('ATZ')
+
+    with pytest.raises(LookupError):
+        control.client.call('no_such_method')
+
+
+@pytest.mark.parametrize('daemon', [ServiceGroupSpec(livefeed=lambda _: FakeFeed())], indirect=True)
+def test_streams_live_feed_remotely(daemon, api_client, settings):
+    settings.LIVE_FEED_HEARTBEAT = 0.1
+    group = daemon
+
+    response = api_client.get('/api/live/')
+    frames = iter(response.streaming_content)
+    try:
+        assert next(frames) == b': heartbeat\n\n'
+
+        group.livefeed.broadcaster.publish(FeedEvent('call', {'id': 1}))
+        frame = next(frame for frame in frames if frame != b': heartbeat\n\n')
+        assert frame == b'event: call\ndata: {"id": 1}\n\n'
+    finally:
+        response.close()
+
+
+@pytest.mark.parametrize('daemon', [ServiceGroupSpec(buggy=lambda _: BuggyThreadedService())], indirect=True)
+def test_streams_service_transitions_remotely(daemon, api_client, settings):
+    settings.LIVE_FEED_HEARTBEAT = 0.1
+    group = daemon
+
+    response = api_client.get('/api/services/events/')
+    frames = iter(response.streaming_content)
+    try:
+        assert next(frames) == b': heartbeat\n\n'
+
+        group.buggy.sync_start(10)
+        frame = next(frame for frame in frames if frame != b': heartbeat\n\n')
+        assert frame.startswith(b'event: transition\ndata: {"service": "buggy", ')
+        assert b'"previous": "INITIAL", "state": "STARTING"' in frame
+    finally:
+        response.close()
+        group.buggy.sync_stop(10)
+
+
+def test_streams_do_not_starve_method_calls(aio_loop, tmp_path):
+    broadcaster = Broadcaster(buffer_size=2)
+    server = RPCServer(
+        str(tmp_path / 'rpc.sock'),
+        methods={'ping': lambda: 'pong'},
+        streams={'subscribe': broadcaster.subscribe},
+        aio_loop_service=aio_loop,
+        max_streams=2
+    )
+    server.sync_start(10)
+    client = RPCClient(server.path, timeout=5)
+    try:
+        with client.stream('subscribe', heartbeat=0.1), client.stream('subscribe', heartbeat=0.1):
+            assert client.call('ping') == 'pong'
+            with pytest.raises(RPCError):
+                client.stream('subscribe')
+
+        # Closed streams make room for new ones, once the server notices.
+        for _ in range(50):
+            try:
+                with client.stream('subscribe', heartbeat=0.1):
+                    break
+            except RPCError:
+                time.sleep(0.1)
+        else:
+            pytest.fail('Closed streams were never released.')
+    finally:
+        server.sync_stop(10)
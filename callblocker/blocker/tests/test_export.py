@@ -0,0 +1,56 @@
+import csv
+import io
+import json
+
+import pytest
+
+from callblocker.blocker.models import Caller, Call
+
+
+def content(response):
+    return b''.join(response.streaming_content).decode('utf-8')
+
+
+@pytest.mark.django_db
+def test_exports_callers_as_csv(api_client, settings):
+    # Small chunks, so that we go through several batches.
+    settings.EXPORT_CHUNK_SIZE = 7
+
+    response = api_client.get('/api/export/callers/')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'text/csv'
+    assert response['Content-Disposition'] == 'attachment; filename="callers.csv"'
+
+    rows = list(csv.DictReader(io.StringIO(content(response))))
+    assert len(rows) == Caller.objects.count()
+
+    caller = Caller.objects.get(full_number=rows[0]['full_number'])
+    assert rows[0]['description'] == caller.description
+    assert rows[0]['source'] == caller.source.name
+    assert rows[0]['date_inserted'] == caller.date_inserted.isoformat()
+
+
+@pytest.mark.django_db
+def test_exports_calls_as_ndjson(api_client, settings):
+    settings.EXPORT_CHUNK_SIZE = 7
+
+    response = api_client.get('/api/export/calls/?format=ndjson')
+    assert response.status_code == 200
+    assert response['Content-Type'] == 'application/x-ndjson'
+
+    rows = [json.loads(line) for line in content(response).splitlines()]
+    assert len(rows) == Call.objects.count()
+    assert [row['id'] for row in rows] == sorted(row['id'] for row in rows)
+
+    call = Call.objects.get(id=rows[-1]['id'])
+    assert rows[-1] == {
+        'id': call.id,
+        'caller': call.caller.full_number,
+        'time': call.time.isoformat(),
+        'blocked': call.blocked
+    }
+
+
+@pytest.mark.django_db
+def test_rejects_unknown_formats(api_client):
+    assert api_client.get('/api/export/calls/?format=xml').status_code == 400
@@ -0,0 +1,76 @@
+import io
+import random
+from datetime import datetime, timezone
+
+import pytest
+from django.core.management import call_command
+from django.db.models import Count, Max
+
+from callblocker.blocker import gendata
+from callblocker.blocker.models import Call, Caller, DailyCallRollup
+from callblocker.blocker.telcos import Vivo
+
+END = datetime(2020, 3, 1, tzinfo=timezone.utc)
+
+
+def test_generates_reproducible_callers():
+    first, second = (gendata.synthetic_callers(random.Random(7), 500, 0.2, 86400) for _ in range(2))
+    assert first == second
+
+    numbers = {caller.area_code + caller.number for caller in first}
+    assert len(numbers) == 500
+    # Numbers are stored the way the call monitor would store them.
+    assert all(Vivo().split_cid(caller.area_code + caller.number) == (caller.area_code, caller.number)
+               for caller in first)
+    assert 50 < len([caller for caller in first if caller.block]) < 150
+
+
+@pytest.mark.django_db
+def test_generates_data():
+    result = gendata.generate(200, 3000, 0.25, END, days=30, seed=3, chunk_size=500)
+    assert result == gendata.GenerationResult(callers=200, calls=3000)
+
+    callers = Caller.objects.filter(date_inserted__gte=datetime(2020, 1, 1, tzinfo=timezone.utc), date_inserted__lt=END)
+    assert callers.count() == 200
+
+    calls = Call.objects.filter(caller__in=callers)
+    assert calls.count() == 3000
+    assert all(END.replace(month=1, day=31) <= call.time < END for call in calls)
+    # Calls get the decision of their caller.
+    assert not calls.exclude(blocked=True).filter(caller__block=True).exists()
+
+    # Some callers call a lot more than others.
+    counts = sorted(callers.annotate(calls=Count('call')).values_list('calls', flat=True))
+    assert counts[-1] > 10 * max(counts[len(counts) // 2], 1)
+
+    # last_call matches the call log.
+    for caller in callers.annotate(latest=Max('call__time')).filter(latest__isnull=False)[:20]:
+        assert caller.last_call == caller.latest
+        assert caller.date_inserted <= caller.latest
+
+    assert sum(DailyCallRollup.objects.filter(bucket__gte=END.replace(month=1)).values_list('calls', flat=True)) \
+        >= 3000
+
+
+@pytest.mark.django_db
+def test_gendata_command():
+    out = io.StringIO()
+    call_command('gendata', '--callers', '50', '--calls', '100', '--end', '2020-03-01', stdout=out)
+    assert out.getvalue().startswith('50 callers and 100 calls generated in ')
+
+    callers = Caller.objects.filter(call__time__gte=END.replace(year=2019), call__time__lt=END).distinct()
+    assert callers.count() > 0
+    callers.update(block=True, last_call=END.replace(year=2019))
+    last_call = Call.objects.aggregate(last=Max('id'))['last']
+
+    # Numbers which are already in the phonebook are left alone.
+    out = io.StringIO()
+    call_command('gendata', '--callers', '50', '--calls', '100', '--end', '2020-03-01', stdout=out)
+    assert out.getvalue().startswith('0 callers and 100 calls generated in ')
+
+    # ...but their calls get their decision, and move their last call up.
+    new_calls = Call.objects.filter(id__gt=last_call)
+    assert new_calls.count() == 100
+    assert not new_calls.filter(caller__block=True, blocked=False).exists()
+    for caller in Caller.objects.filter(call__in=new_calls).distinct().annotate(latest=Max('call__time')):
+        assert caller.last_call == caller.latest
@@ -0,0 +1,96 @@
+import textwrap
+
+import pytest
+
+from callblocker.blocker import services
+from callblocker.blocker.callmonitor import CallMonitor
+from callblocker.blocker.livefeed import LiveFeed, FeedEvent
+from callblocker.blocker.telcos import Vivo
+from callblocker.blocker.tests.test_service_api import bootstrap_spec
+from callblocker.core.broadcast import Broadcaster
+from callblocker.core.modem import Modem
+from callblocker.core.service import ServiceState, ServiceStatus
+from callblocker.core.servicegroup import ServiceGroupSpec
+from callblocker.core.tests.fakeserial import CX930xx_fake
+
+
+@pytest.mark.django_db
+def test_publishes_modem_events_and_decisions(fake_serial, aio_loop):
+    fake_serial.load_script(textwrap.dedent(
+        """
+        RING
+        NMBR = 2111993456780
+        """
+    ))
+
+    modem = Modem(CX930xx_fake, fake_serial, aio_loop)
+    monitor = CallMonitor(Vivo(), modem, aio_loop)
+    feed = LiveFeed(modem, monitor, aio_loop)
+
+    modem.sync_start()
+    monitor.sync_start()
+    feed.sync_start()
+
+    with feed.subscribe() as subscription:
+        fake_serial.run_scripted_actions()
+
+        # Modem events and decisions are published independently, so they may come in any order.
+        events = []
+        while len([event for event in events if event.type != 'modem' or event.data['contents']]) < 2:
+            event = subscription.get(timeout=10)
+            assert event is not None, 'Timed out waiting for events.'
+            events.append(event)
+
+    assert FeedEvent('modem', {'event_type': 'RING', 'contents': None}) in events
+    assert FeedEvent('modem', {'event_type': 'CALL_ID', 'contents': '2111993456780'}) in events
+
+    call = next(event for event in events if event.type == 'call').data
+    assert call['full_number'] == '11993456780'
+    assert call['blocked'] is False
+
+
+class FakeFeed(object):
+    name = 'fake feed'
+    autostart = True
+
+    def __init__(self):
+        self.broadcaster = Broadcaster(buffer_size=2)
+        self.state = ServiceState.INITIAL
+
+    def subscribe(self):
+        return self.broadcaster.subscribe()
+
+    def sync_start(self, timeout=None):
+        self.state = ServiceState.READY
+
+    def status(self):
+        return ServiceStatus(self.state)
+
+    def add_observer(self, observer):
+        pass
+
+
+def test_streams_server_sent_events(api_client, settings):
+    settings.LIVE_FEED_HEARTBEAT = 0.1
+    bootstrap_spec(ServiceGroupSpec(livefeed=lambda _: FakeFeed()))
+
+    response = api_client.get('/api/live/')
+    assert response['Content-Type'] == 'text/event-stream'
+
+    frames = iter(response.streaming_content)
+    try:
+        # Nothing to send, so we should get a heartbeat.
+        assert next(frames) == b': heartbeat\n\n'
+
+        broadcaster = services.services().livefeed.broadcaster
+        for i in range(3):
+            broadcaster.publish(FeedEvent('call', {'id': i}))
+
+        # Buffer holds two events, so the first one is lost and the client is told about it.
+        assert next(frames) == b'event: overflow\ndata: {"dropped": 1}\n\n'
+        assert next(frames) == b'event: call\ndata: {"id": 1}\n\n'
+        assert next(frames) == b'event: call\ndata: {"id": 2}\n\n'
+    finally:
+        response.close()
+
+    assert services.services().livefeed.broadcaster.subscriptions == []
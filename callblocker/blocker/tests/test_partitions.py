@@ -0,0 +1,94 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.db import connection
+from django.utils import timezone
+
+from callblocker.blocker import partitions
+from callblocker.blocker.models import Caller, Call, Source, MonthlyCallerRollup
+from callblocker.blocker.partitions import Partition
+
+
+def month(year, month):
+    return datetime(year, month, 1, tzinfo=timezone.utc)
+
+
+def partition_of(call: Call) -> str:
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT tableoid::regclass::text FROM {partitions.TABLE} WHERE id = %s', [call.id])
+        return cursor.fetchone()[0]
+
+
+def tables(prefix):
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT relname FROM pg_class WHERE relname LIKE %s AND relkind IN ('r', 'p')",
+                       [prefix + '%'])
+        return {name for name, in cursor.fetchall()}
+
+
+def caller(number, block=False):
+    return Caller.objects.create(
+        area_code='31', number=number, block=block, source=Source.predef_source(Source.CID),
+        date_inserted=timezone.now()
+    )
+
+
+def test_month_arithmetic():
+    assert partitions.month_of(datetime(1999, 12, 31, 23, 30, tzinfo=timezone.utc)) == month(1999, 12)
+    assert partitions.add_months(month(1999, 12), 1) == month(2000, 1)
+    assert partitions.add_months(month(2000, 1), -13) == month(1998, 12)
+    assert partitions.partition_name(month(2000, 1)) == 'blocker_call_p2000_01'
+
+
+@pytest.mark.django_db
+def test_moves_calls_out_of_default_partition():
+    spammer = caller('970000001')
+    call = Call.objects.create(caller=spammer, time=datetime(1999, 6, 15, tzinfo=timezone.utc), blocked=False)
+    assert partition_of(call) == partitions.DEFAULT_PARTITION
+
+    created = partitions.ensure_partitions(ahead=1)
+
+    current = partitions.month_of(timezone.now())
+    assert {partition.month for partition in created} >= {month(1999, 6), current, partitions.add_months(current, 1)}
+    assert partition_of(call) == 'blocker_call_p1999_06'
+    assert Call.objects.get(id=call.id).caller == spammer
+
+    # Nothing left to do.
+    assert partitions.ensure_partitions(ahead=1) == []
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize('archive', [False, True])
+def test_expires_partitions(archive):
+    spammer, friend = caller(f'97000001{int(archive)}', block=True), caller(f'97000002{int(archive)}')
+    for day in [3, 10]:
+        Call.objects.create(caller=spammer, time=datetime(1998, 2, day, tzinfo=timezone.utc), blocked=True)
+    Call.objects.create(caller=friend, time=datetime(1998, 2, 5, tzinfo=timezone.utc), blocked=False)
+    recent = Call.objects.create(caller=friend, time=datetime(1998, 3, 1, tzinfo=timezone.utc), blocked=False)
+    partitions.ensure_partitions(ahead=0)
+
+    expired = partitions.expire(before=month(1998, 3), archive=archive)
+
+    assert Partition('blocker_call_p1998_02', month(1998, 2)) in expired
+    assert not Call.objects.filter(caller__in=[spammer, friend], time__lt=month(1998, 3)).exists()
+    assert Call.objects.filter(id=recent.id).exists()
+
+    summary = MonthlyCallerRollup.objects.get(caller=spammer, month=month(1998, 2))
+    assert (summary.calls, summary.blocked_calls) == (2, 2)
+    assert summary.first_call == datetime(1998, 2, 3, tzinfo=timezone.utc)
+    assert summary.last_call == datetime(1998, 2, 10, tzinfo=timezone.utc)
+    assert MonthlyCallerRollup.objects.get(caller=friend, month=month(1998, 2)).calls == 1
+
+    assert ('blocker_call_archive_p1998_02' in tables('blocker_call_archive')) == archive
+    assert 'blocker_call_p1998_02' not in tables('blocker_call_p')
+
+    # Archived calls don't keep callers from being deleted.
+    spammer.delete()
+    assert not Caller.objects.filter(pk=spammer.pk).exists()
+
+
+@pytest.mark.django_db
+def test_maintenance_command():
+    call_command('partitioncalls', ahead=0, retention=1200)
+    assert partitions.partition_name(partitions.month_of(timezone.now())) in tables('blocker_call_p')
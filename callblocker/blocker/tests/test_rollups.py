@@ -0,0 +1,117 @@
+from datetime import datetime
+
+import pytest
+from django.core.management import call_command
+from django.utils import timezone
+
+from callblocker.blocker import rollups
+from callblocker.blocker.models import Caller, Call, Source, HourlyCallRollup, DailyCallRollup
+
+# Far enough in the past that nothing else logs calls around it.
+T0 = datetime(2001, 3, 5, 10, 15, tzinfo=timezone.utc)
+
+
+def log_calls(area_code, number, block, *times):
+    caller = Caller.objects.create(
+        area_code=area_code,
+        number=number,
+        block=block,
+        source=Source.predef_source(Source.CID),
+        date_inserted=timezone.now()
+    )
+    for time in times:
+        call = Call.objects.create(caller=caller, time=time, blocked=block)
+        rollups.record(call, area_code)
+
+
+def rollup_rows(rollup):
+    return sorted(
+        (row.bucket, row.area_code, row.blocked, row.calls)
+        for row in rollup.objects.filter(bucket__year=2001)
+    )
+
+
+def seed():
+    log_calls('11', '900000001', True, T0, T0.replace(minute=59), T0.replace(hour=11))
+    log_calls('21', '900000002', False, T0, T0.replace(day=6))
+
+
+@pytest.mark.django_db
+def test_records_calls_incrementally():
+    seed()
+
+    assert rollup_rows(HourlyCallRollup) == [
+        (T0.replace(minute=0), '11', True, 2),
+        (T0.replace(minute=0), '21', False, 1),
+        (T0.replace(hour=11, minute=0), '11', True, 1),
+        (T0.replace(day=6, minute=0), '21', False, 1),
+    ]
+
+    assert rollup_rows(DailyCallRollup) == [
+        (T0.replace(hour=0, minute=0), '11', True, 3),
+        (T0.replace(hour=0, minute=0), '21', False, 1),
+        (T0.replace(day=6, hour=0, minute=0), '21', False, 1),
+    ]
+
+
+@pytest.mark.django_db
+def test_backfill_matches_incremental_rollups():
+    seed()
+    hourly, daily = rollup_rows(HourlyCallRollup), rollup_rows(DailyCallRollup)
+
+    HourlyCallRollup.objects.all().delete()
+    DailyCallRollup.objects.all().delete()
+    call_command('backfillrollups', since='2001-03-05T23:00:00')
+
+    # Starts from the beginning of the day.
+    assert rollup_rows(HourlyCallRollup) == hourly
+    assert rollup_rows(DailyCallRollup) == daily
+
+    # Running it again changes nothing.
+    call_command('backfillrollups')
+    assert rollup_rows(DailyCallRollup) == daily
+
+
+@pytest.mark.django_db
+def test_backfill_drops_buckets_without_calls():
+    seed()
+    hourly, daily = rollup_rows(HourlyCallRollup), rollup_rows(DailyCallRollup)
+    Call.objects.filter(time=T0.replace(day=6)).delete()
+
+    rollups.backfill(T0)
+
+    assert rollup_rows(HourlyCallRollup) == hourly[:-1]
+    assert rollup_rows(DailyCallRollup) == daily[:-1]
+
+    # Buckets from before the oldest call are kept, as their calls may have expired.
+    Call.objects.filter(time__year=2001).delete()
+    rollups.backfill()
+
+    assert rollup_rows(HourlyCallRollup) == hourly[:-1]
+    assert rollup_rows(DailyCallRollup) == daily[:-1]
+
+
+@pytest.mark.django_db
+def test_serves_stats(api_client):
+    seed()
+    window = 'since=2001-01-01T00:00:00Z&until=2002-01-01T00:00:00Z'
+
+    daily = api_client.get(f'/api/stats/?{window}').json()
+    assert daily == {'granularity': 'day', 'series': [
+        {'period': '2001-03-05T00:00:00+00:00', 'blocked': 3, 'allowed': 1},
+        {'period': '2001-03-06T00:00:00+00:00', 'blocked': 0, 'allowed': 1},
+    ]}
+
+    weekly = api_client.get(f'/api/stats/?{window}&granularity=week&by=area_code').json()
+    assert weekly['series'] == [
+        {'period': '2001-03-05T00:00:00+00:00', 'area_code': '11', 'blocked': 3, 'allowed': 0},
+        {'period': '2001-03-05T00:00:00+00:00', 'area_code': '21', 'blocked': 0, 'allowed': 2},
+    ]
+
+    hourly = api_client.get(f'/api/stats/?{window}&granularity=hour&area_code=11').json()
+    assert [(entry['period'], entry['blocked']) for entry in hourly['series']] == [
+        ('2001-03-05T10:00:00+00:00', 2),
+        ('2001-03-05T11:00:00+00:00', 1),
+    ]
+
+    assert api_client.get('/api/stats/?granularity=fortnight').status_code == 400
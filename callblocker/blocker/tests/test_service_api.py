@@ -1,11 +1,16 @@
 import json
+import logging
+from urllib.parse import quote
 
 from rest_framework import status
 
-from callblocker.blocker import services
+from callblocker import blocker
+from callblocker.blocker import BootstrapMode, services
 from callblocker.blocker.services import bootstrap
+from callblocker.core.profiling import Profiler
 from callblocker.core.service import Service, ServiceStatus, ServiceState
 from callblocker.core.servicegroup import ServiceGroupSpec
+from callblocker.core.tests.test_service import BuggyThreadedService
 
 
 class FlippinService(Service):
@@ -107,13 +112,148 @@ def test_raises_400_on_malformed_request(api_client):
     ).status_code == 400
 
 
+def test_exposes_metrics(api_client):
+    bootstrap_spec(
+        ServiceGroupSpec(
+            fp1=lambda _: FlippinService('FlippingService 1')
+        )
+    )
+
+    response = api_client.get('/api/metrics/')
+    assert response.status_code == 200
+    assert response['Content-Type'].startswith('text/plain; version=0.0.4')
+
+    metrics = response.content.decode('utf-8').splitlines()
+    assert 'callblocker_service_state{service="fp1",state="READY"} 1' in metrics
+    assert 'callblocker_service_state{service="fp1",state="ERRORED"} 0' in metrics
+    assert '# TYPE callblocker_calls_screened_total counter' in metrics
+
+
+def test_streams_service_transitions(api_client, settings):
+    settings.LIVE_FEED_HEARTBEAT = 0.1
+    bootstrap_spec(ServiceGroupSpec(buggy=lambda _: BuggyThreadedService()))
+    buggy = services.services().buggy
+
+    response = api_client.get('/api/services/events/')
+    assert response['Content-Type'] == 'text/event-stream'
+
+    frames = iter(response.streaming_content)
+    try:
+        assert next(frames) == b': heartbeat\n\n'
+
+        buggy.die()
+        transitions = [
+            json.loads(frame.decode('utf-8').split('data: ')[1])
+            for frame in _events(frames, 1)
+        ]
+        assert transitions[0]['service'] == 'buggy'
+        assert (transitions[0]['previous'], transitions[0]['state']) == ('READY', 'ERRORED')
+        assert transitions[0]['exception'] == "Exception: Oh I'm so buggy."
+    finally:
+        response.close()
+
+
+def test_profiles_requests_on_demand(api_client, settings, tmp_path):
+    settings.PROFILE_DIR = str(tmp_path)
+    settings.PROFILE_STATE_TTL = 0
+    bootstrap_spec(ServiceGroupSpec(profiler=lambda _: Profiler(services.profile_store())))
+    assert api_client.get('/api/services/profiler/').json()['status']['state'] == 'INITIAL'
+
+    api_client.get('/api/log/')
+    assert api_client.get('/api/profiles/').json() == []
+
+    # Switched on through the services API.
+    api_client.patch('/api/services/profiler/', {'status': {'state': 'READY'}}, format='json')
+    api_client.get('/api/log/?after=-1')
+    api_client.patch('/api/services/profiler/', {'status': {'state': 'TERMINATED'}}, format='json')
+    api_client.get('/api/log/')
+
+    # Looking at profiles doesn't get profiled.
+    profiles = api_client.get('/api/profiles/').json()
+    assert [(profile['kind'], profile['label']) for profile in profiles] == [
+        ('request', 'PATCH_api_services_profiler'),
+        ('request', 'GET_api_log'),
+    ]
+
+    response = api_client.get(f'/api/profiles/{profiles[1]["name"]}/')
+    assert response['Content-Disposition'] == f'attachment; filename="{profiles[1]["name"]}"'
+    assert int(response['Content-Length']) == profiles[1]['size']
+    response.close()
+
+    assert api_client.get('/api/profiles/nope.prof/').status_code == 404
+
+
+def _events(frames, count):
+    events = []
+    for frame in frames:
+        if frame != b': heartbeat\n\n':
+            assert frame.startswith(b'event: transition\n')
+            events.append(frame)
+        if len(events) == count:
+            return events
+
+
 def bootstrap_spec(spec):
     # This is hacky, and will improve as I figure out an
     # API for it.
-
-    # Triggers the bootstrap call in urls.py
-    from callblocker import urls
-
-    # Overrides it with our stuff.
     setattr(services, 'custom', spec)
     bootstrap('custom').start()
+
+
+def test_log_cursor(api_client):
+    logger = logging.getLogger(__name__)
+    logger.warning('first entry')
+
+    tail = api_client.get('/api/log/').json()
+    assert 'first entry' in tail[-1]
+
+    first = api_client.get('/api/log/?after=-1').json()
+    assert first['entries'][-1]['seq'] == first['last']
+    assert first['entries'][-1]['message'] == tail[-1]
+
+    logger.warning('second entry')
+    second = api_client.get(f'/api/log/?after={first["last"]}').json()
+    assert len(second['entries']) == 1
+    assert 'second entry' in second['entries'][0]['message']
+
+    # Nothing new.
+    assert api_client.get(f'/api/log/?after={second["last"]}&wait=0.1').json() == {
+        'last': second['last'],
+        'entries': []
+    }
+
+    assert api_client.get('/api/log/?after=abc').status_code == 400
+
+
+def test_log_filters(api_client):
+    logging.getLogger('callblocker.test.filters').info('filtered info')
+    logging.getLogger('callblocker.test.filters').error('filtered error')
+    logging.getLogger('callblocker.test.other').error('other error')
+
+    entries = api_client.get('/api/log/?after=-1&logger=callblocker.test.filters&level=warning').json()['entries']
+    assert len(entries) == 1
+    assert entries[0]['level'] == 'ERROR'
+    assert entries[0]['logger'] == 'callblocker.test.filters'
+    assert 'filtered error' in entries[0]['message']
+
+    # Same thing, but with the legacy flat output.
+    lines = api_client.get('/api/log/?logger=callblocker.test.filters&level=warning').json()
+    assert lines == [entries[0]['message']]
+
+    until = quote(entries[0]['time'])
+    assert api_client.get(f'/api/log/?after=-1&logger=callblocker.test&until={until}').json()['entries'][-1][
+        'logger'] == 'callblocker.test.filters'
+    assert api_client.get(f'/api/log/?after=-1&logger=callblocker.test&since=9999999999').json()['entries'] == []
+
+    assert api_client.get('/api/log/?level=CHATTY').status_code == 400
+    assert api_client.get('/api/log/?since=yesterday').status_code == 400
+
+
+def test_bootstraps_services_lazily(monkeypatch):
+    monkeypatch.setattr(services, '_services', None)
+    monkeypatch.setattr(blocker, 'BOOTSTRAP_MODE', BootstrapMode.COMMAND)
+    monkeypatch.setattr(services, 'command', ServiceGroupSpec(fp1=lambda _: FlippinService('FlippingService 1')))
+
+    group = services.services()
+    assert group.fp1.status().state == ServiceState.READY
+    assert services.services() is group
@@ -1,9 +1,9 @@
 import pytest
 
-from callblocker.blocker.telcos import Vivo
+from callblocker.blocker.callmonitor import CIDParseError
+from callblocker.blocker.telcos import Vivo, compile_rules, get_telco, _provider
 
 
-@pytest.mark.django_db
 def test_parses_vivo_callerid():
 
     # Area code and number
@@ -39,3 +39,62 @@ def test_parses_vivo_callerid():
 
     assert fixed_w_weird_provider.area_code == '11'
     assert fixed_w_weird_provider.number == '31457681'
+
+
+def test_parses_numbers_only_if_area_code_fits():
+    provider = Vivo()
+
+    # Not enough digits for a mobile number and its area code, so this is a landline number.
+    cid = provider.parse_cid('9199627477')
+    assert (cid.area_code, cid.number) == ('91', '99627477')
+
+    with pytest.raises(CIDParseError):
+        provider.parse_cid('199627477')
+
+
+def test_caches_parsed_cids():
+    provider = Vivo()
+
+    for _ in range(3):
+        assert provider.parse_cid('211199627477') == ('11', '99627477')
+    assert provider._parse.cache_info().hits == 2
+
+
+def test_gets_shared_providers(settings):
+    _provider.cache_clear()
+    try:
+        assert get_telco('Vivo') is get_telco('Vivo')
+        with pytest.raises(LookupError):
+            get_telco('Acme')
+    finally:
+        _provider.cache_clear()
+
+
+def test_gets_providers_from_settings(settings):
+    settings.TELCO_RULES = {
+        'Acme': {
+            'area_code_length': 3,
+            'numbers': [{'length': 7, 'prefix': '8'}, {'length': 6}],
+        }
+    }
+    _provider.cache_clear()
+    try:
+        provider = get_telco('Acme')
+        assert provider.parse_cid('0418123456') == ('041', '8123456')
+        assert provider.parse_cid('041123456') == ('041', '123456')
+        with pytest.raises(CIDParseError):
+            provider.parse_cid('12345678')
+    finally:
+        _provider.cache_clear()
+
+
+@pytest.mark.parametrize('rules', [
+    {'numbers': [{'length': 8}]},
+    {'area_code_length': 2, 'numbers': []},
+    {'area_code_length': 2, 'numbers': [{'prefix': '9'}]},
+    {'area_code_length': 'two', 'numbers': [{'length': 8}]},
+    {'area_code_length': 2, 'numbers': [{'length': 8}], 'country_code': '55'},
+])
+def test_rejects_malformed_rules(rules):
+    with pytest.raises(ValueError):
+        compile_rules('Acme', rules)
@@ -0,0 +1,112 @@
+"""
+Thread-safe fan-out of events to multiple subscribers. Unlike :class:`~callblocker.core.modem.EventStream`,
+which is consumed from within the asyncio event loop, :class:`Subscription` objects are meant to be consumed
+from regular threads (e.g. request threads), and are bounded so that slow consumers can never cause
+publishers to block or memory to grow without bounds.
+"""
+from collections import deque
+from threading import Condition, Lock
+from typing import Any, Callable, Optional
+
+
+class SubscriptionClosed(Exception):
+    pass
+
+
+class Subscription(object):
+    """
+    A bounded buffer of events published to a :class:`Broadcaster` since the subscription was created.
+    When the buffer is full, the oldest event is discarded and :attr:`dropped` is incremented.
+
+    :class:`Subscription` instances must be closed with :meth:`Subscription.close` after use. They support
+    Python's "with" protocol (PEP-0343) to facilitate this.
+    """
+
+    def __init__(self, parent: 'Broadcaster', maxsize: int, transform: Optional[Callable[[Any], Any]] = None):
+        self.parent = parent
+        self.dropped = 0
+        self._transform = transform
+        self._events = deque(maxlen=maxsize)
+        self._condition = Condition()
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def put(self, event: Any):
+        if self._transform is not None:
+            event = self._transform(event)
+        with self._condition:
+            if len(self._events) == self._events.maxlen:
+                self.dropped += 1
+            self._events.append(event)
+            self._condition.notify()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        """
+        Returns the oldest buffered event, waiting for up to `timeout` seconds for one to arrive.
+
+        :return: the event, or None if the timeout expires before an event arrives.
+        :raise SubscriptionClosed: if the subscription has been closed.
+        """
+        with self._condition:
+            if not self._events and not self._closed:
+                self._condition.wait(timeout)
+
+            if self._closed:
+                raise SubscriptionClosed()
+
+            return self._events.popleft() if self._events else None
+
+    def close(self):
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            self._condition.notify_all()
+
+        self.parent.unsubscribe(self)
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+class Broadcaster(object):
+    """
+    Publishes events to all current :class:`Subscription` objects. Publishing never blocks on consumers,
+    so it is safe to call from the asyncio event loop.
+    """
+
+    def __init__(self, buffer_size: int):
+        self.buffer_size = buffer_size
+        self._subscriptions = []
+        self._lock = Lock()
+
+    def subscribe(self, transform: Optional[Callable[[Any], Any]] = None) -> Subscription:
+        """
+        :param transform: if given, gets applied to every event as it is published, e.g. to turn it into
+                          something which can be handed to another thread or serialized.
+        """
+        subscription = Subscription(self, self.buffer_size, transform)
+        with self._lock:
+            # Copy-on-write, so that publish can iterate without holding the lock.
+            self._subscriptions = self._subscriptions + [subscription]
+        return subscription
+
+    def unsubscribe(self, subscription: Subscription):
+        with self._lock:
+            self._subscriptions = [
+                other for other in self._subscriptions if other is not subscription
+            ]
+
+    def publish(self, event: Any):
+        for subscription in self._subscriptions:
+            subscription.put(event)
+
+    @property
+    def subscriptions(self):
+        return list(self._subscriptions)
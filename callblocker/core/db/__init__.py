@@ -0,0 +1,17 @@
+"""
+PostgreSQL database backend which hands out connections from a bounded, process-wide pool (see
+:mod:`callblocker.core.db.pool`) instead of opening one per thread. Use it by setting the database ENGINE
+to 'callblocker.core.db', with CONN_MAX_AGE set to zero so that threads give their connection back after
+every request. The pool is configured through the following OPTIONS:
+
+* ``pool_size``: maximum number of physical connections (defaults to 10);
+* ``pool_timeout``: how long, in seconds, to wait for a connection when all of them are in use (defaults
+  to 10);
+* ``pool_max_age``: how long, in seconds, to keep physical connections around (defaults to forever).
+* ``pool_reserved``: how many of the connections to keep for threads which called
+  :func:`~callblocker.core.db.pool.use_reserved_connections` (defaults to none).
+
+Since physical connections outlive Django's, :data:`django.db.backends.signals.connection_created`
+handlers which set up session state can check the wrapper's ``new_session`` attribute to tell whether
+they are looking at a fresh physical connection.
+"""
@@ -0,0 +1,48 @@
+from django.db.backends.postgresql import base
+
+from callblocker.core.db.creation import DatabaseCreation
+from callblocker.core.db.pool import ConnectionPool, get_pool
+
+#: OPTIONS which configure the pool, and are therefore not passed on to psycopg2.
+POOL_OPTIONS = {'pool_size': 10, 'pool_timeout': 10, 'pool_max_age': None, 'pool_reserved': 0}
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    creation_class = DatabaseCreation
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.pool = None
+        #: Whether the current connection is a freshly opened physical connection.
+        self.new_session = False
+
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        for option in POOL_OPTIONS:
+            params.pop(option, None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        self.pool = get_pool(tuple(sorted(conn_params.items())), lambda: self._new_pool(conn_params))
+        connection, self.new_session = self.pool.acquire()
+        return connection
+
+    def _new_pool(self, conn_params) -> ConnectionPool:
+        options = {option: self.settings_dict['OPTIONS'].get(option, default)
+                   for option, default in POOL_OPTIONS.items()}
+        return ConnectionPool(
+            lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+            size=options['pool_size'],
+            timeout=options['pool_timeout'],
+            max_age=options['pool_max_age'],
+            name=conn_params['database'],
+            reserved=options['pool_reserved']
+        )
+
+    def _close(self):
+        if self.connection is None:
+            return
+        with self.wrap_database_errors:
+            # Django keeps referencing connections closed within an atomic block until the block exits,
+            # so those can't go back to the pool.
+            self.pool.release(self.connection, discard=self.in_atomic_block)
@@ -0,0 +1,10 @@
+from django.db.backends.postgresql import creation
+
+from callblocker.core.db.pool import close_pools
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Postgres won't drop a database with open connections.
+        close_pools(lambda pool: pool.name == test_database_name)
+        super()._destroy_test_db(test_database_name, verbosity)
@@ -0,0 +1,163 @@
+import logging
+import time
+from threading import Condition, Lock, local
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from psycopg2 import extensions
+
+from callblocker.core.metrics import Counter, Gauge, Summary
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool(object):
+    """
+    A bounded pool of DB-API connections. At most `size` connections exist at any one time; threads
+    asking for one while all of them are in use wait for up to `timeout` seconds.
+
+    The last `reserved` connections are kept for threads which called :func:`use_reserved_connections`, so
+    that busy request threads can't starve them.
+
+    :param connect: opens a new physical connection.
+    :param max_age: how long, in seconds, to keep a physical connection around. None keeps them forever.
+    """
+
+    def __init__(self, connect: Callable[[], Any], size: int, timeout: float, max_age: Optional[float] = None,
+                 name: str = 'default', reserved: int = 0):
+        if not 0 <= reserved < size:
+            raise ValueError(f'Pools must have fewer reserved connections ({reserved}) than connections ({size}).')
+        self.name = name
+        self.size = size
+        self.reserved = reserved
+        self.timeout = timeout
+        self.max_age = max_age
+        self._connect = connect
+        self._idle: List[Any] = []
+        self._created: Dict[Any, float] = {}
+        self._in_use = 0
+        self._closed = False
+        self._condition = Condition()
+
+    def acquire(self) -> Tuple[Any, bool]:
+        """
+        :return: a (connection, new) tuple, where `new` tells whether the connection has just been opened.
+        :raise PoolTimeout: if no connection becomes available within the timeout.
+        """
+        limit = self.size if getattr(_threads, 'reserved', False) else self.size - self.reserved
+        start = time.perf_counter()
+        with self._condition:
+            if not self._condition.wait_for(lambda: self._in_use < limit, self.timeout):
+                POOL_TIMEOUTS.labels(self.name).inc()
+                raise PoolTimeout(f'No connection became available in pool {self.name} within {self.timeout}s.')
+
+            POOL_WAIT.labels(self.name).observe(time.perf_counter() - start)
+            self._in_use += 1
+            while self._idle:
+                connection = self._idle.pop()
+                if not connection.closed and not self._expired(connection):
+                    return connection, False
+                self._discard(connection)
+
+        # No idle connections left, but we have room for a new one. Connecting may take a while, so we
+        # do it without holding the lock.
+        try:
+            connection = self._connect()
+        except:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify_all()
+            raise
+
+        with self._condition:
+            self._created[connection] = time.monotonic()
+        return connection, True
+
+    def release(self, connection, discard: bool = False):
+        """
+        Gives a connection back to the pool. Connections are rolled back to a clean state before being
+        reused; broken or expired ones, and any for which `discard` is true, are closed instead.
+        """
+        discard = discard or self._closed or connection.closed or self._expired(connection)
+        if not discard and connection.get_transaction_status() != extensions.TRANSACTION_STATUS_IDLE:
+            try:
+                connection.rollback()
+            except Exception:
+                discard = True
+
+        with self._condition:
+            self._in_use -= 1
+            if discard:
+                self._discard(connection)
+            else:
+                self._idle.append(connection)
+            # The first waiter may not be allowed to take reserved connections, so we wake them all.
+            self._condition.notify_all()
+
+    def close(self):
+        """Closes all idle connections. Connections in use are closed as they get released."""
+        with self._condition:
+            self._closed = True
+            while self._idle:
+                self._discard(self._idle.pop())
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use
+
+    @property
+    def idle(self) -> int:
+        return len(self._idle)
+
+    def _expired(self, connection) -> bool:
+        return self.max_age is not None and time.monotonic() - self._created.get(connection, 0) > self.max_age
+
+    def _discard(self, connection):
+        self._created.pop(connection, None)
+        try:
+            connection.close()
+        except Exception:
+            logger.exception('Failed to close pooled connection.')
+
+
+_pools: Dict[Hashable, ConnectionPool] = {}
+_pools_lock = Lock()
+_threads = local()
+
+
+def use_reserved_connections():
+    """Lets the current thread use reserved connections (see :class:`ConnectionPool`)."""
+    _threads.reserved = True
+
+
+def get_pool(key: Hashable, factory: Callable[[], ConnectionPool]) -> ConnectionPool:
+    """Returns the pool registered under `key`, creating it with `factory` if needed."""
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None or pool._closed:
+            pool = _pools[key] = factory()
+        return pool
+
+
+def close_pools(predicate: Callable[[ConnectionPool], bool] = lambda _: True):
+    with _pools_lock:
+        for key, pool in list(_pools.items()):
+            if predicate(pool):
+                pool.close()
+                del _pools[key]
+
+
+def _pool_connections():
+    for pool in list(_pools.values()):
+        yield (pool.name, 'in_use'), pool.in_use
+        yield (pool.name, 'idle'), pool.idle
+
+
+POOL_WAIT = Summary('callblocker_db_pool_wait_seconds', 'Time spent waiting for a pooled DB connection.', ['pool'])
+POOL_TIMEOUTS = Counter('callblocker_db_pool_timeouts_total', 'Pooled DB connection requests that timed out.',
+                        ['pool'])
+Gauge('callblocker_db_pool_connections', 'Pooled DB connections, by state.', ['pool', 'state'],
+      collect=_pool_connections)
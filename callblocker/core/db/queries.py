@@ -0,0 +1,44 @@
+"""
+Counts the SQL queries code runs, and the time it spends running them, for keeping N+1 query patterns out
+of request handling (see :class:`~callblocker.blocker.api.middleware.QueryCountMiddleware` and
+:func:`callblocker.core.tests.utils.query_budget`).
+"""
+import time
+from contextlib import ExitStack
+from typing import List
+
+from django.db import connections
+
+
+class QueryCounter(object):
+    """
+    Context manager which counts the queries run on the current thread's database connections while active.
+
+    :ivar queries: how many queries ran.
+    :ivar time: time spent running them, in seconds.
+    :ivar statements: the SQL of the queries, in the order they ran.
+    """
+
+    def __init__(self):
+        self.queries = 0
+        self.time = 0.0
+        self.statements: List[str] = []
+        self._wrappers = None
+
+    def __enter__(self) -> 'QueryCounter':
+        self._wrappers = ExitStack()
+        for connection in connections.all():
+            self._wrappers.enter_context(connection.execute_wrapper(self._execute))
+        return self
+
+    def __exit__(self, *_):
+        self._wrappers.close()
+
+    def _execute(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.time += time.perf_counter() - start
+            self.queries += 1
+            self.statements.append(sql)
@@ -0,0 +1,55 @@
+"""
+Picks the event loop implementation the asyncio services run on. Backends are given either by one of the
+names in :data:`BACKENDS`, or by the dotted path to a callable which takes no arguments and returns a new
+event loop.
+"""
+import asyncio
+import importlib
+import logging
+from typing import Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+#: Event loop factories by backend name.
+BACKENDS = {
+    'asyncio': 'asyncio.new_event_loop',
+    'uvloop': 'uvloop.new_event_loop'
+}
+
+#: The backend :func:`loop_factory` falls back to.
+DEFAULT_BACKEND = 'asyncio'
+
+LoopFactory = Callable[[], asyncio.AbstractEventLoop]
+
+
+def resolve(backend: str) -> LoopFactory:
+    """
+    :return: the event loop factory for `backend`.
+    :raise ImportError: if the backend is not installed, or does not exist.
+    """
+    path = BACKENDS.get(backend, backend)
+    module, _, name = path.rpartition('.')
+    try:
+        factory = getattr(importlib.import_module(module), name)
+    except (AttributeError, ValueError) as ex:
+        raise ImportError(f'Cannot find event loop factory {path}.') from ex
+
+    if not callable(factory):
+        raise ImportError(f'Event loop factory {path} is not callable.')
+    return factory
+
+
+def loop_factory(backend: str) -> Tuple[str, LoopFactory]:
+    """
+    Like :func:`resolve`, but falls back to the stock asyncio loop (with a warning) if `backend` is not
+    available, so that a missing optional dependency does not keep the modem from running.
+
+    :return: the name of the backend which is actually used, and its factory.
+    """
+    try:
+        return backend, resolve(backend)
+    except ImportError as ex:
+        if backend == DEFAULT_BACKEND:
+            raise
+        logger.warning(f'Event loop backend {backend} is not available ({ex}), using {DEFAULT_BACKEND} instead.')
+        return DEFAULT_BACKEND, resolve(DEFAULT_BACKEND)
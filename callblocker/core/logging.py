@@ -1,31 +1,233 @@
 """
 Simple logging :class:`logging.Handler` which buffers the last `tail_size` entries into a globally
-accessible location so that the logging API can access and send it to clients easily. This works because
-our server is supposed to run on a single process.
+accessible location so that the logging API can access and send it to clients easily. Every process has a
+buffer of its own, so when the services run in a modem daemon, the web processes ask the daemon for its log
+(see :class:`callblocker.blocker.control.RemoteControl`).
+
+Each entry gets a monotonically increasing sequence number, so that clients can ask only for the entries
+they have not seen yet (see :meth:`LogBuffer.since`) instead of re-fetching the whole tail. Entries are kept
+as structured :class:`LogEntry` tuples and are only formatted when a client asks for them, which keeps
+logging cheap for the (many) records that nobody ever reads.
 """
-from logging import Handler
+import logging
+import os
+from collections import namedtuple
+from logging import Handler, Formatter, NOTSET, getLevelName, makeLogRecord
+from logging.handlers import QueueHandler, QueueListener
+from queue import Queue, Full
+from threading import Condition, Lock
+from typing import List, Tuple, Optional, Iterable
+
+from callblocker.core.metrics import Counter
+
+
+class LogBuffer(object):
+    """
+    Fixed-size ring buffer of (sequence number, entry) pairs. Sequence numbers start at zero, and the entry
+    with sequence number `seq` is stored at slot `seq % size`.
+    """
+
+    def __init__(self, size: int):
+        self.size = size
+        self._slots = [None] * size
+        self._next = 0
+        self._condition = Condition()
+
+    def append(self, entry) -> int:
+        with self._condition:
+            seq = self._next
+            self._slots[seq % self.size] = entry
+            self._next = seq + 1
+            self._condition.notify_all()
+            return seq
+
+    @property
+    def last(self) -> int:
+        """Sequence number of the latest entry, or -1 if the buffer has never been written to."""
+        return self._next - 1
+
+    def since(self, after: int = -1) -> List[Tuple[int, object]]:
+        """
+        Returns the entries with sequence numbers greater than `after` which are still in the buffer, in
+        O(number of entries returned).
+        """
+        with self._condition:
+            return self._since(after)
+
+    def wait(self, after: int, timeout: Optional[float]) -> List[Tuple[int, object]]:
+        """
+        Like :meth:`since`, but waits for up to `timeout` seconds for new entries to arrive if there are
+        none to return.
+        """
+        with self._condition:
+            self._condition.wait_for(lambda: self._next - 1 > after, timeout)
+            return self._since(after)
+
+    def _since(self, after: int) -> List[Tuple[int, object]]:
+        first = max(after + 1, self._next - self.size, 0)
+        return [(seq, self._slots[seq % self.size]) for seq in range(first, self._next)]
 
-_buffer = []
-_index = 0
+
+#: Compact, structured representation of a log record. Messages are only formatted when somebody asks for
+#: them, so only the attributes below are available to the formatters used with :class:`TailHandler`.
+LogEntry = namedtuple('LogEntry', [
+    'created', 'levelno', 'name', 'module', 'funcName', 'lineno', 'threadName', 'msg', 'args', 'exc_text'
+])
+
+_handler: Optional['TailHandler'] = None
 
 
 class TailHandler(Handler):
     def __init__(self, tail_size):
         super().__init__()
-        self.tail_size = tail_size
+        self.buffer = LogBuffer(tail_size)
+        global _handler
+        _handler = self
 
     def emit(self, record):
         try:
-            global _index
-            msg = self.format(record)
-            if len(_buffer) < self.tail_size:
-                _buffer.append(msg)
-            else:
-                _buffer[_index] = msg
-            _index = (_index + 1) % self.tail_size
+            self.buffer.append(LogEntry(
+                created=record.created,
+                levelno=record.levelno,
+                name=record.name,
+                module=record.module,
+                funcName=record.funcName,
+                lineno=record.lineno,
+                threadName=record.threadName,
+                msg=record.msg,
+                args=record.args,
+                # Tracebacks can't be kept around lazily, and are rare anyways.
+                exc_text=self._format_exception(record) if record.exc_info else record.exc_text
+            ))
         except Exception:
             self.handleError(record)
 
+    def render(self, entry: LogEntry) -> str:
+        """Formats a :class:`LogEntry` with this handler's formatter."""
+        attributes = entry._asdict()
+        attributes['levelname'] = getLevelName(entry.levelno)
+        attributes['msecs'] = (entry.created - int(entry.created)) * 1000
+        return self.format(makeLogRecord(attributes))
+
+    def _format_exception(self, record):
+        return (self.formatter or _default_formatter).formatException(record.exc_info)
+
+
+_default_formatter = Formatter()
+
+
+class _Listener(QueueListener):
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def enqueue_sentinel(self):
+        # The stock implementation doesn't block, and therefore fails if the queue happens to be full.
+        self.queue.put(self._sentinel)
+
+
+class QueueingHandler(QueueHandler):
+    """
+    Hands records over to a bounded queue, which a :class:`QueueListener` thread drains into the actual
+    handlers. This keeps threads that log (most importantly the asyncio event loop) from ever blocking on
+    slow outputs like stdout, or on other threads holding handler locks. If the queue is full, records are
+    dropped and counted in :attr:`dropped`, and in the callblocker_log_records_dropped_total metric.
+
+    The listener thread starts with the first record, and again in every process forked from this one (e.g.
+    by uWSGI), as threads don't survive forking. Records still queued when forking stay with the parent.
+
+    Since :func:`logging.config.dictConfig` sets up handlers in alphabetical order, the handlers this one
+    feeds must have names which sort before its own.
+
+    :param handlers: names of the handlers to feed.
+    :param queue_size: maximum number of records waiting to be handled.
+    """
+
+    def __init__(self, handlers: List[str], queue_size: int = 10000):
+        super().__init__(Queue(queue_size))
+        self.dropped = 0
+        self._drop_lock = Lock()
+        self._start_lock = Lock()
+        self._handlers = [self._named(name) for name in handlers]
+        self.listener: Optional[_Listener] = None
+        # Process the listener runs in.
+        self._pid: Optional[int] = None
+
+    def createLock(self):
+        # The queue is already thread-safe, so there is no need to serialize callers on a handler lock.
+        self.lock = None
+
+    def prepare(self, record):
+        # The stock implementation formats the record here so it can cross process boundaries. We don't
+        # need that, and it would defeat lazy formatting in TailHandler.
+        return record
+
+    def enqueue(self, record):
+        if self._pid != os.getpid():
+            self._start_listener()
+        try:
+            self.queue.put_nowait(record)
+        except Full:
+            with self._drop_lock:
+                self.dropped += 1
+            LOG_RECORDS_DROPPED.labels(self.name or '').inc()
+
+    def close(self):
+        # Flushes whatever is left in the queue.
+        if self.listener is not None and self._pid == os.getpid() and self.listener.running:
+            self.listener.stop()
+        super().close()
+
+    def _start_listener(self):
+        with self._start_lock:
+            pid = os.getpid()
+            if self._pid == pid:
+                return
+            if self._pid is not None:
+                # We've been forked. The queue may have been copied with its locks held, and whatever is in it
+                # is the parent's to handle.
+                self.queue = Queue(self.queue.maxsize)
+            self.listener = _Listener(self.queue, *self._handlers, respect_handler_level=True)
+            self.listener.start()
+            self._pid = pid
+
+    @staticmethod
+    def _named(name: str) -> Handler:
+        handler = logging._handlers.get(name)
+        if handler is None:
+            raise ValueError(f'Handler {name} is not configured. Note that handlers are configured in '
+                             f'alphabetical order.')
+        return handler
+
+
+LOG_RECORDS_DROPPED = Counter('callblocker_log_records_dropped_total',
+                              'Log records dropped because the logging queue was full, by handler.', ['handler'])
+
+
+def handler() -> Optional[TailHandler]:
+    return _handler
+
+
+def buffer() -> LogBuffer:
+    return _handler.buffer if _handler is not None else LogBuffer(1)
+
+
+def select(entries: Iterable[Tuple[int, LogEntry]], level: int = NOTSET, logger: str = '',
+           since: Optional[float] = None, until: Optional[float] = None) -> List[Tuple[int, LogEntry]]:
+    """
+    Filters (sequence number, :class:`LogEntry`) pairs by minimum level, logger name prefix, and creation
+    time range (in seconds since the epoch, as in :attr:`logging.LogRecord.created`).
+    """
+    return [
+        (seq, entry) for seq, entry in entries
+        if entry.levelno >= level and
+        entry.name.startswith(logger) and
+        (since is None or entry.created >= since) and
+        (until is None or entry.created < until)
+    ]
+
 
-def tail():
-    return _buffer[_index:-1] + _buffer[0:_index]
+def tail() -> List[str]:
+    if _handler is None:
+        return []
+    return [_handler.render(entry) for _, entry in _handler.buffer.since()]
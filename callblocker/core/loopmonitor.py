@@ -0,0 +1,121 @@
+"""
+Watches an asyncio event loop for lag and stalls. Everything that runs on a loop shares its thread, so a
+single step which blocks (e.g. a synchronous ORM query, or a slow logging handler) delays every other task
+on it, including modem reads.
+
+Lag is measured by a probe callback which reschedules itself every `interval` seconds, and records how
+late it got to run. Stalls are caught by an (opt-in) watchdog thread, which notices when the probe is
+overdue by more than a threshold, and records the task the loop was running, along with the loop thread's
+stack, while the loop is still stuck.
+"""
+import asyncio
+import logging
+import sys
+import time
+import traceback
+from collections import deque
+from datetime import datetime
+from threading import Event, Lock, Thread
+from typing import Any, Dict, List, Optional
+
+from callblocker.core.metrics import Counter
+
+logger = logging.getLogger(__name__)
+
+STALLS = Counter('callblocker_event_loop_stalls_total',
+                 'Times the asyncio event loop got stuck in a single step for longer than the slow callback '
+                 'threshold.')
+
+#: How many frames of the loop thread's stack to keep for each stall.
+STACK_DEPTH = 30
+
+
+class LoopMonitor(object):
+    """
+    Monitors `loop`, which must be run by the thread with id `thread_id`. If `threshold` is None, only lag
+    is measured. The last `history` stalls are kept in :attr:`stalls`, newest last.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, thread_id: int, interval: float,
+                 threshold: Optional[float] = None, history: int = 10):
+        self.loop = loop
+        self.interval = interval
+        self.threshold = threshold
+        #: Lag, in seconds, of the last probe.
+        self.lag = 0.0
+        #: Largest lag seen so far, in seconds.
+        self.max_lag = 0.0
+        self.stalls = deque(maxlen=history)
+
+        self._thread_id = thread_id
+        self._lock = Lock()
+        self._expected = None
+        self._handle = None
+        self._stall = None
+        self._stop = Event()
+        self._watchdog = None
+
+    def start(self):
+        """Starts monitoring. Must be called from the loop's thread."""
+        self._expected = time.monotonic()
+        self._handle = self.loop.call_soon(self._probe)
+        if self.threshold is not None:
+            self._stop.clear()
+            self._watchdog = Thread(target=self._watch, name='event loop watchdog', daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        if self._handle is not None:
+            self._handle.cancel()
+        self._stop.set()
+
+    def info(self) -> Dict[str, Any]:
+        """:return: the current measurements, in a JSON-friendly form."""
+        return {
+            'lag': self.lag,
+            'max_lag': self.max_lag,
+            'stalls': list(self.stalls)
+        }
+
+    def _probe(self):
+        now = time.monotonic()
+        with self._lock:
+            self.lag = max(now - self._expected, 0.0)
+            self.max_lag = max(self.max_lag, self.lag)
+            if self._stall is not None:
+                # The stall is over, so we now know how long it lasted.
+                self._stall['duration'] = self.lag
+                self._stall = None
+            self._expected = now + self.interval
+        self._handle = self.loop.call_later(self.interval, self._probe)
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            with self._lock:
+                overdue = time.monotonic() - self._expected
+                if overdue <= self.threshold or self._stall is not None:
+                    continue
+                # The loop may get going again (and clear self._stall) as soon as we let go of the lock.
+                stall = self._stall = self._record(overdue)
+                self.stalls.append(stall)
+
+            STALLS.inc()
+            logger.warning('Event loop stuck for over %.3fs running %s, at:\n%s',
+                           overdue, stall['task'], ''.join(stall['stack']))
+
+    def _record(self, overdue: float) -> Dict[str, Any]:
+        frame = sys._current_frames().get(self._thread_id)
+        task = asyncio.Task.current_task(loop=self.loop)
+        return {
+            'time': datetime.now().isoformat(),
+            # Gets updated once the loop gets going again.
+            'duration': overdue,
+            'task': repr(task) if task is not None else None,
+            'stack': _format_stack(frame)
+        }
+
+
+def _format_stack(frame) -> List[str]:
+    if frame is None:
+        return []
+    return traceback.format_list(traceback.extract_stack(frame)[-STACK_DEPTH:])
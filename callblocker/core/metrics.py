@@ -0,0 +1,246 @@
+"""
+A minimal metrics registry which renders to the `Prometheus text exposition format
+<https://prometheus.io/docs/instrumenting/exposition_formats/>`_.
+
+Metrics are meant to be updated from hot paths like the modem read loop, so updates take no locks: a lock is
+only taken the first time a given set of label values is seen. This means concurrent updates to the *same*
+child from different threads may occasionally lose an increment, which is fine for our purposes since
+most metrics are only ever updated from the asyncio event loop thread.
+
+Values which are cheaper to compute on demand (e.g. service states or queue depths) can be registered as
+:class:`Gauge` objects with a `collect` function, which gets called at scrape time.
+
+Metrics from several processes (e.g. a modem daemon and a uWSGI worker) can be exposed together by getting
+their :meth:`Registry.families`, and rendering them with :func:`merge`.
+"""
+import math
+from collections import OrderedDict, namedtuple
+from threading import Lock
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, Union
+
+Number = Union[int, float]
+
+#: A metric, and its samples as of when it was collected, as (sample name, labels, value) tuples.
+Family = namedtuple('Family', ['name', 'help', 'type', 'samples'])
+
+#: Content type for the exposition format.
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Registry(object):
+    def __init__(self):
+        self._metrics = {}
+        self._lock = Lock()
+
+    def register(self, metric: 'Metric') -> 'Metric':
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f'Metric {metric.name} is already registered.')
+            self._metrics[metric.name] = metric
+        return metric
+
+    def unregister(self, metric: 'Metric'):
+        with self._lock:
+            self._metrics.pop(metric.name, None)
+
+    def get(self, name: str) -> Optional['Metric']:
+        return self._metrics.get(name)
+
+    def families(self) -> List[Family]:
+        return [
+            Family(metric.name, metric.help, metric.type, list(metric.samples()))
+            for metric in list(self._metrics.values())
+        ]
+
+    def exposition(self) -> str:
+        return render(self.families())
+
+
+#: The default registry, which is what /api/metrics exposes.
+REGISTRY = Registry()
+
+
+class Metric(object):
+    """
+    Base class for metrics. Metrics with labels hold one child per combination of label values, which
+    is obtained with :meth:`labels`. Metrics without labels can be updated directly.
+    """
+    type = 'untyped'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), registry: Optional[Registry] = REGISTRY):
+        self.name = name
+        self.help = help
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = Lock()
+        if not self.label_names:
+            # Unlabeled metrics are reported even before they are first updated.
+            self.labels()
+        if registry is not None:
+            registry.register(self)
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f'{self.name} expects labels {self.label_names}, got {values}.')
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def samples(self) -> Iterable[Tuple[str, Sequence[Tuple[str, str]], Number]]:
+        for values, child in list(self._children.items()):
+            labels = tuple(zip(self.label_names, values))
+            for suffix, value in child.samples():
+                yield self.name + suffix, labels, value
+
+    def _new_child(self):
+        raise NotImplementedError()
+
+    def _unlabeled(self):
+        if self.label_names:
+            raise ValueError(f'{self.name} has labels {self.label_names}; use labels() to update it.')
+        return self.labels()
+
+
+class _Value(object):
+    __slots__ = ['value']
+
+    def __init__(self):
+        self.value = 0
+
+    def inc(self, amount: Number = 1):
+        self.value += amount
+
+    def set(self, value: Number):
+        self.value = value
+
+    def samples(self):
+        yield '', self.value
+
+
+class Counter(Metric):
+    """A value which only ever goes up, like the number of lines read from the modem."""
+    type = 'counter'
+
+    def inc(self, amount: Number = 1):
+        self._unlabeled().inc(amount)
+
+    def _new_child(self):
+        return _Value()
+
+
+class Gauge(Metric):
+    """
+    A value which can go up and down. If `collect` is given, the gauge is computed at scrape time instead:
+    `collect` must return an iterable of (label values, value) pairs.
+    """
+    type = 'gauge'
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (),
+                 collect: Optional[Callable[[], Iterable[Tuple[Sequence[str], Number]]]] = None,
+                 registry: Optional[Registry] = REGISTRY):
+        super().__init__(name, help, labels, registry)
+        self.collect = collect
+
+    def set(self, value: Number):
+        self._unlabeled().set(value)
+
+    def inc(self, amount: Number = 1):
+        self._unlabeled().inc(amount)
+
+    def samples(self):
+        if self.collect is None:
+            yield from super().samples()
+            return
+
+        for values, value in self.collect():
+            yield self.name, tuple(zip(self.label_names, values)), value
+
+    def _new_child(self):
+        return _Value()
+
+
+class _Observations(object):
+    __slots__ = ['count', 'sum']
+
+    def __init__(self):
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: Number):
+        self.count += 1
+        self.sum += value
+
+    def samples(self):
+        yield '_count', self.count
+        yield '_sum', self.sum
+
+
+class Summary(Metric):
+    """Tracks the count and sum of observations, like time spent in the database per call."""
+    type = 'summary'
+
+    def observe(self, value: Number):
+        self._unlabeled().observe(value)
+
+    def _new_child(self):
+        return _Observations()
+
+
+def render(families: Iterable[Family]) -> str:
+    """Renders `families` in the exposition format."""
+    lines = []
+    for family in families:
+        lines.append(f'# HELP {family.name} {_escape_help(family.help)}')
+        lines.append(f'# TYPE {family.name} {family.type}')
+        for name, labels, value in family.samples:
+            lines.append(f'{name}{_format_labels(labels)} {_format_value(value)}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def merge(families_by_process: Dict[str, Iterable[Family]]) -> str:
+    """
+    Renders the metric families of several processes together, in the exposition format. Samples get a
+    `process` label telling which process they come from, and metrics which several processes have are
+    rendered once, with the samples of all of them.
+    """
+    merged = OrderedDict()
+    for process, families in families_by_process.items():
+        for family in families:
+            samples = [
+                (name, tuple(labels) + (('process', process),), value) for name, labels, value in family.samples
+            ]
+            if family.name in merged:
+                merged[family.name].samples.extend(samples)
+            else:
+                merged[family.name] = Family(family.name, family.help, family.type, samples)
+
+    return render(merged.values())
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape_label(str(value))}"' for name, value in labels) + '}'
+
+
+def _escape_label(value: str) -> str:
+    return value.replace('\\', r'\\').replace('"', r'\"').replace('\n', r'\n')
+
+
+def _escape_help(value: str) -> str:
+    return value.replace('\\', r'\\').replace('\n', r'\n')
+
+
+def _format_value(value: Number) -> str:
+    if isinstance(value, bool):
+        return str(int(value))
+    if isinstance(value, int):
+        return str(value)
+    if math.isnan(value):
+        return 'NaN'
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    return repr(float(value))
@@ -4,14 +4,17 @@ import re
 from abc import ABC, abstractmethod
 from asyncio import Event, StreamWriter, StreamReader
 from collections import deque
+from itertools import count
 from typing import Union, List, Dict, Tuple, Optional
 
-import serial_asyncio
-
+from callblocker.core.metrics import Counter
 from callblocker.core.service import AsyncioService, ServiceState, AsyncioEventLoop
 
 logger = logging.getLogger(__name__)
 
+LINES_READ = Counter('callblocker_modem_lines_read_total', 'Lines read from the modem.')
+EVENTS = Counter('callblocker_modem_events_total', 'Modem events, by type.', ['type'])
+
 
 class ModemException(Exception):
     pass
@@ -76,6 +79,8 @@ class PySerialDevice(SerialDeviceFactory):
         self.baud = baud
 
     async def connect(self, aio_loop):
+        # Only needed when talking to an actual modem, so commands don't pay for importing pyserial.
+        import serial_asyncio
         return await serial_asyncio.open_serial_connection(loop=aio_loop, url=self.port, baudrate=self.baud)
 
 
@@ -146,7 +151,7 @@ class Modem(AsyncioService):
         self._writer.write(command.encode(self.modem_type.encoding) + self.modem_type.newline)
         await self._writer.drain()
 
-        logger.info('Command: %s' % command)
+        logger.info('Command: %s', command)
 
     def event_stream(self) -> 'EventStream':
         stream = EventStream(self)
@@ -166,9 +171,7 @@ class Modem(AsyncioService):
         self._signal_started()
         try:
             while True:
-                event = await self._read_event()
-                for stream in self.streams:
-                    stream.event_received(event)
+                self._dispatch(await self._read_event())
         except Exception as ex:
             # We have an exception. Tell it to waiting clients, if any.
             # Note that CancelledError will be propagated to clients as well
@@ -176,6 +179,14 @@ class Modem(AsyncioService):
             for stream in self.streams:
                 stream.exception(ex)
             raise
+        finally:
+            # Whatever killed us, the device has to be released so that we can reconnect on restart.
+            self._close_device()
+
+    def _dispatch(self, event: ModemEvent):
+        EVENTS.labels(event.event_type).inc()
+        for stream in self.streams:
+            stream.event_received(event)
 
     async def _init_modem(self):
         try:
@@ -187,10 +198,15 @@ class Modem(AsyncioService):
             self.stop()
 
     def _graceful_cleanup(self):
+        self._close_device()
+
+    def _close_device(self):
         try:
             if self._writer is not None:
                 self._writer.transport.close()
         except:
+            pass
+        finally:
             self._reader = self._writer = None
 
     async def _read_event(self, discard=None) -> Union[ModemEvent, None]:
@@ -218,8 +234,9 @@ class Modem(AsyncioService):
             if line == '':
                 raise EOFError('Received EOF from serial device.')
 
+            LINES_READ.inc()
             line = line.strip()
-            logger.info('Modem: %s' % line)
+            logger.info('Modem: %s', line)
             if discard and discard == line:
                 continue
             token = self._match_token(line)
@@ -254,7 +271,10 @@ class EventStream(object):
     iteration will raise a :class:`asyncio.CancelledError` instead of StopIteration.
     """
 
+    _ids = count()
+
     def __init__(self, parent: Modem):
+        self.id = next(self._ids)
         self.parent = parent
         self.has_events = Event(loop=parent.aio_loop)
         self.events = deque()
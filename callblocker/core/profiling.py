@@ -0,0 +1,151 @@
+"""
+Opt-in profiling, for diagnosing slowdowns in production without redeploying. The :class:`Profiler` service
+profiles code while it is READY, so that profiling can be switched on and off at runtime through the services
+API. Profiles are taken with :mod:`cProfile`, and saved to a :class:`ProfileStore` in the format of
+:meth:`cProfile.Profile.dump_stats`, which :mod:`pstats` and most profile viewers read.
+"""
+import cProfile
+import logging
+import os
+import re
+import uuid
+from collections import namedtuple
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import List
+
+from callblocker.core.service import BaseService, ServiceState, ServiceStatus
+
+logger = logging.getLogger(__name__)
+
+#: A saved profile. `kind` tells what got profiled (e.g. 'request'), and `label` which one of them it was.
+ProfileInfo = namedtuple('ProfileInfo', ['name', 'kind', 'label', 'time', 'size'])
+
+_TIME_FORMAT = '%Y%m%dT%H%M%S%f'
+_NAME = re.compile(r'^(?P<time>\d{8}T\d{12})-(?P<kind>[A-Za-z0-9_.]+)-(?P<label>[A-Za-z0-9_.]*)-[0-9a-f]{8}\.prof$')
+
+
+class ProfileStore(object):
+    """
+    A directory of profiles, which keeps only the latest `max_profiles` of them. The directory can be
+    shared by several processes.
+    """
+
+    def __init__(self, directory: str, max_profiles: int):
+        self.directory = directory
+        self.max_profiles = max_profiles
+
+    def save(self, profile: cProfile.Profile, kind: str, label: str) -> str:
+        """Saves `profile`, and drops the oldest profiles if there are too many. :return: the profile name."""
+        os.makedirs(self.directory, exist_ok=True)
+        # Names sort in the order profiles were taken, and can't be used to escape the directory.
+        name = '-'.join([
+            datetime.now(timezone.utc).strftime(_TIME_FORMAT), _slug(kind), _slug(label), uuid.uuid4().hex[:8]
+        ]) + '.prof'
+        profile.dump_stats(os.path.join(self.directory, name))
+        self._prune()
+        return name
+
+    def list(self) -> List[ProfileInfo]:
+        """:return: the profiles in the store, latest first."""
+        profiles = []
+        for name in self._names():
+            try:
+                size = os.path.getsize(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                # Pruned by someone else.
+                continue
+            match = _NAME.match(name)
+            profiles.append(ProfileInfo(
+                name=name,
+                kind=match.group('kind'),
+                label=match.group('label'),
+                time=datetime.strptime(match.group('time'), _TIME_FORMAT).replace(tzinfo=timezone.utc),
+                size=size
+            ))
+
+        return list(reversed(profiles))
+
+    def path(self, name: str) -> str:
+        """
+        :return: the path to profile `name`.
+        :raise LookupError: if there is no such profile.
+        """
+        path = os.path.join(self.directory, name)
+        if not _NAME.match(name) or not os.path.isfile(path):
+            raise LookupError(f'No such profile {name}.')
+        return path
+
+    def _names(self) -> List[str]:
+        try:
+            return sorted(name for name in os.listdir(self.directory) if _NAME.match(name))
+        except FileNotFoundError:
+            return []
+
+    def _prune(self):
+        names = self._names()
+        for name in names[:max(len(names) - self.max_profiles, 0)]:
+            try:
+                os.remove(os.path.join(self.directory, name))
+            except FileNotFoundError:
+                pass
+
+
+@contextmanager
+def profiled(store: ProfileStore, kind: str, label: str):
+    """Profiles the enclosed block, and saves the profile to `store`."""
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        try:
+            store.save(profile, kind, label)
+        except Exception:
+            # Whatever we were profiling matters more than its profile.
+            logger.exception(f'Failed to save {kind} profile for {label}.')
+
+
+@contextmanager
+def unprofiled():
+    yield
+
+
+class Profiler(BaseService):
+    """
+    Profiles code through :meth:`profile` while READY, and does nothing otherwise. Profiler services are not
+    started along with their groups, so profiling stays off until someone asks for it.
+
+    Profiles are per thread. Blocks which await in an asyncio event loop also profile whatever else the loop
+    runs in the meantime.
+    """
+    name = 'profiler'
+    autostart = False
+
+    def __init__(self, store: ProfileStore):
+        super().__init__()
+        self.store = store
+
+    @property
+    def enabled(self) -> bool:
+        return self.status().state == ServiceState.READY
+
+    def profile(self, kind: str, label: str):
+        """:return: a context manager which profiles the enclosed block if profiling is on."""
+        return profiled(self.store, kind, label) if self.enabled else unprofiled()
+
+    def status(self) -> ServiceStatus:
+        status = super().status()
+        return ServiceStatus(status.state, status.exception, status.traceback, {'directory': self.store.directory})
+
+    def _start_event_loop(self):
+        # There is nothing to run: being READY is all it takes.
+        self._signal_started()
+
+    def _halt_event_loop(self):
+        self._signal_terminated()
+
+
+def _slug(string: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.]+', '_', string).strip('_')
@@ -0,0 +1,259 @@
+"""
+Minimal RPC over a local Unix socket, which lets other processes (e.g. uWSGI workers) control services
+running in a daemon process. The protocol is line-delimited JSON: clients send one request per line, of the
+form ``{"method": name, "params": {...}}``, and get back either ``{"result": value}`` or
+``{"error": {"type": exception class name, "message": text}}``.
+
+Methods registered as streams answer with a null result, and then turn the connection into a one-way
+stream of ``{"item": value, "dropped": count}`` lines taken from a
+:class:`~callblocker.core.broadcast.Subscription`. An item of null is a heartbeat, sent every ``heartbeat``
+seconds (a top-level request attribute) when there is nothing else to send, so that clients can tell a
+quiet stream from a dead one.
+"""
+import asyncio
+import json
+import logging
+import os
+import socket
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from functools import partial
+from typing import Any, Callable, Collection, Dict, Optional
+
+from callblocker.core.broadcast import Subscription, SubscriptionClosed
+from callblocker.core.service import AsyncioService, AsyncioEventLoop
+
+logger = logging.getLogger(__name__)
+
+#: Default interval, in seconds, between stream heartbeats.
+DEFAULT_HEARTBEAT = 5
+
+#: Default number of streams (and waiting methods) a server serves at once.
+DEFAULT_MAX_STREAMS = 16
+
+#: Exceptions which are re-raised as themselves on the client side. Anything else becomes an
+#: :class:`RPCError`.
+KNOWN_ERRORS = {error.__name__: error for error in [LookupError, KeyError, ValueError, TypeError]}
+
+
+class RPCError(Exception):
+    def __init__(self, error_type: str, message: str):
+        super().__init__(f'{error_type}: {message}')
+        self.error_type = error_type
+
+
+class RPCServer(AsyncioService):
+    """
+    Serves `methods` and `streams` on the Unix socket at `path`. Methods run in the event loop's default
+    executor, so they may block; streams are callables returning a :class:`Subscription`.
+
+    Every open stream holds a thread waiting on its subscription, from an executor of its own so that streams
+    can't starve method calls. So do the methods named in `waiting`, which may wait for a while before
+    answering (e.g. long polls). Beyond `max_streams` of those at once, new ones are refused.
+    """
+    name = 'rpc server'
+
+    def __init__(self, path: str, methods: Dict[str, Callable[..., Any]],
+                 streams: Dict[str, Callable[..., Subscription]], aio_loop_service: AsyncioEventLoop,
+                 max_streams: int = DEFAULT_MAX_STREAMS, waiting: Collection[str] = ()):
+        super().__init__(aio_loop_service=aio_loop_service)
+        self.path = path
+        self.methods = methods
+        self.streams = streams
+        self.waiting = waiting
+        self.max_streams = max_streams
+        self._open_streams = 0
+        self._stream_executor = None
+
+    async def _event_loop(self):
+        # Leftover from a previous run.
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+        self._stream_executor = ThreadPoolExecutor(max_workers=self.max_streams, thread_name_prefix='rpc stream')
+        server = await asyncio.start_unix_server(self._serve, path=self.path, loop=self.aio_loop)
+        self._signal_started()
+        try:
+            # Runs until cancelled.
+            await asyncio.Event(loop=self.aio_loop).wait()
+        finally:
+            server.close()
+            await server.wait_closed()
+            os.unlink(self.path)
+            # Stream threads wait for at most a heartbeat, and waiting methods don't hold us up either.
+            self._stream_executor.shutdown(wait=False)
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+
+                try:
+                    request = json.loads(line.decode('utf-8'))
+                    method, params = request['method'], request.get('params', {})
+                    if method in self.streams:
+                        # Streams take over the connection.
+                        with self._stream_slot():
+                            subscription = await self._call(self.streams[method], params)
+                            await self._stream(subscription, writer, request.get('heartbeat', DEFAULT_HEARTBEAT))
+                        return
+                    if method not in self.methods:
+                        raise LookupError(f'No such method {method}.')
+                    if method in self.waiting:
+                        with self._stream_slot():
+                            result = await self._call(self.methods[method], params, self._stream_executor)
+                    else:
+                        result = await self._call(self.methods[method], params)
+                    response = {'result': result}
+                except (ConnectionError, asyncio.CancelledError):
+                    raise
+                except Exception as ex:
+                    response = {'error': {'type': type(ex).__name__, 'message': str(ex)}}
+
+                writer.write(_frame(response))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _call(self, method: Callable[..., Any], params: Dict[str, Any], executor=None):
+        return await self.aio_loop.run_in_executor(executor, partial(method, **params))
+
+    @contextmanager
+    def _stream_slot(self):
+        if self._open_streams >= self.max_streams:
+            raise RuntimeError(f'Too many open streams (max. {self.max_streams}).')
+        self._open_streams += 1
+        try:
+            yield
+        finally:
+            self._open_streams -= 1
+
+    async def _stream(self, subscription: Subscription, writer: asyncio.StreamWriter, heartbeat: float):
+        with subscription:
+            try:
+                writer.write(_frame({'result': None}))
+                while True:
+                    item = await self.aio_loop.run_in_executor(self._stream_executor, subscription.get, heartbeat)
+                    writer.write(_frame({'item': item, 'dropped': subscription.dropped}))
+                    # Fails once the client goes away, which is how the stream ends.
+                    await writer.drain()
+            except SubscriptionClosed:
+                pass
+
+
+class RPCClient(object):
+    """
+    Blocking client for an :class:`RPCServer`. Every call opens its own connection, so clients can be
+    shared between threads.
+    """
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+
+    def call(self, method: str, **params) -> Any:
+        return self.call_waiting(method, 0, **params)
+
+    def call_waiting(self, method: str, delay: float, **params) -> Any:
+        """Calls a method which may take up to `delay` seconds longer than usual (e.g. to long-poll)."""
+        with self._connect() as connection, connection.makefile('rwb') as stream:
+            connection.settimeout(delay + self.timeout)
+            return self._request(stream, {'method': method, 'params': params})
+
+    def stream(self, method: str, heartbeat: float = DEFAULT_HEARTBEAT,
+               decode: Callable[[Any], Any] = lambda item: item, **params) -> 'RPCStream':
+        """
+        Subscribes to a stream. `decode` gets applied to every item, and `heartbeat` is how often the server
+        should send a heartbeat when there is nothing else to send.
+        """
+        connection = self._connect()
+        try:
+            stream = connection.makefile('rwb')
+            self._request(stream, {'method': method, 'params': params, 'heartbeat': heartbeat})
+        except:
+            connection.close()
+            raise
+        # A long silence means the server is gone.
+        connection.settimeout(heartbeat + self.timeout)
+        return RPCStream(connection, stream, decode)
+
+    @staticmethod
+    def _request(stream, request: Dict[str, Any]) -> Any:
+        stream.write(_frame(request))
+        stream.flush()
+        response = _read(stream)
+
+        if 'error' in response:
+            error = response['error']
+            raise KNOWN_ERRORS.get(error['type'], partial(RPCError, error['type']))(error['message'])
+
+        return response['result']
+
+    def _connect(self) -> socket.socket:
+        connection = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        connection.settimeout(self.timeout)
+        try:
+            connection.connect(self.path)
+        except:
+            connection.close()
+            raise
+        return connection
+
+
+class RPCStream(object):
+    """
+    Client side of a stream. Quacks like a :class:`Subscription`, except that :meth:`get` returns None on
+    heartbeats rather than after a timeout of the caller's choosing.
+    """
+
+    def __init__(self, connection: socket.socket, stream, decode: Callable[[Any], Any]):
+        self.dropped = 0
+        self._connection = connection
+        self._stream = stream
+        self._decode = decode
+        self._closed = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def get(self, timeout: Optional[float] = None) -> Optional[Any]:
+        if self._closed:
+            raise SubscriptionClosed()
+
+        try:
+            message = _read(self._stream)
+        except (OSError, EOFError, ValueError):
+            self.close()
+            raise SubscriptionClosed()
+
+        self.dropped = message['dropped']
+        return self._decode(message['item']) if message['item'] is not None else None
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._stream.close()
+        self._connection.close()
+
+    @property
+    def closed(self) -> bool:
+        return self._closed
+
+
+def _frame(message: Dict[str, Any]) -> bytes:
+    return json.dumps(message).encode('utf-8') + b'\n'
+
+
+def _read(stream) -> Dict[str, Any]:
+    line = stream.readline()
+    if not line:
+        raise EOFError('Connection closed by the RPC server.')
+    return json.loads(line.decode('utf-8'))
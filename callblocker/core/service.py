@@ -4,11 +4,14 @@ import sys
 import traceback
 from abc import ABC, abstractmethod, abstractproperty
 from asyncio import AbstractEventLoop, Task
+from collections import namedtuple
+from datetime import datetime, timezone
 from enum import Enum
-from threading import Thread, Event
-from typing import Optional
+from threading import Thread, Event, get_ident
+from typing import Any, Callable, Dict, Optional
 
 from callblocker.core.concurrency import with_monitor, synchronized
+from callblocker.core.loopmonitor import LoopMonitor
 
 logger = logging.getLogger(__name__)
 
@@ -41,15 +44,23 @@ class ServiceStatus(object):
     :ivar exception: If ``state == ERRORED``, contains the exception which caused the service to die.
     :ivar traceback: If ``state == ERRORED``, contains a string representation of the traceback for the 
     exception that caused the service to die.
+    :ivar info: Optional, service-specific runtime information (e.g. measurements), as a JSON-friendly dict.
     """
 
-    def __init__(self, state: ServiceState, exception: Optional[Exception] = None, traceback: Optional[str] = None):
+    def __init__(self, state: ServiceState, exception: Optional[Exception] = None, traceback: Optional[str] = None,
+                 info: Optional[Dict[str, Any]] = None):
         self.state = state
         if (state == ServiceState.ERRORED) and (exception is None or traceback is None):
             raise ValueError('Service error states require an exception and a traceback.')
 
         self.exception = exception
         self.traceback = traceback
+        self.info = info
+
+
+#: A change in the state of a service. `time` is an aware datetime, and `exception` is set for transitions
+#: into ERRORED.
+StateTransition = namedtuple('StateTransition', ['service', 'time', 'previous', 'state', 'exception'])
 
 
 class Service(ABC):
@@ -60,6 +71,10 @@ class Service(ABC):
     code written elsewhere.
     """
 
+    #: Whether groups start the service along with the rest of them. Services which don't only get started
+    #: on request (e.g. through the services API).
+    autostart = True
+
     @abstractmethod
     def start(self) -> 'Service':
         """
@@ -99,6 +114,26 @@ class Service(ABC):
         """
         pass
 
+    @property
+    def stop_requested(self) -> bool:
+        """
+        :return: whether the service was last stopped on request, as opposed to having died or terminated on
+                 its own. Supervisors leave services which were stopped on request alone.
+        """
+        return False
+
+    def add_observer(self, observer: Callable[[StateTransition], None]):
+        """
+        Registers `observer` to be called with a :class:`StateTransition` whenever the service changes
+        state. Observers get called from whatever thread makes the transition, while the service holds its
+        lock, so they must return quickly and must not call back into the service. Services which do not
+        publish their transitions ignore observers.
+        """
+        pass
+
+    def remove_observer(self, observer: Callable[[StateTransition], None]):
+        pass
+
 
 @with_monitor
 class BaseService(Service):
@@ -108,6 +143,10 @@ class BaseService(Service):
     def __init__(self):
         self._error = {}
         self._state = ServiceState.INITIAL
+        # Statuses only change on transitions, so we build them once per transition.
+        self._status = ServiceStatus(self._state)
+        self._stop_requested = False
+        self._observers = []
 
         # Events for those who want synchronous start/stop.
         self.startup = Event()
@@ -125,8 +164,9 @@ class BaseService(Service):
             #    holding the monitor lock on start/stop.
 
             # 1. sets state to STARTING and clears the error state (this is a new run).
-            self._state = ServiceState.STARTING
             self._error = {}
+            self._stop_requested = False
+            self._transition(ServiceState.STARTING)
 
             # 2. clears the startup and shutdown events BEFORE firing the event loop.
             self.startup.clear()
@@ -151,7 +191,7 @@ class BaseService(Service):
         # Once the startup signal is given, sets the state to running. Clearly, the service may have
         # already died in the meantime, but the "death signal" won't be missed as we're holding the
         # same monitor lock as _handle_termination.
-        self._state = ServiceState.READY
+        self._transition(ServiceState.READY)
         logger.info(f'{self.name} is now running')
         self.startup.set()
         return self
@@ -169,7 +209,8 @@ class BaseService(Service):
             #    we have to account for that.
 
             # 1. Sets the service state to stopping.
-            self._state = ServiceState.STOPPING
+            self._stop_requested = True
+            self._transition(ServiceState.STOPPING)
             logger.info(f'Stopping service {self.name}')
 
             # 2. Halts the event loop. If the service is already dead, this should be a no-op.
@@ -191,14 +232,40 @@ class BaseService(Service):
     def _signal_terminated(self):
         # Service had to be running.
         self._allow_states(*ServiceState.running_states())
-        self._state = ServiceState.ERRORED if self._error else ServiceState.TERMINATED
+        self._transition(ServiceState.ERRORED if self._error else ServiceState.TERMINATED)
         logger.info(f'{self.name} has terminated with state {self._state}')
         self.shutdown.set()
         # Service may die during startup, so we have to set this too.
         self.startup.set()
 
     def status(self) -> ServiceStatus:
-        return ServiceStatus(self._state, **self._error)
+        return self._status
+
+    @property
+    def stop_requested(self) -> bool:
+        return self._stop_requested
+
+    @synchronized
+    def add_observer(self, observer: Callable[[StateTransition], None]):
+        # Copy-on-write, so that transitions can iterate without copying.
+        self._observers = self._observers + [observer]
+
+    @synchronized
+    def remove_observer(self, observer: Callable[[StateTransition], None]):
+        self._observers = [other for other in self._observers if other != observer]
+
+    def _transition(self, state: ServiceState):
+        # Must be called with the monitor lock held, so that observers see transitions in order.
+        transition = StateTransition(
+            self, datetime.now(timezone.utc), self._state, state, self._error.get('exception')
+        )
+        self._state = state
+        self._status = ServiceStatus(state, **self._error)
+        for observer in self._observers:
+            try:
+                observer(transition)
+            except Exception:
+                logger.exception(f'State observer for {self.name} failed.')
 
     @abstractmethod
     def _start_event_loop(self):
@@ -328,19 +395,42 @@ class ThreadedService(BaseService):
 
 class AsyncioEventLoop(ThreadedService):
     """
-    A :class:`ThreadedService` which spawns an asyncio event loop in a separate thread.
+    A :class:`ThreadedService` which spawns an asyncio event loop in a separate thread. If `probe_interval`
+    is given, the loop gets watched by a :class:`LoopMonitor`, which reports lag (and, if
+    `slow_callback_threshold` is also given, stalls) in the service status. Loops are created by
+    `loop_factory` (see :mod:`callblocker.core.eventloops`), once per start.
     """
     name = 'asyncio event loop'
 
-    def __init__(self):
+    def __init__(self, probe_interval: Optional[float] = None, slow_callback_threshold: Optional[float] = None,
+                 loop_factory: Callable[[], AbstractEventLoop] = asyncio.new_event_loop):
         super().__init__()
         self._aio_loop = None
+        self.loop_factory = loop_factory
+        self.probe_interval = probe_interval
+        self.slow_callback_threshold = slow_callback_threshold
+        self.monitor: Optional[LoopMonitor] = None
+
+    def status(self) -> ServiceStatus:
+        status = super().status()
+        if self.monitor is None:
+            return status
+        return ServiceStatus(status.state, status.exception, status.traceback, self.monitor.info())
 
     def _event_loop(self):
-        self._aio_loop = asyncio.new_event_loop()
+        self._aio_loop = self.loop_factory()
         asyncio.set_event_loop(self._aio_loop)
+        if self.probe_interval is not None:
+            self.monitor = LoopMonitor(
+                self._aio_loop, get_ident(), self.probe_interval, self.slow_callback_threshold
+            )
+            self.monitor.start()
         self._signal_started()
-        self._aio_loop.run_forever()
+        try:
+            self._aio_loop.run_forever()
+        finally:
+            if self.monitor is not None:
+                self.monitor.stop()
 
     def _halt_event_loop(self):
         # Stopping this loop will cancel all tasks.
@@ -1,50 +1,218 @@
 import logging
+import time
 from collections import OrderedDict, namedtuple
-from typing import TypeVar
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+from callblocker.core.broadcast import Broadcaster
+from callblocker.core.service import ServiceState
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T', bound='Service')
 
-ServiceEntry = namedtuple('ServiceEntry', ['service', 'deps'])
+#: A service in a :class:`ServiceGroupSpec`, along with the ids of the services it depends on. Services
+#: without dependencies can be given as a bare initializer instead.
+ServiceEntry = namedtuple('ServiceEntry', ['initializer', 'deps'])
+
+#: When a service was started, relative to the start of its group, and how long it took to start, in seconds.
+#: `state` is the state the service was in once done starting.
+TimelineEntry = namedtuple('TimelineEntry', ['service', 'started', 'elapsed', 'state'])
 
 
 class ServiceGroup(object):
+    """
+    A group of services with dependencies between them. A service is only started once the services it
+    depends on are READY, and stopped before any of them are, but independent services get started and
+    stopped concurrently. Startup therefore takes as long as the slowest chain of dependencies, rather than
+    the sum of every service's start time.
+    """
 
     def __init__(self):
         self._services = OrderedDict()
+        self._deps = {}
+        #: Timeline for the last :meth:`start`, ordered by start time.
+        self.timeline: List[TimelineEntry] = []
+        #: :class:`~callblocker.core.service.StateTransition` objects of every service in the group, as they
+        #: happen.
+        self.transitions = Broadcaster(buffer_size=100)
 
     @property
     def services(self):
         return self._services.values()
 
-    def register_service(self, service: T) -> T:
+    def register_service(self, service: T, deps: Iterable[str] = ()) -> T:
+        deps = tuple(deps)
+        missing = [dep for dep in deps if dep not in self._services]
+        if missing:
+            raise ValueError(f'Service {service.id} depends on unknown services {missing}.')
+
         self._services[service.id] = service
+        self._deps[service.id] = deps
         setattr(self, service.id, service)
+        service.add_observer(self.transitions.publish)
         return service
 
-    def start(self):
-        # Will improve once we have dep tracking and chained
-        # async startup/shutdown.
-        for service in self.services:
-            service.sync_start()
+    def dependencies(self, id: str) -> Tuple[str, ...]:
+        return self._deps[id]
+
+    def dependents(self, id: str, transitive: bool = False) -> List[str]:
+        """:return: the ids of the services which depend on `id`, in registration order."""
+        dependents = {id}
+        for other, deps in self._deps.items():
+            if (dependents if transitive else {id}).intersection(deps):
+                dependents.add(other)
+        return [other for other in self._services if other in dependents and other != id]
+
+    def start(self, timeout: Optional[float] = None, ids: Optional[Iterable[str]] = None):
+        """
+        Starts every service which is not running yet, except for those which are not started automatically
+        (see :attr:`~callblocker.core.service.Service.autostart`), or every service in `ids`. Services whose
+        dependencies fail to become READY (within `timeout` seconds each, if given) are not started at all.
+        """
+        if ids is None:
+            ids = [id for id, service in self._services.items() if service.autostart]
+        ids = self._ordered(ids)
+        origin = time.perf_counter()
+        timeline = []
+
+        def start(service, deps: List[Future]) -> bool:
+            if not all(dep.result() for dep in deps) or not self._deps_ready(service.id):
+                logger.warning(f'Not starting {service.name}, as services it depends on failed to start.')
+                return False
+
+            if service.status().state == ServiceState.READY:
+                return True
+
+            started = time.perf_counter()
+            try:
+                service.sync_start(timeout)
+            except Exception:
+                logger.exception(f'Failed to start {service.name}.')
+            state = service.status().state
+            timeline.append(TimelineEntry(service.id, started - origin, time.perf_counter() - started, state))
+
+            if state == ServiceState.STARTING:
+                logger.warning(f'{service.name} did not start within {timeout} seconds.')
+            return state == ServiceState.READY
+
+        # Registration order is a topological order, as services can only depend on those registered before them.
+        self._in_order(ids, self.dependencies, start)
+
+        self.timeline = sorted(timeline, key=lambda entry: entry.started)
+        logger.info(self.timeline_report())
+
+    def shutdown(self, timeout: Optional[float] = None, ids: Optional[Iterable[str]] = None):
+        """
+        Stops every READY service (or every READY service in `ids`), dependents first. A service whose
+        dependents do not stop within `timeout` seconds gets stopped anyway.
+        """
+
+        def stop(service, dependents: List[Future]) -> bool:
+            for dependent in dependents:
+                dependent.result()
+
+            if service.status().state != ServiceState.READY:
+                return True
 
-    def shutdown(self):
-        for service in self.services:
-            service.sync_stop()
+            try:
+                service.sync_stop(timeout)
+            except Exception:
+                logger.exception(f'Failed to stop {service.name}.')
+
+            if service.status().state in ServiceState.running_states():
+                logger.warning(f'{service.name} did not stop within {timeout} seconds.')
+                return False
+            return True
+
+        self._in_order(list(reversed(self._ordered(ids))), self.dependents, stop)
+
+    def restart(self, id: str, timeout: Optional[float] = None) -> List[str]:
+        """
+        Restarts a service along with the services which (transitively) depend on it, as these usually
+        can't survive their dependencies going away. Dependents which were stopped on request (and did not
+        error while stopping) are left alone.
+
+        :return: the ids of the services which were restarted.
+        """
+        ids = [id] + [
+            dependent for dependent in self.dependents(id, transitive=True)
+            if not self._services[dependent].stop_requested
+            or self._services[dependent].status().state == ServiceState.ERRORED
+        ]
+        self.shutdown(timeout, ids)
+        self.start(timeout, ids)
+        return ids
+
+    def timeline_report(self) -> str:
+        """:return: a human-readable report of the startup timeline, with its critical path."""
+        if not self.timeline:
+            return 'No services were started.'
+
+        lines = [f'Started {len(self.timeline)} services in {_end(max(self.timeline, key=_end)):.3f}s '
+                 f'(critical path: {" > ".join(self._critical_path())}):']
+        for entry in self.timeline:
+            lines.append(f'  {entry.service:<16} at {entry.started:7.3f}s, took {entry.elapsed:7.3f}s, '
+                         f'{entry.state.name}')
+        return '\n'.join(lines)
+
+    def _critical_path(self) -> List[str]:
+        entries = {entry.service: entry for entry in self.timeline}
+        path = [max(self.timeline, key=_end).service]
+        while True:
+            deps = [entries[dep] for dep in self._deps[path[-1]] if dep in entries]
+            if not deps:
+                return list(reversed(path))
+            path.append(max(deps, key=_end).service)
+
+    def _ordered(self, ids: Optional[Iterable[str]]) -> List[str]:
+        if ids is None:
+            return list(self._services)
+        ids = set(ids)
+        return [id for id in self._services if id in ids]
+
+    def _deps_ready(self, id: str) -> bool:
+        return all(self._services[dep].status().state == ServiceState.READY for dep in self._deps[id])
+
+    def _in_order(self, ids: Sequence[str], waits_for: Callable[[str], Iterable[str]],
+                  task: Callable[['Service', List[Future]], bool]) -> Dict[str, bool]:
+        # Runs `task` for every service in its own thread, handing it the futures of the services in `ids`
+        # it should wait for, which must come earlier in `ids`. One thread per service means waiting never
+        # deadlocks.
+        futures = OrderedDict()
+        with ThreadPoolExecutor(max_workers=max(len(ids), 1), thread_name_prefix='service group') as executor:
+            for id in ids:
+                futures[id] = executor.submit(
+                    task, self._services[id], [futures[other] for other in waits_for(id) if other in futures]
+                )
+
+        return {id: future.result() for id, future in futures.items()}
 
 
 class ServiceGroupSpec(object):
+    """
+    Describes a :class:`ServiceGroup`. Services are given as keyword arguments, each one either an initializer
+    (a function taking the group, from which it can get the services it depends on), or a
+    :class:`ServiceEntry` with an initializer and the ids of the services it depends on. Dependencies must
+    come before their dependents.
+    """
+
     def __init__(self, **kwargs):
         self.services = kwargs
 
     def bootstrap(self) -> ServiceGroup:
         group = ServiceGroup()
-        for key, initializer in self.services.items():
-            instance = initializer(group)
+        for key, entry in self.services.items():
+            if not isinstance(entry, ServiceEntry):
+                entry = ServiceEntry(entry, ())
+            instance = entry.initializer(group)
             # I could complicate this by patching in a mixin with a readonly property
             # or using descriptors, but this is simply easier.
             instance.id = key
-            group.register_service(instance)
+            group.register_service(instance, entry.deps)
 
         return group
+
+
+def _end(entry: TimelineEntry) -> float:
+    return entry.started + entry.elapsed
@@ -0,0 +1,69 @@
+"""
+Tools for finding out where startup time goes. :class:`ImportTimer` records how long each module takes to
+import, much like ``python -X importtime`` does on Python 3.7+, and :class:`Phases` times the larger steps
+of startup (e.g. Django setup, or bootstrapping services).
+
+Modules only cost anything the first time they are imported, so profiles are only meaningful when taken
+in a fresh interpreter.
+"""
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from typing import List
+
+import _frozen_importlib
+
+#: Time spent importing a module, in seconds. `self` excludes time spent importing other modules.
+ImportTiming = namedtuple('ImportTiming', ['module', 'self', 'cumulative'])
+
+
+class ImportTimer(object):
+    """
+    Times imports while active (as a context manager). Works by wrapping the import system's
+    ``_find_and_load``, which is what the interpreter calls for every module that is not imported yet.
+    Imports are assumed to happen in a single thread; imports running concurrently in other threads get
+    their time attributed to whatever the main thread is importing.
+    """
+
+    def __init__(self):
+        self.imports: List[ImportTiming] = []
+        self._find_and_load = None
+        # Time spent in nested imports, for each import in progress.
+        self._nested = [0.0]
+
+    def __enter__(self):
+        self._find_and_load = _frozen_importlib._find_and_load
+        _frozen_importlib._find_and_load = self._timed
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _frozen_importlib._find_and_load = self._find_and_load
+
+    def slowest(self, n: int) -> List[ImportTiming]:
+        return sorted(self.imports, key=lambda timing: timing.cumulative, reverse=True)[:n]
+
+    def _timed(self, name, import_):
+        self._nested.append(0.0)
+        start = time.perf_counter()
+        try:
+            return self._find_and_load(name, import_)
+        finally:
+            cumulative = time.perf_counter() - start
+            nested = self._nested.pop()
+            self._nested[-1] += cumulative
+            self.imports.append(ImportTiming(name, cumulative - nested, cumulative))
+
+
+class Phases(object):
+    """Wall-clock timings, in seconds, for named phases of startup, in the order they ran."""
+
+    def __init__(self):
+        self.timings = OrderedDict()
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = time.perf_counter() - start
@@ -0,0 +1,160 @@
+"""
+Restarts services which die, according to per-service :class:`RestartPolicy` objects. Restarts back off
+exponentially, and cascade to the services which depend on the restarted one (see
+:meth:`~callblocker.core.servicegroup.ServiceGroup.restart`), so that e.g. the call monitor gets reattached
+when the modem comes back.
+
+The supervisor reacts to the state transitions published by the group, so dead services get noticed right
+away. It also checks on every service every `interval` seconds, as a safety net for services which do not
+publish their transitions.
+"""
+import logging
+import time
+from collections import deque
+from enum import Enum
+from typing import Dict, Optional
+
+from callblocker.core.broadcast import SubscriptionClosed
+from callblocker.core.metrics import Counter
+from callblocker.core.service import Service, ServiceState, ThreadedService
+from callblocker.core.servicegroup import ServiceGroup
+
+logger = logging.getLogger(__name__)
+
+RESTARTS = Counter('callblocker_service_restarts_total', 'Services restarted by the supervisor, by service.',
+                   ['service'])
+
+
+class Restart(Enum):
+    ALWAYS = 'always'  #: Restarts services which error, or which terminate without having been asked to.
+    ON_FAILURE = 'on-failure'  #: Restarts services which error.
+    NEVER = 'never'  #: Leaves dead services alone.
+
+
+class RestartPolicy(object):
+    """
+    Describes when and how fast a service gets restarted.
+
+    :ivar restart: the :class:`Restart` mode, which says which terminations warrant a restart.
+    :ivar max_restarts: how many restarts are allowed within `window` seconds, or None for no limit. Once the
+                        limit is reached, the service is left down until its oldest restart falls out of the
+                        window.
+    :ivar backoff: how long to wait, in seconds, before restarting a service which has not been restarted
+                   within the last `window` seconds. The wait doubles with every restart in the window, up to
+                   `max_backoff`.
+    """
+
+    def __init__(self, restart: str = Restart.ON_FAILURE.value, max_restarts: Optional[int] = None,
+                 window: float = 60, backoff: float = 1, max_backoff: float = 60):
+        self.restart = Restart(restart)
+        self.max_restarts = max_restarts
+        self.window = window
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+
+    def wants_restart(self, service: Service) -> bool:
+        if self.restart == Restart.NEVER:
+            return False
+
+        state = service.status().state
+        return state == ServiceState.ERRORED or (
+            self.restart == Restart.ALWAYS and state == ServiceState.TERMINATED and not service.stop_requested
+        )
+
+    def delay(self, restarts: int) -> float:
+        """:return: how long to wait before restarting a service which has been restarted `restarts` times."""
+        return min(self.backoff * 2 ** restarts, self.max_backoff)
+
+
+class Supervisor(ThreadedService):
+    """
+    Checks on the services of a :class:`ServiceGroup` whenever one of them changes state (and at least every
+    `interval` seconds), and restarts the ones which died according to their policies. Services without a
+    policy of their own get the `default` one. Services whose dependencies are down are left for the restart
+    of their dependencies to pick up.
+    """
+    name = 'supervisor'
+
+    def __init__(self, group: ServiceGroup, policies: Dict[str, RestartPolicy], default: RestartPolicy,
+                 interval: float, timeout: Optional[float] = None):
+        super().__init__()
+        self.group = group
+        self.policies = policies
+        self.default = default
+        self.interval = interval
+        self.timeout = timeout
+        self._subscription = None
+        # Restart times within the policy window, and when the next restart is due, by service id.
+        self._restarts: Dict[str, deque] = {}
+        self._due: Dict[str, float] = {}
+        self._throttled = set()
+
+    def policy(self, id: str) -> RestartPolicy:
+        return self.policies.get(id, self.default)
+
+    def check(self):
+        """Restarts the services which are due for a restart."""
+        for service in list(self.group.services):
+            if service is self or self._halting():
+                continue
+
+            if self._wants_restart(service):
+                self._maybe_restart(service, time.monotonic())
+            else:
+                self._due.pop(service.id, None)
+                self._throttled.discard(service.id)
+
+    def _wants_restart(self, service: Service) -> bool:
+        return self.policy(service.id).wants_restart(service) and all(
+            getattr(self.group, dep).status().state == ServiceState.READY
+            for dep in self.group.dependencies(service.id)
+        )
+
+    def _maybe_restart(self, service: Service, now: float):
+        policy = self.policy(service.id)
+        restarts = self._restarts.setdefault(service.id, deque())
+        while restarts and restarts[0] <= now - policy.window:
+            restarts.popleft()
+
+        if policy.max_restarts is not None and len(restarts) >= policy.max_restarts:
+            if service.id not in self._throttled:
+                logger.error(f'{service.name} has been restarted {len(restarts)} times in the last '
+                             f'{policy.window} seconds. Leaving it down for now.')
+                self._throttled.add(service.id)
+            return
+        self._throttled.discard(service.id)
+
+        due = self._due.setdefault(service.id, now + policy.delay(len(restarts)))
+        if now < due:
+            return
+
+        del self._due[service.id]
+        restarts.append(now)
+        logger.warning(f'{service.name} is {service.status().state.name}, restarting it.')
+        RESTARTS.labels(service.id).inc()
+        restarted = self.group.restart(service.id, self.timeout)
+        if len(restarted) > 1:
+            logger.info(f'Also restarted {", ".join(restarted[1:])}, which depend on {service.id}.')
+
+    def _event_loop(self):
+        self._subscription = self.group.transitions.subscribe()
+        self._signal_started()
+        try:
+            while True:
+                # Wakes up on transitions, and for restarts which are waiting out their backoff.
+                timeout = min([self.interval] + [due - time.monotonic() for due in self._due.values()])
+                self._subscription.get(max(timeout, 0))
+                try:
+                    self.check()
+                except Exception:
+                    # The supervisor should be the last thing to go down.
+                    logger.exception('Failed to check on services.')
+        except SubscriptionClosed:
+            pass
+
+    def _halting(self) -> bool:
+        return self._subscription is None or self._subscription.closed
+
+    def _halt_event_loop(self):
+        if self._subscription is not None:
+            self._subscription.close()
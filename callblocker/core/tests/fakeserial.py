@@ -75,18 +75,26 @@ class ScriptedModem(SerialDeviceFactory, Protocol, AsyncioService):
     ScriptedModem emulates the behavior of a serial modem by following a pre-programmed script. It expects
     commands to be issued in a certain order. It also supports timed actions (e.g., after 3 seconds, generate
     this command).
+
+    With `auto_reply` set, the modem instead answers OK to every AT command, and keeps track of whether the
+    line is off hook (between ATH1 and ATH0) and of how many times it got hung up. This lets load generators
+    (see :mod:`callblocker.blocker.callstorm`) ring it with :meth:`ring` for as long as they like.
     """
 
     name = 'fake modem'
 
-    def __init__(self, aio_loop_service: AsyncioEventLoop, command_mode=False, defer_script=False):
+    def __init__(self, aio_loop_service: AsyncioEventLoop, command_mode=False, defer_script=False,
+                 auto_reply=False):
         AsyncioService.__init__(self, aio_loop_service)
         self.script = None
         self._deferred_actions = []
         self.out_buffer = None
         self.in_buffer = None
 
-        self.command_mode = command_mode
+        self.command_mode = command_mode or auto_reply
+        self.auto_reply = auto_reply
+        self.off_hook = False
+        self.hangups = 0
 
         self.defer_script = defer_script
         self._defer_event = None
@@ -128,6 +136,15 @@ class ScriptedModem(SerialDeviceFactory, Protocol, AsyncioService):
         if self._defer_event:
             self.aio_loop.call_soon_threadsafe(self._defer_event.set)
 
+    def ring(self, cid: str):
+        """Rings with a call from `cid`. Must be called from the event loop."""
+        self._allow_states(ServiceState.READY)
+        self._output('RING')
+        self._output(f'NMBR = {cid}')
+
+    def _output(self, line: str):
+        self.out_buffer.feed_data(line.encode(CX930xx_fake.encoding) + CX930xx_fake.newline)
+
     def _add_action(self, action):
         if not self._add_action_now(action):
             self._deferred_actions.append(action)
@@ -197,6 +214,14 @@ class ScriptedModem(SerialDeviceFactory, Protocol, AsyncioService):
             self.out_buffer.feed_data(payload)
             return True
 
+        command = command.strip()
+        if self.auto_reply and command.startswith('AT'):
+            if command in ('ATH1', 'ATH0'):
+                self.off_hook = command == 'ATH1'
+                self.hangups += command == 'ATH0'
+            self._output('OK')
+            return True
+
         return False
 
     async def drain(self):
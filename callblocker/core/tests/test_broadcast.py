@@ -0,0 +1,58 @@
+from threading import Thread
+
+import pytest
+
+from callblocker.core.broadcast import Broadcaster, SubscriptionClosed
+
+
+def test_delivers_events_to_all_subscribers():
+    broadcaster = Broadcaster(buffer_size=10)
+    subscriptions = [broadcaster.subscribe() for _ in range(3)]
+
+    for i in range(5):
+        broadcaster.publish(i)
+
+    for subscription in subscriptions:
+        assert [subscription.get(timeout=0) for _ in range(5)] == list(range(5))
+        assert subscription.get(timeout=0) is None
+        assert subscription.dropped == 0
+
+
+def test_drops_oldest_events_when_full():
+    broadcaster = Broadcaster(buffer_size=3)
+    subscription = broadcaster.subscribe()
+
+    for i in range(5):
+        broadcaster.publish(i)
+
+    assert subscription.dropped == 2
+    assert [subscription.get(timeout=0) for _ in range(3)] == [2, 3, 4]
+
+
+def test_get_waits_for_events():
+    broadcaster = Broadcaster(buffer_size=3)
+    subscription = broadcaster.subscribe()
+
+    Thread(target=lambda: broadcaster.publish('event')).start()
+
+    assert subscription.get(timeout=10) == 'event'
+
+
+def test_close_unsubscribes():
+    broadcaster = Broadcaster(buffer_size=3)
+    with broadcaster.subscribe() as subscription:
+        assert broadcaster.subscriptions == [subscription]
+
+    assert broadcaster.subscriptions == []
+    with pytest.raises(SubscriptionClosed):
+        subscription.get(timeout=0)
+
+
+def test_transforms_events_per_subscription():
+    broadcaster = Broadcaster(buffer_size=10)
+    plain, doubled = broadcaster.subscribe(), broadcaster.subscribe(transform=lambda event: event * 2)
+
+    broadcaster.publish(3)
+
+    assert plain.get(timeout=0) == 3
+    assert doubled.get(timeout=0) == 6
@@ -0,0 +1,117 @@
+from threading import Timer, Thread
+
+import pytest
+from psycopg2 import extensions
+
+from callblocker.core.db.pool import ConnectionPool, PoolTimeout, use_reserved_connections
+
+
+class FakeConnection(object):
+    def __init__(self):
+        self.closed = 0
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+        self.rollbacks = 0
+
+    def get_transaction_status(self):
+        return self.status
+
+    def rollback(self):
+        self.rollbacks += 1
+        self.status = extensions.TRANSACTION_STATUS_IDLE
+
+    def close(self):
+        self.closed = 1
+
+
+def test_reuses_connections():
+    pool = ConnectionPool(FakeConnection, size=2, timeout=1)
+
+    first, new = pool.acquire()
+    assert new
+    pool.release(first)
+
+    again, new = pool.acquire()
+    assert again is first and not new
+    assert (pool.in_use, pool.idle) == (1, 0)
+
+
+def test_waits_for_connections():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=0.1, name='test')
+    connection, _ = pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    pool.timeout = 10
+    Timer(0.1, lambda: pool.release(connection)).start()
+    assert pool.acquire() == (connection, False)
+
+
+def test_keeps_reserved_connections():
+    pool = ConnectionPool(FakeConnection, size=2, timeout=0.1, reserved=1)
+    pool.acquire()
+
+    with pytest.raises(PoolTimeout):
+        pool.acquire()
+
+    acquired = []
+
+    def reserving():
+        use_reserved_connections()
+        acquired.append(pool.acquire())
+
+    thread = Thread(target=reserving)
+    thread.start()
+    thread.join()
+    assert len(acquired) == 1
+    assert pool.in_use == 2
+
+
+def test_cleans_up_released_connections():
+    pool = ConnectionPool(FakeConnection, size=3, timeout=1)
+    dirty, broken, discarded = [pool.acquire()[0] for _ in range(3)]
+
+    dirty.status = extensions.TRANSACTION_STATUS_INTRANS
+    broken.closed = 2
+    pool.release(dirty)
+    pool.release(broken)
+    pool.release(discarded, discard=True)
+
+    assert dirty.rollbacks == 1 and not dirty.closed
+    assert discarded.closed
+    assert (pool.in_use, pool.idle) == (0, 1)
+
+
+def test_expires_connections():
+    pool = ConnectionPool(FakeConnection, size=1, timeout=1, max_age=0)
+    old, _ = pool.acquire()
+    pool.release(old)
+
+    connection, new = pool.acquire()
+    assert new and connection is not old
+    assert old.closed
+
+
+@pytest.mark.django_db
+def test_sets_up_sessions_once(settings):
+    from django.db import connection
+
+    def session():
+        # Django connections are per thread, so this gets a wrapper of its own.
+        try:
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT show_limit(), pg_backend_pid()')
+                return (connection.new_session,) + cursor.fetchone()
+        finally:
+            connection.close()
+
+    sessions = []
+    for _ in range(2):
+        thread = Thread(target=lambda: sessions.append(session()))
+        thread.start()
+        thread.join()
+
+    (_, first_limit, first_pid), (new, limit, pid) = sessions
+    # Same physical connection, which still has its session settings.
+    assert not new and pid == first_pid
+    assert limit == first_limit == pytest.approx(settings.TRGM_SIM_THRESHOLD)
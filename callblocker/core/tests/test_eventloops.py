@@ -0,0 +1,38 @@
+import asyncio
+
+import pytest
+
+from callblocker.core.eventloops import loop_factory, resolve
+from callblocker.core.service import AsyncioEventLoop
+
+created = []
+
+
+def recording_loop():
+    loop = asyncio.new_event_loop()
+    created.append(loop)
+    return loop
+
+
+def test_resolves_backends():
+    assert resolve('asyncio') is asyncio.new_event_loop
+    assert resolve(f'{__name__}.recording_loop') is recording_loop
+
+    for backend in ['no_such_module.new_event_loop', 'asyncio.no_such_factory', 'asyncio.BaseEventLoop.__doc__']:
+        with pytest.raises(ImportError):
+            resolve(backend)
+
+
+def test_falls_back_to_asyncio(caplog):
+    assert loop_factory(f'{__name__}.no_such_loop') == ('asyncio', asyncio.new_event_loop)
+    assert 'is not available' in caplog.text
+
+
+def test_runs_on_given_backend():
+    aio_loop = AsyncioEventLoop(loop_factory=recording_loop)
+    aio_loop.sync_start(10)
+    try:
+        assert created[-1] is aio_loop.aio_loop
+        assert asyncio.run_coroutine_threadsafe(asyncio.sleep(0, result=42), aio_loop.aio_loop).result(5) == 42
+    finally:
+        aio_loop.sync_stop(10)
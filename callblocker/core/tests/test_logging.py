@@ -0,0 +1,181 @@
+import logging
+import os
+from logging import Formatter, Handler
+from threading import Timer, Event
+
+import pytest
+
+from callblocker.core import logging as tail_logging
+from callblocker.core.logging import LogBuffer, TailHandler, LogEntry, select, QueueingHandler, LOG_RECORDS_DROPPED
+from callblocker.core.tests.utils import await_predicate
+
+
+def test_returns_entries_after_cursor():
+    buffer = LogBuffer(5)
+    for i in range(3):
+        buffer.append(f'entry {i}')
+
+    assert buffer.last == 2
+    assert buffer.since() == [(0, 'entry 0'), (1, 'entry 1'), (2, 'entry 2')]
+    assert buffer.since(1) == [(2, 'entry 2')]
+    assert buffer.since(2) == []
+
+
+def test_wraps_around():
+    buffer = LogBuffer(3)
+    for i in range(7):
+        buffer.append(f'entry {i}')
+
+    # Only the last three entries survive, with their original sequence numbers.
+    assert buffer.since() == [(4, 'entry 4'), (5, 'entry 5'), (6, 'entry 6')]
+    assert buffer.since(1) == [(4, 'entry 4'), (5, 'entry 5'), (6, 'entry 6')]
+    assert buffer.since(5) == [(6, 'entry 6')]
+
+
+def test_waits_for_new_entries():
+    buffer = LogBuffer(3)
+    buffer.append('old')
+
+    assert buffer.wait(0, timeout=0.1) == []
+
+    Timer(0.1, lambda: buffer.append('new')).start()
+    assert buffer.wait(0, timeout=10) == [(1, 'new')]
+
+
+class CountingArg(object):
+    def __init__(self):
+        self.formatted = 0
+
+    def __str__(self):
+        self.formatted += 1
+        return 'arg'
+
+
+def test_formats_lazily(monkeypatch):
+    # TailHandler registers itself globally. Makes sure the one from the settings gets restored.
+    monkeypatch.setattr(tail_logging, '_handler', tail_logging.handler())
+
+    handler = TailHandler(tail_size=10)
+    handler.setFormatter(Formatter('{levelname} {name} {message}', style='{'))
+    logger = logging.getLogger('callblocker.test.lazy')
+    logger.addHandler(handler)
+    # Other handlers would format the message.
+    monkeypatch.setattr(logger, 'propagate', False)
+    try:
+        arg = CountingArg()
+        logger.warning('message with %s', arg)
+        assert arg.formatted == 0
+
+        [(_, entry)] = handler.buffer.since()
+        assert entry.msg == 'message with %s'
+        assert handler.render(entry) == 'WARNING callblocker.test.lazy message with arg'
+        assert arg.formatted == 1
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_selects_entries():
+    entries = list(enumerate([
+        LogEntry(10.0, logging.INFO, 'callblocker.core.modem', 'modem', 'f', 1, 't', 'a', (), None),
+        LogEntry(20.0, logging.WARNING, 'callblocker.core.modem', 'modem', 'f', 1, 't', 'b', (), None),
+        LogEntry(30.0, logging.ERROR, 'callblocker.blocker.callmonitor', 'callmonitor', 'f', 1, 't', 'c', (), None),
+    ]))
+
+    def messages(**kwargs):
+        return [entry.msg for _, entry in select(entries, **kwargs)]
+
+    assert messages() == ['a', 'b', 'c']
+    assert messages(level=logging.WARNING) == ['b', 'c']
+    assert messages(logger='callblocker.core') == ['a', 'b']
+    assert messages(since=20.0) == ['b', 'c']
+    assert messages(since=15.0, until=30.0) == ['b']
+    assert messages(level=logging.WARNING, logger='callblocker.core') == ['b']
+
+
+class BlockingHandler(Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.unblock = Event()
+
+    def emit(self, record):
+        self.unblock.wait(10)
+        self.records.append(record)
+
+
+def test_queueing_handler_drops_records_when_full():
+    target = BlockingHandler()
+    target.name = 'test-blocking-target'
+
+    handler = QueueingHandler(handlers=['test-blocking-target'], queue_size=2)
+    handler.name = 'test-queue'
+    logger = logging.getLogger('callblocker.test.queue')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('record 0')
+        # Waits for the listener to pick up the first record and block on it.
+        await_predicate(lambda: handler.queue.empty(), 5)
+
+        # Fills up the queue, and then some.
+        for i in range(1, 6):
+            logger.warning('record %d', i)
+
+        assert handler.dropped == 3
+        assert LOG_RECORDS_DROPPED.labels('test-queue').value == 3
+    finally:
+        target.unblock.set()
+        handler.close()
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+    # Records are passed on untouched, and in order.
+    assert [(record.msg, record.args) for record in target.records] == [
+        ('record 0', ()), ('record %d', (1,)), ('record %d', (2,))
+    ]
+
+
+class CollectingHandler(Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+@pytest.mark.skipif(not hasattr(os, 'fork'), reason='needs fork')
+def test_queueing_handler_survives_forking():
+    target = CollectingHandler()
+    target.name = 'test-collecting-target'
+
+    handler = QueueingHandler(handlers=['test-collecting-target'])
+    logger = logging.getLogger('callblocker.test.fork')
+    logger.addHandler(handler)
+    logger.propagate = False
+    try:
+        logger.warning('before fork')
+        await_predicate(lambda: len(target.records) == 1, 5)
+
+        pid = os.fork()
+        if pid == 0:
+            # The child has no listener thread until it logs.
+            handled = False
+            try:
+                logger.warning('after fork')
+                await_predicate(lambda: len(target.records) == 2, 5)
+                handled = True
+            finally:
+                os._exit(0 if handled else 1)
+
+        _, status = os.waitpid(pid, 0)
+        assert os.WEXITSTATUS(status) == 0
+    finally:
+        handler.close()
+        logger.removeHandler(handler)
+        logger.propagate = True
+
+
+def test_queueing_handler_requires_configured_handlers():
+    with pytest.raises(ValueError):
+        QueueingHandler(handlers=['test-missing-handler'])
@@ -0,0 +1,77 @@
+import asyncio
+import time
+
+import pytest
+
+from callblocker.core import loopmonitor
+from callblocker.core.loopmonitor import STALLS
+from callblocker.core.service import AsyncioEventLoop
+from callblocker.core.tests.utils import await_predicate
+
+
+@pytest.fixture
+def monitored_loop(request):
+    loop = AsyncioEventLoop(**request.param)
+    loop.sync_start(10)
+    yield loop
+    loop.sync_stop(10)
+
+
+@pytest.mark.parametrize('monitored_loop', [{'probe_interval': 0.05}], indirect=True)
+def test_measures_lag(monitored_loop):
+    aio_loop = monitored_loop
+    aio_loop.aio_loop.call_soon_threadsafe(time.sleep, 0.3)
+
+    await_predicate(lambda: aio_loop.monitor.max_lag >= 0.25, 5)
+    # Lag goes back to normal once the loop is free again.
+    await_predicate(lambda: aio_loop.monitor.lag < 0.05, 5)
+
+    info = aio_loop.status().info
+    assert info['max_lag'] >= 0.25
+    # No threshold, no stall detection.
+    assert info['stalls'] == []
+
+
+@pytest.mark.parametrize('monitored_loop', [{'probe_interval': 0.05, 'slow_callback_threshold': 0.1}],
+                         indirect=True)
+def test_records_stalls(monitored_loop):
+    aio_loop = monitored_loop
+    stalls = STALLS.labels().value
+
+    async def stalling_coroutine():
+        blocking_step()
+
+    asyncio.run_coroutine_threadsafe(stalling_coroutine(), aio_loop.aio_loop)
+
+    await_predicate(lambda: aio_loop.monitor.stalls and aio_loop.monitor.stalls[0]['duration'] >= 0.35, 5)
+
+    stall, = aio_loop.status().info['stalls']
+    assert 'stalling_coroutine' in stall['task']
+    assert 'in blocking_step' in stall['stack'][-1]
+    assert STALLS.labels().value == stalls + 1
+
+
+@pytest.mark.parametrize('monitored_loop', [{'probe_interval': 0.05, 'slow_callback_threshold': 0.1}],
+                         indirect=True)
+def test_keeps_watching_when_stalls_end_while_being_reported(monitored_loop, monkeypatch):
+    aio_loop = monitored_loop
+
+    class SlowCounter(object):
+        def inc(self):
+            # Reports the stall only once the loop got going again.
+            await_predicate(lambda: aio_loop.monitor._stall is None, 5)
+
+    monkeypatch.setattr(loopmonitor, 'STALLS', SlowCounter())
+
+    for stalls in [1, 2]:
+        aio_loop.aio_loop.call_soon_threadsafe(time.sleep, 0.3)
+        await_predicate(lambda: len(aio_loop.monitor.stalls) == stalls and aio_loop.monitor._stall is None, 5)
+
+
+def test_no_monitor_by_default(aio_loop):
+    assert aio_loop.monitor is None
+    assert aio_loop.status().info is None
+
+
+def blocking_step():
+    time.sleep(0.4)
@@ -0,0 +1,87 @@
+import pytest
+
+from callblocker.core.metrics import Registry, Counter, Gauge, Summary, merge
+
+
+def test_renders_exposition_format():
+    registry = Registry()
+    lines = Counter('lines_total', 'Lines read.', registry=registry)
+    events = Counter('events_total', 'Events, by type.', ['type'], registry=registry)
+    depth = Gauge('depth', 'Queue depth.', registry=registry)
+    latency = Summary('latency_seconds', 'Latency.', registry=registry)
+
+    lines.inc()
+    lines.inc(2)
+    events.labels('RING').inc()
+    events.labels('CALL_ID').inc()
+    events.labels('RING').inc()
+    depth.set(7)
+    latency.observe(0.5)
+    latency.observe(0.25)
+
+    assert registry.exposition() == (
+        '# HELP lines_total Lines read.\n'
+        '# TYPE lines_total counter\n'
+        'lines_total 3\n'
+        '# HELP events_total Events, by type.\n'
+        '# TYPE events_total counter\n'
+        'events_total{type="RING"} 2\n'
+        'events_total{type="CALL_ID"} 1\n'
+        '# HELP depth Queue depth.\n'
+        '# TYPE depth gauge\n'
+        'depth 7\n'
+        '# HELP latency_seconds Latency.\n'
+        '# TYPE latency_seconds summary\n'
+        'latency_seconds_count 2\n'
+        'latency_seconds_sum 0.75\n'
+    )
+
+
+def test_collects_gauges_at_scrape_time():
+    registry = Registry()
+    states = {'modem': 'READY'}
+    Gauge('state', 'Service states.', ['service', 'state'], registry=registry, collect=lambda: [
+        ((service, state), 1) for service, state in states.items()
+    ])
+
+    assert 'state{service="modem",state="READY"} 1\n' in registry.exposition()
+    states['modem'] = 'ERRORED'
+    assert 'state{service="modem",state="ERRORED"} 1\n' in registry.exposition()
+
+
+def test_merges_processes():
+    daemon, web = Registry(), Registry()
+    Counter('events_total', 'Events, by type.', ['type'], registry=daemon).labels('RING').inc()
+    Counter('events_total', 'Events, by type.', ['type'], registry=web).labels('RING').inc(2)
+    Gauge('depth', 'Queue depth.', registry=web).set(7)
+
+    assert merge({'daemon': daemon.families(), 'web': web.families()}) == (
+        '# HELP events_total Events, by type.\n'
+        '# TYPE events_total counter\n'
+        'events_total{type="RING",process="daemon"} 1\n'
+        'events_total{type="RING",process="web"} 2\n'
+        '# HELP depth Queue depth.\n'
+        '# TYPE depth gauge\n'
+        'depth{process="web"} 7\n'
+    )
+
+
+def test_escapes_label_values():
+    registry = Registry()
+    Counter('events_total', 'Events.', ['contents'], registry=registry).labels('say "hi"\\\n').inc()
+
+    assert 'events_total{contents="say \\"hi\\"\\\\\\n"} 1\n' in registry.exposition()
+
+
+def test_validates_labels():
+    registry = Registry()
+    events = Counter('events_total', 'Events.', ['type'], registry=registry)
+
+    with pytest.raises(ValueError):
+        events.inc()
+
+    with pytest.raises(ValueError):
+        events.labels('RING', 'extra')
+
+    with pytest.raises(ValueError):
+        Counter('events_total', 'Again.', registry=registry)
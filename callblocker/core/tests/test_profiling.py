@@ -0,0 +1,77 @@
+import logging
+import pstats
+
+import pytest
+
+from callblocker.core.profiling import ProfileStore, Profiler, profiled
+from callblocker.core.service import ServiceState
+
+
+def busy_work():
+    return sum(i * i for i in range(1000))
+
+
+def test_stores_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path / 'profiles'), max_profiles=3)
+    assert store.list() == []
+
+    names = []
+    for i in range(5):
+        with profiled(store, 'request', f'GET /api/callers/{i}'):
+            busy_work()
+        names.append(store.list()[0].name)
+
+    # Only the latest ones are kept, latest first.
+    profiles = store.list()
+    assert [profile.name for profile in profiles] == list(reversed(names[-3:]))
+    assert profiles[0].kind == 'request'
+    assert profiles[0].label == 'GET_api_callers_4'
+    assert profiles[0].size > 0
+
+    stats = pstats.Stats(store.path(profiles[0].name))
+    assert any(function == 'busy_work' for _, _, function in stats.stats)
+
+
+def test_rejects_unknown_profiles(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=3)
+    (tmp_path / 'secret').write_text('hush')
+
+    for name in ['secret', '../secret', '20200101T000000000000-request-x-0123abcd.prof']:
+        with pytest.raises(LookupError):
+            store.path(name)
+
+
+def test_never_fails_what_it_profiles(tmp_path, caplog):
+    # Can't save profiles into a file.
+    (tmp_path / 'file').write_text('')
+    store = ProfileStore(str(tmp_path / 'file'), max_profiles=3)
+
+    with caplog.at_level(logging.ERROR):
+        with profiled(store, 'request', 'GET /'):
+            result = busy_work()
+
+    assert result == busy_work()
+    assert 'Failed to save request profile' in caplog.text
+
+
+def test_profiles_only_while_running(tmp_path):
+    store = ProfileStore(str(tmp_path), max_profiles=10)
+    profiler = Profiler(store)
+    assert not profiler.autostart
+
+    with profiler.profile('event', 'CALL_ID'):
+        busy_work()
+    assert store.list() == []
+
+    profiler.sync_start(5)
+    assert profiler.status().info == {'directory': str(tmp_path)}
+    with profiler.profile('event', 'CALL_ID'):
+        busy_work()
+    assert [(profile.kind, profile.label) for profile in store.list()] == [('event', 'CALL_ID')]
+
+    profiler.sync_stop(5)
+    assert profiler.status().state == ServiceState.TERMINATED
+    with profiler.profile('event', 'CALL_ID'):
+        busy_work()
+    assert len(store.list()) == 1
+
@@ -101,3 +101,44 @@ def service_test(service: BaseService):
     assert service.status().state == ServiceState.TERMINATED
     assert service.status().exception is None
     assert service.status().traceback is None
+
+
+def test_publishes_state_transitions():
+    service = BuggyThreadedService()
+    transitions = []
+    service.add_observer(transitions.append)
+
+    service.sync_start(10)
+    status = service.status()
+    # Statuses only get rebuilt on transitions.
+    assert service.status() is status
+
+    service.die()
+    await_predicate(lambda: service.status().state == ServiceState.ERRORED, 5)
+    service.sync_start(10)
+    service.sync_stop(10)
+
+    S = ServiceState
+    assert [(transition.previous, transition.state) for transition in transitions] == [
+        (S.INITIAL, S.STARTING), (S.STARTING, S.READY), (S.READY, S.ERRORED),
+        (S.ERRORED, S.STARTING), (S.STARTING, S.READY), (S.READY, S.STOPPING), (S.STOPPING, S.TERMINATED)
+    ]
+    assert all(transition.service is service for transition in transitions)
+    assert transitions[2].exception.args[0] == "Oh I'm so buggy."
+    assert transitions[-1].exception is None
+    assert transitions[0].time <= transitions[-1].time
+
+
+def test_survives_failing_observers():
+    service = BuggyThreadedService()
+    service.add_observer(lambda transition: 1 / 0)
+    transitions = []
+    service.add_observer(transitions.append)
+
+    service.sync_start(10)
+    assert service.status().state == ServiceState.READY
+    assert len(transitions) == 2
+
+    service.remove_observer(transitions.append)
+    service.sync_stop(10)
+    assert len(transitions) == 2
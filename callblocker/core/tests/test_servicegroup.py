@@ -0,0 +1,119 @@
+import time
+from threading import Event
+
+import pytest
+
+from callblocker.core.service import ThreadedService, ServiceState
+from callblocker.core.servicegroup import ServiceGroupSpec, ServiceEntry
+
+
+class SlowService(ThreadedService):
+    def __init__(self, delay: float, log: list, fail: bool = False, hang: bool = False):
+        super().__init__()
+        self.delay = delay
+        self.log = log
+        self.fail = fail
+        self.hang = hang
+        self.running = Event()
+
+    @property
+    def name(self):
+        return f'slow service {self.id}'
+
+    def _event_loop(self):
+        self.running.clear()
+        time.sleep(self.delay)
+        if self.fail:
+            raise Exception('Failed to start.')
+        if not self.hang:
+            self._signal_started()
+        self.running.wait()
+        self.log.append(self.id)
+
+    def _halt_event_loop(self):
+        self.running.set()
+
+
+def test_starts_independent_services_concurrently():
+    log = []
+    group = ServiceGroupSpec(
+        a=lambda _: SlowService(0.3, log),
+        b=lambda _: SlowService(0.3, log),
+        c=ServiceEntry(lambda _: SlowService(0.3, log), deps=['a', 'b'])
+    ).bootstrap()
+
+    start = time.perf_counter()
+    group.start(5)
+    elapsed = time.perf_counter() - start
+
+    assert all(service.status().state == ServiceState.READY for service in group.services)
+    # The critical path is a (or b) and then c.
+    assert 0.6 <= elapsed < 0.85
+
+    timeline = {entry.service: entry for entry in group.timeline}
+    assert timeline['c'].started >= max(timeline['a'].elapsed, timeline['b'].elapsed)
+    assert 'critical path: ' in group.timeline_report()
+
+    group.shutdown(5)
+    assert all(service.status().state == ServiceState.TERMINATED for service in group.services)
+    assert log[0] == 'c'
+
+
+def test_stops_dependents_first():
+    log = []
+    group = ServiceGroupSpec(
+        a=lambda _: SlowService(0, log),
+        b=ServiceEntry(lambda _: SlowService(0, log), deps=['a']),
+        c=ServiceEntry(lambda _: SlowService(0, log), deps=['b'])
+    ).bootstrap()
+
+    group.start(5)
+    group.shutdown(5)
+
+    assert log == ['c', 'b', 'a']
+
+
+@pytest.mark.parametrize('failure', [{'fail': True}, {'hang': True}])
+def test_skips_dependents_of_failed_services(failure):
+    log = []
+    group = ServiceGroupSpec(
+        a=lambda _: SlowService(0, log, **failure),
+        b=ServiceEntry(lambda _: SlowService(0, log), deps=['a']),
+        c=lambda _: SlowService(0, log)
+    ).bootstrap()
+
+    group.start(0.5)
+
+    assert group.a.status().state == (ServiceState.ERRORED if 'fail' in failure else ServiceState.STARTING)
+    assert group.b.status().state == ServiceState.INITIAL
+    assert group.c.status().state == ServiceState.READY
+
+    group.c.sync_stop(5)
+    group.a.running.set()
+
+
+def test_leaves_services_which_do_not_autostart_alone():
+    log = []
+    group = ServiceGroupSpec(
+        a=lambda _: SlowService(0, log),
+        b=lambda _: SlowService(0, log)
+    ).bootstrap()
+    group.b.autostart = False
+
+    group.start(5)
+    assert group.a.status().state == ServiceState.READY
+    assert group.b.status().state == ServiceState.INITIAL
+
+    # Unless asked for.
+    group.start(5, ids=['b'])
+    assert group.b.status().state == ServiceState.READY
+
+    group.shutdown(5)
+
+
+def test_rejects_unknown_dependencies():
+    with pytest.raises(ValueError):
+        ServiceGroupSpec(
+            a=ServiceEntry(lambda _: SlowService(0, []), deps=['b']),
+            b=lambda _: SlowService(0, [])
+        ).bootstrap()
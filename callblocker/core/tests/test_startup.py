@@ -0,0 +1,54 @@
+import sys
+import time
+
+from callblocker.core.startup import ImportTimer, Phases
+
+
+def test_times_nested_imports(tmp_path, monkeypatch):
+    (tmp_path / 'startup_outer.py').write_text('import time\nimport startup_inner\ntime.sleep(0.02)\n')
+    (tmp_path / 'startup_inner.py').write_text('import time\ntime.sleep(0.05)\n')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    try:
+        with ImportTimer() as timer:
+            import startup_outer  # noqa: F401
+            import startup_outer  # noqa: F401, F811
+    finally:
+        sys.modules.pop('startup_outer', None)
+        sys.modules.pop('startup_inner', None)
+
+    timings = {timing.module: timing for timing in timer.imports}
+    # Modules which are already imported aren't timed again.
+    assert [timing.module for timing in timer.imports] == ['startup_inner', 'startup_outer']
+
+    outer, inner = timings['startup_outer'], timings['startup_inner']
+    assert inner.self >= 0.05
+    assert outer.cumulative >= inner.cumulative + 0.02
+    assert 0.02 <= outer.self < inner.self
+    assert timer.slowest(1) == [outer]
+
+
+def test_stops_timing_on_exit(tmp_path, monkeypatch):
+    (tmp_path / 'startup_late.py').write_text('')
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    with ImportTimer() as timer:
+        pass
+
+    try:
+        import startup_late  # noqa: F401
+    finally:
+        sys.modules.pop('startup_late', None)
+
+    assert timer.imports == []
+
+
+def test_times_phases():
+    phases = Phases()
+    with phases.phase('first'):
+        time.sleep(0.01)
+    with phases.phase('second'):
+        pass
+
+    assert list(phases.timings) == ['first', 'second']
+    assert phases.timings['first'] >= 0.01
@@ -0,0 +1,123 @@
+from threading import Event
+
+import pytest
+
+from callblocker.core.service import ThreadedService, ServiceState
+from callblocker.core.servicegroup import ServiceGroupSpec, ServiceEntry
+from callblocker.core.supervisor import Supervisor, RestartPolicy
+from callblocker.core.tests.utils import await_predicate
+
+
+class MortalService(ThreadedService):
+    def __init__(self):
+        super().__init__()
+        self.running = Event()
+        self.outcome = None
+        self.starts = 0
+
+    @property
+    def name(self):
+        return f'mortal service {self.id}'
+
+    def die(self, outcome='error'):
+        self.outcome = outcome
+        self.running.set()
+
+    def _event_loop(self):
+        self.starts += 1
+        self.outcome = None
+        self.running.clear()
+        self._signal_started()
+        self.running.wait()
+        if self.outcome == 'error':
+            raise Exception('Died.')
+
+    def _halt_event_loop(self):
+        self.running.set()
+
+
+@pytest.fixture
+def supervised(request):
+    """A started group of services, whose supervisor has service a's policy set by the test's parameter."""
+    policy = dict(request.param)
+    interval = policy.pop('interval', 0.05)
+    group = ServiceGroupSpec(
+        a=lambda _: MortalService(),
+        b=ServiceEntry(lambda _: MortalService(), deps=['a']),
+        c=lambda _: MortalService(),
+        supervisor=lambda services: Supervisor(
+            services, {'a': RestartPolicy(**policy)}, RestartPolicy(backoff=0.05), interval=interval, timeout=5
+        )
+    ).bootstrap()
+    group.start(5)
+    yield group
+    group.shutdown(5)
+
+
+@pytest.mark.parametrize('supervised', [{'backoff': 0.05}], indirect=True)
+def test_restarts_failed_services_with_their_dependents(supervised):
+    group = supervised
+
+    group.a.die()
+    await_predicate(lambda: group.a.starts == 2 and group.a.status().state == ServiceState.READY, 5)
+    await_predicate(lambda: group.b.starts == 2 and group.b.status().state == ServiceState.READY, 5)
+    assert group.c.starts == 1
+
+    # Dependents get restarted on their own too.
+    group.b.die()
+    await_predicate(lambda: group.b.starts == 3 and group.b.status().state == ServiceState.READY, 5)
+    assert group.a.starts == 2
+
+
+@pytest.mark.parametrize('supervised', [{'interval': 60, 'backoff': 0.05}], indirect=True)
+def test_reacts_to_transitions_without_polling(supervised):
+    group = supervised
+
+    group.a.die()
+    await_predicate(lambda: group.a.starts == 2 and group.a.status().state == ServiceState.READY, 5)
+    await_predicate(lambda: group.b.starts == 2 and group.b.status().state == ServiceState.READY, 5)
+
+
+@pytest.mark.parametrize('supervised', [{'backoff': 0.05, 'max_restarts': 2, 'window': 60}], indirect=True)
+def test_limits_restarts_within_window(supervised):
+    group = supervised
+
+    for starts in [2, 3]:
+        group.a.die()
+        await_predicate(lambda: group.a.starts == starts and group.a.status().state == ServiceState.READY, 5)
+
+    group.a.die()
+    with pytest.raises(TimeoutError):
+        await_predicate(lambda: group.a.starts > 3, 0.5)
+    assert group.a.status().state == ServiceState.ERRORED
+
+
+@pytest.mark.parametrize('supervised,restarted', [
+    ({'restart': 'on-failure', 'backoff': 0.05}, False),
+    ({'restart': 'always', 'backoff': 0.05}, True)
+], indirect=['supervised'])
+def test_restarts_terminated_services_by_policy(supervised, restarted):
+    group = supervised
+
+    group.a.die('gracefully')
+    if restarted:
+        await_predicate(lambda: group.a.starts == 2 and group.a.status().state == ServiceState.READY, 5)
+    else:
+        with pytest.raises(TimeoutError):
+            await_predicate(lambda: group.a.starts > 1, 0.5)
+        assert group.a.status().state == ServiceState.TERMINATED
+
+
+@pytest.mark.parametrize('supervised', [{'restart': 'always', 'backoff': 0.05}], indirect=True)
+def test_leaves_services_stopped_on_request_alone(supervised):
+    group = supervised
+
+    group.a.sync_stop(5)
+    with pytest.raises(TimeoutError):
+        await_predicate(lambda: group.a.starts > 1, 0.5)
+    assert group.a.status().state == ServiceState.TERMINATED
+
+
+def test_backs_off_exponentially():
+    policy = RestartPolicy(backoff=1, max_backoff=5)
+    assert [policy.delay(restarts) for restarts in range(5)] == [1, 2, 4, 5, 5]
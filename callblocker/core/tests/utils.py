@@ -1,9 +1,12 @@
 import time
+from contextlib import contextmanager
 from threading import Event
 from typing import Callable
 
 import netifaces
 
+from callblocker.core.db.queries import QueryCounter
+
 
 class EventWaiter(object):
     def __init__(self):
@@ -28,6 +31,19 @@ def await_predicate(predicate: Callable[[], bool], timeout: float):
     raise TimeoutError('Predicate timed out.')
 
 
+@contextmanager
+def query_budget(queries: int):
+    """
+    Fails if the enclosed block runs more than `queries` SQL queries, listing the queries it ran. Yields the
+    :class:`QueryCounter`, for comparing query counts across runs.
+    """
+    with QueryCounter() as counter:
+        yield counter
+
+    assert counter.queries <= queries, \
+        f'Ran {counter.queries} queries, over a budget of {queries}:\n' + '\n'.join(counter.statements)
+
+
 def local_ip_addresses():
     return [
         ipv4['addr'] for interface in netifaces.interfaces() for ipv4 in
@@ -20,7 +20,6 @@ from django.urls import path, include
 from rest_framework_bulk.routes import BulkRouter
 from rest_framework_nested.routers import NestedSimpleRouter
 
-from callblocker.blocker import bootstrap
 from callblocker.blocker.api import views as api_views
 from callblocker.blocker.api.views import CallViewSet
 
@@ -50,12 +49,19 @@ bulk_router.register(
 )
 
 urlpatterns = [
+    # Must come before the routers, or it gets taken for a service.
+    path('api/services/events/', api_views.service_events),
     url(r'^api/', include(bulk_router.urls)),
     url(r'^api/', include(nested_router.urls)),
     path('api/modem/', api_views.modem),
     path('api/log/', api_views.log),
+    path('api/live/', api_views.live),
+    path('api/export/callers/', api_views.export_callers),
+    path('api/export/calls/', api_views.export_calls),
+    path('api/import/callers/', api_views.import_callers),
+    path('api/metrics/', api_views.metrics),
+    path('api/profiles/', api_views.profiles),
+    path('api/profiles/<str:name>/', api_views.profile),
+    path('api/stats/', api_views.stats),
     path('admin/', admin.site.urls)
 ]
-
-# Oh, Django... why do you make me do this?
-bootstrap.bootstrap()
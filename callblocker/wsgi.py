@@ -17,10 +17,18 @@ from callblocker.blocker import BootstrapMode
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'conf.settings.production')
 
+# If there's a modem daemon, it runs the services for us.
 blocker.bootstrap_mode(
-    BootstrapMode.FAKE_SERVER
+    BootstrapMode.COMMAND
+    if settings.MODEM_DAEMON_SOCKET
+    else BootstrapMode.FAKE_SERVER
     if settings.MODEM_USE_FAKE
     else BootstrapMode.SERVER
 )
 
 application = get_wsgi_application()
+
+# Starts monitoring the modem right away instead of on the first request. Services need the app registry,
+# so this can only be imported now.
+from callblocker.blocker.services import services  # noqa: E402
+services()
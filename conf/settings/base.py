@@ -11,6 +11,7 @@ https://docs.djangoproject.com/en/2.2/ref/settings/
 """
 
 import os
+import tempfile
 
 from os import environ
 
@@ -27,17 +28,90 @@ MODEM_DEVICE = '/dev/ttyACM0'
 MODEM_BAUD = 115200
 #: Use fake modem (will ignore MODEM_DEVICE).
 MODEM_USE_FAKE = bool_env('MODEM_USE_FAKE', 'False')
-#: Telecom operator.
+#: Telecom operator, out of the built-in ones (see callblocker.blocker.telcos) and those in TELCO_RULES.
 MODEM_TELCO_PROVIDER = 'Vivo'
+#: Rules for splitting caller ids into area codes and numbers, by telecom operator, on top of the built-in ones.
+#: See callblocker.blocker.telcos for the format.
+TELCO_RULES = {}
+#: How many of the most recently parsed caller ids to remember, per operator.
+TELCO_CID_CACHE_SIZE = 1024
+#: Unix socket of the modem daemon (see the rundaemon command). If set, web processes do not run the modem
+#: services themselves, and control the daemon's instead. This allows running several uWSGI processes.
+MODEM_DAEMON_SOCKET = environ.get('MODEM_DAEMON_SOCKET') or None
+#: How long, in seconds, to wait for the modem daemon to answer.
+MODEM_DAEMON_TIMEOUT = 5
+
+#: How long, in seconds, to wait for each service to start when starting services. Services which depend on
+#: one which takes longer are not started.
+SERVICE_START_TIMEOUT = 30
+#: How long, in seconds, to wait for each service to stop when shutting services down.
+SERVICE_STOP_TIMEOUT = 10
+#: How services which die get restarted, by service id. Services not listed get the 'default' policy. See
+#: callblocker.core.supervisor.RestartPolicy for the options.
+SERVICE_RESTART_POLICIES = {
+    'default': {'restart': 'on-failure', 'max_restarts': 10, 'window': 600, 'backoff': 1, 'max_backoff': 60},
+}
+#: How often, in seconds, the supervisor checks on services regardless of state transitions. The supervisor
+#: reacts to transitions right away, so this is only a safety net.
+SUPERVISOR_INTERVAL = 30
 
 #: API similarity threshold for trigram-similarity-based text searches. It has to be set
 #: to low as we'll otherwise miss searches ,such as single characters, which are common
 #: in autocomplete.
 TRGM_SIM_THRESHOLD = 0.05
 
+#: How many events to buffer, per client, in the live event feed. Slow clients will miss the oldest events
+#: once their buffer fills up.
+LIVE_FEED_BUFFER_SIZE = 100
+#: Interval, in seconds, between heartbeat frames in the live event feed when there are no events to send.
+LIVE_FEED_HEARTBEAT = 15
+
+#: Maximum time, in seconds, a client can wait for new entries when long-polling the log API.
+LOG_MAX_WAIT = 30
+
+#: How many rows to fetch per round trip, and encode per write, when streaming exports.
+EXPORT_CHUNK_SIZE = 2000
+
+#: How many months ahead of the current one the partitioncalls command creates call log partitions for.
+CALL_PARTITIONS_AHEAD = 2
+#: How many months of call log to keep, besides the current one. None keeps everything. Older months are
+#: summarized per caller and then dropped, or detached if CALL_RETENTION_ARCHIVE is set.
+CALL_RETENTION_MONTHS = None
+CALL_RETENTION_ARCHIVE = False
+
+#: Event loop implementation the modem services run on: 'asyncio', 'uvloop' (if installed), or the dotted path
+#: to a callable returning a new event loop. Falls back to 'asyncio' if the backend can't be imported. See
+#: `python -m benchmarks.eventloops` for how the backends compare.
+EVENT_LOOP_BACKEND = 'asyncio'
+#: How often, in seconds, to measure the lag of the asyncio event loop which runs the modem services. Lag
+#: shows up in the loop's service status and in metrics. None disables measuring.
+EVENT_LOOP_PROBE_INTERVAL = 0.5
+#: If set, whenever the asyncio event loop gets stuck in a single step for longer than this many seconds, the
+#: running task and its stack get logged and shown in the loop's service status. Off by default, since it
+#: takes a watchdog thread which wakes up twice per threshold.
+EVENT_LOOP_SLOW_CALLBACK_THRESHOLD = None
+
+#: Where profiles get saved while profiling is on (see callblocker.core.profiling). Profiling gets switched on
+#: and off by starting and stopping the profiler service, and saved profiles are served at /api/profiles/.
+PROFILE_DIR = environ.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'callblocker-profiles')
+#: How many profiles to keep. The oldest ones get deleted as new ones come in.
+PROFILE_MAX_PROFILES = 100
+#: Path prefixes of the API requests to profile while profiling is on.
+PROFILE_PATHS = ['/api/']
+#: How long, in seconds, web processes go before checking again whether profiling is on.
+PROFILE_STATE_TTL = 5
+
 #: How long to keep DB connections open. Given the private nature of our database, it makes
 #: sense to hold on to them as much as possible.
 DB_CONN_MAX_AGE = 600
+#: Maximum number of DB connections, shared between request threads and services. This should be at
+#: least the number of uWSGI threads plus DB_POOL_RESERVED.
+DB_POOL_SIZE = 10
+#: DB connections only the asyncio event loop thread (which runs the call monitor) may use, so that a
+#: burst of requests can't block the event loop for up to DB_POOL_TIMEOUT.
+DB_POOL_RESERVED = 1
+#: How long, in seconds, to wait for a DB connection when all of them are in use.
+DB_POOL_TIMEOUT = 10
 
 # Build paths inside the project like this: os.path.join(BASE_DIR, ...)
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -64,6 +138,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # First, so that profiles cover the other middleware too.
+    'callblocker.blocker.api.middleware.ProfilingMiddleware',
+    'callblocker.blocker.api.middleware.QueryCountMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
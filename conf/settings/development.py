@@ -37,13 +37,20 @@ LOGGING = {
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'callblocker.core.db',
         'NAME': 'blocker',
         'USER': 'devel',
         'PASSWORD': 'devel',
         'HOST': environ.get('DB_HOST', 'localhost'),
         'PORT': '5432',
-        'CONN_MAX_AGE': DB_CONN_MAX_AGE
+        # Connections go back to the pool after every request.
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool_size': DB_POOL_SIZE,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_reserved': DB_POOL_RESERVED,
+            'pool_max_age': DB_CONN_MAX_AGE
+        }
     }
 }
 
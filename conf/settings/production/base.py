@@ -10,22 +10,36 @@ LOGGING = {
         'api': {
             'class': 'callblocker.core.logging.TailHandler',
             'tail_size': 100
+        },
+        # Feeds the handlers above from a background thread, so that the modem and call monitor
+        # never block on logging. Its name has to sort after theirs.
+        'queue': {
+            'class': 'callblocker.core.logging.QueueingHandler',
+            'handlers': ['api', 'console'],
+            'queue_size': 10000
         }
     },
     'root': {
-        'handlers': ['console', 'api'],
+        'handlers': ['queue'],
         'level': 'INFO'
     }
 }
 
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.postgresql',
+        'ENGINE': 'callblocker.core.db',
         'NAME': environ['DB_NAME'],
         'USER': environ['DB_USER'],
         'PASSWORD': environ['DB_PASSWORD'],
         'HOST': environ['DB_HOST'],
         'PORT': environ['DB_PORT'],
-        'CONN_MAX_AGE': DB_CONN_MAX_AGE
+        # Connections go back to the pool after every request.
+        'CONN_MAX_AGE': 0,
+        'OPTIONS': {
+            'pool_size': DB_POOL_SIZE,
+            'pool_timeout': DB_POOL_TIMEOUT,
+            'pool_reserved': DB_POOL_RESERVED,
+            'pool_max_age': DB_CONN_MAX_AGE
+        }
     }
 }
@@ -19,11 +19,15 @@ function ServiceList(props: ServiceListProps) {
 
   const {dispatch, services} = props;
 
+  // Refreshes the list whenever a service changes state, rather than polling for changes.
   useEffect(() => {
-    const intervalId = setInterval(
-      () => dispatch(fetchServices()), API_PARAMETERS.pollingInterval
-    );
-    return () => clearInterval(intervalId);
+    dispatch(fetchServices());
+    const events = new EventSource(`${API_PARAMETERS.endpoint()}api/services/events/`);
+    events.addEventListener('transition', () => dispatch(fetchServices()));
+    // Transitions published while we were disconnected (e.g. during a restart) are lost, so we refetch
+    // whenever the stream (re)connects.
+    events.onopen = () => dispatch(fetchServices());
+    return () => events.close();
   }, []);
 
   function doModifyService(service: Service, state: ServiceStateType) {